@@ -0,0 +1,68 @@
+"""
+Backfill command of the xetra ETL
+
+Processes the dates missing in the meta file in batches run in parallel, rerun it after a crash to resume
+from the last checkpointed batch, e.g.
+
+    python backfill_xetra_data.py --first_dt 2022-01-03 --batch_size 5 --parallelism 4
+
+pandas and the ETL modules are imported after the arguments are parsed, so --help answers without them.
+"""
+import argparse
+from datetime import datetime, timedelta
+
+
+def get_backfill_arguments(p_date_format: str, p_days_delta: int, p_default_date: str):
+    parser = argparse.ArgumentParser(description='Backfill the dates missing in the meta file')
+    parser.add_argument('--first_dt', default=p_default_date, metavar='YYYY-MM-DD', help='First backfill date',
+                        type=str)
+    parser.add_argument('--last_dt', default=None, metavar='YYYY-MM-DD',
+                        help='Last backfill date, defaults to today minus the days delta', type=str)
+    parser.add_argument('--batch_size', default=5, help='Source dates per batch', type=int)
+    parser.add_argument('--parallelism', default=4, help='Batches processed at the same time', type=int)
+    args = parser.parse_args()
+    if args.last_dt is None:
+        args.last_dt = (datetime.now().date() - timedelta(days=p_days_delta)).strftime(p_date_format)
+    return args
+
+
+def main():
+    default_date = '2022-03-15'
+    date_format = '%Y-%m-%d'
+    file_delimiter = ','
+    target_key = 'main_data_'
+    target_key_date_format = '%Y%m%d'
+    state_key = '_closing_price_state.parquet'
+    days_delta = 1
+
+    args = get_backfill_arguments(date_format, days_delta, default_date)
+    from configs.etl_config import DATA_SET_PATH, META_FILE_PATH, OUTPUT_FILE_PATH, SOURCE_CONFIG, \
+        SOURCE_INDEX_PATH
+    from configs.process_logger import ProcessLog
+    from get_xtera_data import backfill_process
+    from xetra.common.constants import ExtractSettings
+    # plain, gzip and zstd compressed source files, the same extensions the extractor reads
+    file_extension = ExtractSettings.SOURCE_FILE_TYPES.value
+
+    ProcessLog(OUTPUT_FILE_PATH)
+    backfill_process(p_data_set_path=DATA_SET_PATH,
+                     p_output_file_path=OUTPUT_FILE_PATH,
+                     p_meta_file_path=META_FILE_PATH,
+                     p_first_date=args.first_dt,
+                     p_last_date=args.last_dt,
+                     p_batch_size=args.batch_size,
+                     p_parallelism=args.parallelism,
+                     p_date_format=date_format,
+                     p_file_delimiter=file_delimiter,
+                     p_file_extension=file_extension,
+                     p_target_key=target_key,
+                     p_target_key_date_format=target_key_date_format,
+                     p_state_key=state_key,
+                     p_src_columns=SOURCE_CONFIG.src_columns,
+                     p_src_dtypes=SOURCE_CONFIG.src_dtypes,
+                     p_source_index_path=SOURCE_INDEX_PATH
+                     )
+
+
+if __name__ == '__main__':
+    main()
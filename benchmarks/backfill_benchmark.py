@@ -0,0 +1,70 @@
+"""
+Benchmark for the resumable backfill_process of get_xtera_data
+Runs the backfill of generated trading days with a growing parallelism, asserts that every run writes
+the report of transform_data over all days and that a rerun finds nothing left to backfill
+
+Run from the project root: python -m benchmarks.backfill_benchmark --parallelism 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SRC_COLUMNS, SRC_DTYPES
+from benchmarks.synthetic_data import generate_source_days
+from get_xtera_data import backfill_process, extract_all, transform_data
+from xetra.common.meta_process import MetaProcess
+
+
+def run_backfill(source_path: str, work_path: str, date_strings: list, batch_size: int, parallelism: int):
+    """
+    Runs the backfill of the dates and returns the seconds and the written partitions
+    """
+    Path(work_path).mkdir(parents=True)
+    meta_key = str(Path(work_path, 'meta.db'))
+    start = time.perf_counter()
+    backfill_process(source_path, str(Path(work_path, 'output')), meta_key, date_strings[0], date_strings[-1],
+                     batch_size, parallelism, '%Y-%m-%d', ',', 'csv', 'report1_', '%Y%m%d', '_closing_state.parquet',
+                     SRC_COLUMNS, SRC_DTYPES)
+    seconds = time.perf_counter() - start
+    assert not MetaProcess.return_missing_dates(date_strings[0], meta_key, date_strings[-1])
+    report_df = pandas.concat([pandas.read_parquet(path) for path in
+                               sorted(Path(work_path, 'output').glob('report1_*.parquet'))], ignore_index=True)
+    return seconds, report_df.sort_values(by=['Date', 'ISIN'], ignore_index=True)
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, batch_size: int, parallelisms: list):
+    """
+    Prints the backfill seconds per parallelism and asserts that all runs write the same report
+    """
+    print(f'cpus: {os.cpu_count()}')
+    print(f'{"parallelism":<12}{"seconds":>10}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        date_strings = generate_source_days(source_path, '2022-03-01', days, isins_count, trades_per_minute)
+        expected_df = transform_data(extract_all(Path(source_path), ',', 'csv', date_strings, SRC_COLUMNS,
+                                                 SRC_DTYPES), None, '%Y-%m-%d')
+        expected_df = expected_df.sort_values(by=['Date', 'ISIN'], ignore_index=True)
+        for parallelism in parallelisms:
+            seconds, report_df = run_backfill(source_path, str(Path(temp_dir, f'backfill_{parallelism}')),
+                                              date_strings, batch_size, parallelism)
+            pandas.testing.assert_frame_equal(expected_df, report_df)
+            print(f'{parallelism:<12}{seconds:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the resumable backfill')
+    parser.add_argument('--days', default=20, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=400, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=100, type=int, help='Average source rows per minute')
+    parser.add_argument('--batch_size', default=5, type=int, help='Source dates per batch')
+    parser.add_argument('--parallelism', default=[1, 2, 4], type=int, nargs='+', help='Batches run at the same time')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.batch_size, args.parallelism)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark and parity check of the intraday OHLCV bars report
+Builds the 5, 15 and 60 minute bars of one synthetic trading day with OhlcvBarsReport, in one batch and
+in hourly batches, in the plain and the compact schema, and asserts that they equal a pandas reference
+that sorts the rows by time and aggregates them per ISIN, date and bar with groupby.
+A short etl_reports run writes the bars of all lengths to their date partitions.
+
+Run from the project root: python -m benchmarks.bars_benchmark
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days, source_day_df
+from xetra.common.compact_schema import compact_source_df
+from xetra.common.constants import MetaProcessFormat
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.reports import OhlcvBarsReport, OhlcvBarsTargetConfig
+from xetra.transformers.xetra_transformer import XetraETL
+
+BAR_MINUTES = [5, 15, 60]
+
+
+def bars_target_config(bar_minutes: int) -> OhlcvBarsTargetConfig:
+    """
+    :return: target configuration of the bars of bar_minutes
+    """
+    return OhlcvBarsTargetConfig(
+        bar_minutes=bar_minutes,
+        src_col_end_price='EndPrice',
+        trg_col_isin='ISIN',
+        trg_col_date='Date',
+        trg_col_bar_time='bar_time',
+        trg_col_open_price='open_price_eur',
+        trg_col_high_price='high_price_eur',
+        trg_col_low_price='low_price_eur',
+        trg_col_close_price='close_price_eur',
+        trg_col_traded_vol='traded_volume',
+        trg_key=f'bars_{bar_minutes}min/xetra_bars_{bar_minutes}min_',
+        trg_key_date_format='%Y%m%d',
+        trg_format='parquet'
+    )
+
+
+def reference_bars(data_frame: pandas.DataFrame, bar_minutes: int) -> pandas.DataFrame:
+    """
+    :return: bars of the source rows aggregated with a pandas groupby over the rows sorted by time
+    """
+    trg = bars_target_config(bar_minutes)
+    minutes = data_frame['Time'].str[:2].astype('int32') * 60 + data_frame['Time'].str[3:5].astype('int32')
+    bar_start = minutes // bar_minutes * bar_minutes
+    source_df = data_frame.assign(**{trg.trg_col_bar_time: (bar_start // 60).map('{:02d}'.format) + ':' +
+                                     (bar_start % 60).map('{:02d}'.format)})
+    source_df = source_df.sort_values(by=['Time'], kind='stable')
+    report_df = source_df.groupby(['ISIN', 'Date', trg.trg_col_bar_time], as_index=False).agg(**{
+        trg.trg_col_open_price: ('StartPrice', 'first'),
+        trg.trg_col_high_price: ('MaxPrice', 'max'),
+        trg.trg_col_low_price: ('MinPrice', 'min'),
+        trg.trg_col_close_price: ('EndPrice', 'last'),
+        trg.trg_col_traded_vol: ('TradedVolume', 'sum')
+    })
+    return report_df.round(decimals=2)
+
+
+def run_bars(batches: list, bar_minutes: int, compact: bool):
+    """
+    :return: bars of the batches and the seconds of adding the batches and building the result
+    """
+    report = OhlcvBarsReport(SOURCE_CONFIG._replace(src_compact_schema=compact), bars_target_config(bar_minutes))
+    start = time.perf_counter()
+    for batch_df in batches:
+        report.add(batch_df)
+    report_df = report.result()
+    return report_df, time.perf_counter() - start
+
+
+def run_benchmark(isins_count: int, trades_per_minute: int):
+    """
+    Prints the seconds of every bar length, batching and schema and asserts the parity with the reference
+    """
+    data_frame = source_day_df('2022-03-01', isins_count, trades_per_minute)
+    data_frame['TradedVolume'] = data_frame['TradedVolume'].astype('float64')
+    hourly_dfs = [hour_df for _, hour_df in data_frame.groupby(data_frame['Time'].str[:2])]
+    batches = {'plain': {'one batch': [data_frame], 'hourly': hourly_dfs}}
+    batches['compact'] = {name: [compact_source_df(batch_df, 'ISIN', 'Date', 'Time',
+                                                   ['StartPrice', 'MinPrice', 'MaxPrice'], 'TradedVolume',
+                                                   MetaProcessFormat.META_DATE_FORMAT.value)
+                                 for batch_df in batch_dfs]
+                          for name, batch_dfs in batches['plain'].items()}
+    print(f'{len(data_frame)} source rows')
+    print(f'{"bar":>6}{"schema":>10}{"batches":>12}{"bars":>10}{"seconds":>10}{"reference":>12}')
+    for bar_minutes in BAR_MINUTES:
+        start = time.perf_counter()
+        expected_df = reference_bars(data_frame, bar_minutes)
+        reference_seconds = time.perf_counter() - start
+        for schema, schema_batches in batches.items():
+            for name, batch_dfs in schema_batches.items():
+                report_df, seconds = run_bars(batch_dfs, bar_minutes, schema == 'compact')
+                volume_col = bars_target_config(bar_minutes).trg_col_traded_vol
+                # the compact schema holds the volume as integer
+                pandas.testing.assert_frame_equal(expected_df, report_df.astype({volume_col: 'float64'}))
+                print(f'{bar_minutes:>6}{schema:>10}{name:>12}{len(report_df):>10}{seconds:>10.3f}'
+                      f'{reference_seconds:>12.3f}')
+
+
+def check_partitions(isins_count: int, trades_per_minute: int):
+    """
+    Writes the bars of all lengths with etl_reports and asserts that every date has a partition per length
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        target_path = str(Path(temp_dir, 'target'))
+        date_strings = generate_source_days(source_path, '2022-03-01', 2, isins_count, trades_per_minute)
+        xetra_etl = XetraETL(FileOperations(source_path), FileOperations(target_path), None, SOURCE_CONFIG,
+                             TARGET_CONFIG)
+        xetra_etl.extract_date_list = date_strings
+        xetra_etl.etl_reports([OhlcvBarsReport(SOURCE_CONFIG, bars_target_config(bar_minutes))
+                               for bar_minutes in BAR_MINUTES])
+        for bar_minutes in BAR_MINUTES:
+            partitions = sorted(Path(target_path, f'bars_{bar_minutes}min').glob('*.parquet'))
+            assert len(partitions) == len(date_strings), partitions
+            bars_df = pandas.read_parquet(partitions[0])
+            assert numpy.all(bars_df['bar_time'].str[3:5].astype(int) % min(bar_minutes, 60) == 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the intraday OHLCV bars report')
+    parser.add_argument('--isins', default=5000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=4000, type=int, help='Average source rows per minute')
+    args = parser.parse_args()
+    run_benchmark(args.isins, args.trades)
+    check_partitions(200, 100)
+
+
+if __name__ == '__main__':
+    main()
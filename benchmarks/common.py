@@ -0,0 +1,23 @@
+"""
+Shared configuration of the benchmarks, the synthetic source data is generated by benchmarks.synthetic_data
+"""
+from configs.etl_config import SOURCE_CONFIG as ETL_SOURCE_CONFIG, SRC_COLUMNS, SRC_DTYPES
+from xetra.transformers.xetra_transformer import XetraTargetConfig
+
+# the columns of the ETL commands, benchmarks measuring the fixed dtypes set src_dtypes=SRC_DTYPES
+SOURCE_CONFIG = ETL_SOURCE_CONFIG._replace(src_dtypes=None)
+
+TARGET_CONFIG = XetraTargetConfig(
+    trg_col_isin='ISIN',
+    trg_col_date='Date',
+    trg_col_op_price='opening_price_eur',
+    trg_col_clos_price='closing_price_eur',
+    trg_col_min_price='minimum_price_eur',
+    trg_col_max_price='maximum_price_eur',
+    trg_col_dail_trad_vol='daily_traded_volume',
+    trg_col_ch_prev_clos='change_prev_closing_%',
+    trg_key='report1/xetra_daily_report1_',
+    trg_key_date_format='%Y%m%d',
+    trg_format='parquet'
+)
+
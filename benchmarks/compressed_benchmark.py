@@ -0,0 +1,98 @@
+"""
+Benchmark of the extraction of compressed source files
+Writes synthetic trading days as plain csv and compresses every file to .csv.gz and .csv.zst, then extracts
+each copy with XetraETL.extract and prints the wall seconds and the bytes read from the location.
+The gzip copy is also read with the decompression of pandas.read_csv, which decompresses in the parsing thread.
+The extracted data frames of all copies are checked against the plain csv files, also for the streaming extract.
+
+Run from the project root: python -m benchmarks.compressed_benchmark
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+import pyarrow
+
+from benchmarks.common import SOURCE_CONFIG, SRC_DTYPES, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.compressed_source import SOURCE_COMPRESSIONS
+from xetra.common.constants import FileTypes
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def compress_source_days(source_path: str, target_path: str, file_type: str):
+    """
+    Writes a copy of every csv file below source_path compressed to file_type below target_path
+    """
+    for csv_path in Path(source_path).glob(f'*/*.{FileTypes.CSV.value}'):
+        target_file = Path(target_path, csv_path.parent.name, f'{csv_path.stem}.{file_type}')
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        with pyarrow.output_stream(str(target_file), compression=SOURCE_COMPRESSIONS[file_type]) as stream:
+            stream.write(csv_path.read_bytes())
+
+
+def run_extract(source_path: str, date_strings: list, memory_budget_mb: int = 0):
+    """
+    :return: extracted data frame, wall seconds and bytes read from the location
+    """
+    files_source = FileOperations(source_path)
+    xetra_etl = XetraETL(files_source, None, None, SOURCE_CONFIG._replace(src_dtypes=SRC_DTYPES,
+                                                                          src_memory_budget_mb=memory_budget_mb),
+                         TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    start = time.perf_counter()
+    data_frame = xetra_etl.extract()
+    if memory_budget_mb:
+        data_frame = pandas.concat(list(data_frame), ignore_index=True)
+    return data_frame, time.perf_counter() - start, files_source.bytes_read
+
+
+def run_inline_gzip(source_path: str) -> float:
+    """
+    :return: wall seconds of reading the gzip copy with the decompression of pandas.read_csv
+    """
+    start = time.perf_counter()
+    for path in sorted(Path(source_path).glob(f'*/*.{FileTypes.CSV_GZ.value}')):
+        pandas.read_csv(path, usecols=SOURCE_CONFIG.src_columns, dtype=SRC_DTYPES, compression='gzip')
+    return time.perf_counter() - start
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int):
+    """
+    Prints seconds and bytes read of the plain and compressed copies and asserts their parity
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        plain_path = str(Path(temp_dir, FileTypes.CSV.value))
+        date_strings = generate_source_days(plain_path, '2022-03-01', days, isins_count, trades_per_minute)
+        source_paths = {FileTypes.CSV.value: plain_path}
+        for file_type in SOURCE_COMPRESSIONS:
+            source_paths[file_type] = str(Path(temp_dir, file_type))
+            compress_source_days(plain_path, source_paths[file_type], file_type)
+        print(f'{"source":<22}{"seconds":>10}{"MB read":>10}')
+        expected_df = None
+        for file_type, source_path in source_paths.items():
+            data_frame, seconds, bytes_read = run_extract(source_path, date_strings)
+            if expected_df is None:
+                expected_df = data_frame
+            pandas.testing.assert_frame_equal(expected_df, data_frame)
+            print(f'{file_type:<22}{seconds:>10.3f}{bytes_read / 1024 ** 2:>10.1f}')
+            streamed_df, _, _ = run_extract(source_path, date_strings, memory_budget_mb=2)
+            pandas.testing.assert_frame_equal(expected_df, streamed_df)
+        inline_seconds = run_inline_gzip(source_paths[FileTypes.CSV_GZ.value])
+        print(f'{"csv.gz pandas inline":<22}{inline_seconds:>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the extraction of compressed source files')
+    parser.add_argument('--days', default=3, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=2000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=1000, type=int, help='Average source rows per minute')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark of the report1 transform engines
+Runs transform_report1 with every engine of TransformEngines on the same extracted synthetic days
+and prints their run times, the parity of the engines is tested in tests/transformers
+
+Run from the project root: python -m benchmarks.engine_benchmark
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.constants import TransformEngines
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def run_engine(source_path: str, date_strings: list, engine: str, compact: bool, memory_budget_mb: int):
+    """
+    Extracts the dates and returns the seconds of transform_report1 with the engine
+    """
+    src_args = SOURCE_CONFIG._replace(src_transform_engine=engine, src_compact_schema=compact,
+                                      src_memory_budget_mb=memory_budget_mb)
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, src_args, TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    data_frame = xetra_etl.extract()
+    if memory_budget_mb:
+        # the chunks are read while they are transformed, extract them first to time the transformation only
+        data_frame = list(data_frame)
+    start = time.perf_counter()
+    xetra_etl.transform_report1(data_frame)
+    return time.perf_counter() - start
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, memory_budget_mb: int):
+    """
+    Prints the transform seconds of every engine and schema
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        date_strings = generate_source_days(temp_dir, '2022-03-01', days, isins_count, trades_per_minute)
+        print(f'{"engine":<10}{"schema":<10}{"seconds":>10}')
+        for compact in (False, True):
+            for engine in TransformEngines:
+                seconds = run_engine(temp_dir, date_strings, engine.value, compact, memory_budget_mb)
+                print(f'{engine.value:<10}{"compact" if compact else "plain":<10}{seconds:>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the report1 transform engines')
+    parser.add_argument('--days', default=5, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=1000, type=int, help='Average source rows per minute')
+    parser.add_argument('--budget', default=0, type=int, help='Memory budget in MB, streams chunks if set')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.budget)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark for get_xtera_data.extract_all
+Measures files/sec of the sequential and the parallel extraction for a growing worker count,
+with --cache also the first and a repeated sequential extraction through the source cache
+
+Run from the project root: python -m benchmarks.extract_benchmark
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SRC_COLUMNS, SRC_DTYPES
+from benchmarks.synthetic_data import generate_source_days
+from get_xtera_data import extract_all
+from xetra.common.source_cache import SourceCache
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, workers_list: list, cache: bool):
+    """
+    Time extract_all for every worker count and print files/sec
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dates = generate_source_days(temp_dir, '2022-03-14', days, isins_count, trades_per_minute)
+        files_count = sum(1 for _ in Path(temp_dir).glob('*/*.csv'))
+        baseline = None
+        print(f'{"mode":<20}{"workers":>8}{"seconds":>10}{"files/sec":>12}')
+        for workers in workers_list:
+            for use_processes in (False, True) if workers > 1 else (False,):
+                start = time.perf_counter()
+                data_frame = extract_all(Path(temp_dir), ',', 'csv', dates, SRC_COLUMNS, SRC_DTYPES,
+                                         workers, use_processes)
+                elapsed = time.perf_counter() - start
+                if baseline is None:
+                    baseline = data_frame
+                else:
+                    pandas.testing.assert_frame_equal(baseline, data_frame)
+                mode = 'process' if use_processes else 'thread'
+                print(f'{mode:<20}{workers:>8}{elapsed:>10.3f}{files_count / elapsed:>12.1f}')
+        if not cache:
+            return
+        with tempfile.TemporaryDirectory() as cache_dir:
+            source_cache = SourceCache(cache_dir)
+            for mode in ('cache cold', 'cache warm'):
+                start = time.perf_counter()
+                data_frame = extract_all(Path(temp_dir), ',', 'csv', dates, SRC_COLUMNS, SRC_DTYPES,
+                                         p_source_cache=source_cache)
+                elapsed = time.perf_counter() - start
+                pandas.testing.assert_frame_equal(baseline, data_frame)
+                print(f'{mode:<20}{1:>8}{elapsed:>10.3f}{files_count / elapsed:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel extraction of Xetra source files')
+    parser.add_argument('--days', default=5, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=1000, type=int, help='Average source rows per minute')
+    parser.add_argument('--workers', default=[1, 2, 4, 8], nargs='+', type=int, help='Worker counts to test')
+    parser.add_argument('--cache', action='store_true', help='Also measure reads through the source cache')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.workers, args.cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Memory report of the compact source schema
+Prints bytes per row of the extracted source data with and without src_compact_schema
+and checks that report1 is the same for both
+
+Run from the project root on a real day:  python -m benchmarks.memory_report --source <dataset root> --date 2022-03-15
+Without --source a synthetic day is generated.
+
+Run from the project root: python -m benchmarks.memory_report
+"""
+import argparse
+import tempfile
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def extract_day(source_path: str, date_string: str, compact: bool):
+    """
+    Extracts one day and returns the source data frame with its report1
+    """
+    src_args = SOURCE_CONFIG._replace(src_compact_schema=compact)
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, src_args, TARGET_CONFIG)
+    xetra_etl.extract_date_list = [date_string]
+    data_frame = xetra_etl.extract()
+    return data_frame, xetra_etl.transform_report1(data_frame)
+
+
+def print_report(source_path: str, date_string: str):
+    """
+    Prints the memory per column and row of both schemas
+    """
+    plain_df, plain_report_df = extract_day(source_path, date_string, False)
+    compact_df, compact_report_df = extract_day(source_path, date_string, True)
+    pandas.testing.assert_frame_equal(plain_report_df, compact_report_df, check_dtype=False)
+    plain_usage = plain_df.memory_usage(deep=True, index=False)
+    compact_usage = compact_df.memory_usage(deep=True, index=False)
+    print(f'rows: {len(plain_df)}')
+    print(f'{"column":<16}{"dtype":>10}{"bytes/row":>11}{"compact dtype":>15}{"bytes/row":>11}')
+    for column in plain_df.columns:
+        print(f'{column:<16}{str(plain_df[column].dtype):>10}{plain_usage[column] / len(plain_df):>11.1f}'
+              f'{str(compact_df[column].dtype):>15}{compact_usage[column] / len(compact_df):>11.1f}')
+    print(f'{"total":<16}{"":>10}{plain_usage.sum() / len(plain_df):>11.1f}'
+          f'{"":>15}{compact_usage.sum() / len(compact_df):>11.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory report of the compact source schema')
+    parser.add_argument('--source', default=None, type=str, help='Dataset root with date folders')
+    parser.add_argument('--date', default='2022-03-15', type=str, help='Date folder to load')
+    args = parser.parse_args()
+    if args.source is not None:
+        print_report(args.source, args.date)
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # a weekend date is moved to the next trading day
+        date_strings = generate_source_days(temp_dir, args.date, 1, 3000, 3000)
+        print_report(temp_dir, date_strings[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark for the pipelined etl_report1 of XetraETL
+Compares the run time of the sequential extract, transform_report1 and load with the pipelined etl_report1
+on the same source folders and asserts that both write the same partitions
+
+Source reads can be slowed down by a fixed latency per file to mimic object storage,
+where the pipeline overlaps the waiting for date N+1 with the transformation of date N.
+
+Run from the project root: python -m benchmarks.pipeline_benchmark --latency 0.2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+class SlowFileOperations(FileOperations):
+    """
+    FileOperations waiting a fixed latency before every csv read
+    """
+
+    def __init__(self, file_path: str, latency: float):
+        super().__init__(file_path)
+        self.latency = latency
+
+    def read_csv_to_df(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().read_csv_to_df(*args, **kwargs)
+
+
+def run_report1(source_path: str, target_path: str, date_strings: list, latency: float, pipelined: bool):
+    """
+    Runs report1 for the dates and returns the seconds and the written partitions
+    """
+    xetra_etl = XetraETL(SlowFileOperations(source_path, latency), FileOperations(target_path), None,
+                         SOURCE_CONFIG, TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    start = time.perf_counter()
+    if pipelined:
+        xetra_etl.etl_report1()
+    else:
+        xetra_etl.load(xetra_etl.transform_report1(xetra_etl.extract()))
+    seconds = time.perf_counter() - start
+    report_df = pandas.concat([pandas.read_parquet(key) for key in sorted(Path(target_path).rglob('*.parquet'))],
+                              ignore_index=True)
+    return seconds, report_df
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, latency: float):
+    """
+    Prints the run time of both modes and asserts that they write the same report
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        date_strings = generate_source_days(source_path, '2022-03-01', days, isins_count, trades_per_minute)
+        sequential_seconds, sequential_df = run_report1(source_path, str(Path(temp_dir, 'sequential')),
+                                                        date_strings, latency, False)
+        pipelined_seconds, pipelined_df = run_report1(source_path, str(Path(temp_dir, 'pipelined')),
+                                                      date_strings, latency, True)
+    pandas.testing.assert_frame_equal(sequential_df, pipelined_df)
+    print(f'{"mode":<12}{"seconds":>10}')
+    print(f'{"sequential":<12}{sequential_seconds:>10.2f}')
+    print(f'{"pipelined":<12}{pipelined_seconds:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipelined etl_report1')
+    parser.add_argument('--days', default=10, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=400, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=200, type=int, help='Average source rows per minute')
+    parser.add_argument('--latency', default=0.0, type=float, help='Seconds waited before every source file read')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.latency)
+
+
+if __name__ == '__main__':
+    main()
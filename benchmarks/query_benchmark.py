@@ -0,0 +1,113 @@
+"""
+Benchmark for ReportQuery lookups over a year of report1 partitions
+Times the lookup of one ISIN over all dates by loading every partition, by a query over the daily
+partitions, by a query over the clustered year and by a repeated query served from the result cache
+
+Run from the project root: python -m benchmarks.query_benchmark
+"""
+import argparse
+import tempfile
+import time
+
+import numpy
+import pandas
+
+from benchmarks.common import TARGET_CONFIG
+from benchmarks.synthetic_data import trading_dates
+from xetra.common.constants import QuerySettings
+from xetra.common.file_operations import FileOperations
+from xetra.common.partitioned_target import PartitionedTarget
+from xetra.common.report_query import ReportQuery
+
+
+def report_df(date_strings: list, isins_count: int, seed: int = 0) -> pandas.DataFrame:
+    """
+    Builds report1 shaped rows for every ISIN and date sorted by ISIN and date
+    """
+    rng = numpy.random.default_rng(seed)
+    trg = TARGET_CONFIG
+    rows_count = isins_count * len(date_strings)
+    prices = rng.uniform(1, 500, (4, rows_count)).round(2)
+    return pandas.DataFrame({
+        trg.trg_col_isin: numpy.repeat(numpy.array([f'DE{isin:010d}' for isin in range(isins_count)], dtype=object),
+                                       len(date_strings)),
+        trg.trg_col_date: numpy.tile(numpy.array(date_strings, dtype=object), isins_count),
+        trg.trg_col_op_price: prices[0],
+        trg.trg_col_clos_price: prices[1],
+        trg.trg_col_min_price: prices[2],
+        trg.trg_col_max_price: prices[3],
+        trg.trg_col_dail_trad_vol: rng.integers(0, 10 ** 6, rows_count),
+        trg.trg_col_ch_prev_clos: rng.normal(0, 2, rows_count).round(2)
+    })
+
+
+def timed(function, repeat: int = 5):
+    """
+    :return: result of the last call and the median seconds of the calls
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return result, sorted(seconds)[len(seconds) // 2]
+
+
+def run_benchmark(days: int, isins_count: int):
+    """
+    Prints the lookup times and asserts that all lookups return the same rows
+    """
+    trg = TARGET_CONFIG
+    date_strings = trading_dates('2021-01-04', days)
+    isins = [f'DE{isin:010d}' for isin in numpy.random.default_rng(1).integers(0, isins_count, 5)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_operations = FileOperations(temp_dir)
+        target = PartitionedTarget(file_operations, trg.trg_key, trg.trg_key_date_format, trg.trg_format,
+                                   trg.trg_col_date, row_group_rows=QuerySettings.ROW_GROUP_ROWS.value)
+        target.write_partitions(report_df(date_strings, isins_count))
+
+        def load_all(isin):
+            data_frame = pandas.concat([file_operations.read_parquet_to_df(key)
+                                        for key in target.latest_partitions()], ignore_index=True)
+            data_frame = data_frame[data_frame[trg.trg_col_isin] == isin]
+            return data_frame.sort_values(by=[trg.trg_col_isin, trg.trg_col_date], ignore_index=True)
+
+        def query(isin, cached: bool = False):
+            # a new ReportQuery has empty caches, a cached query is run once before it is timed
+            report_query = ReportQuery(file_operations, trg.trg_key, trg.trg_key_date_format, trg.trg_col_isin,
+                                       trg.trg_col_date)
+            if cached:
+                report_query.query([isin])
+            return lambda: report_query.query([isin])
+
+        expected_df, load_all_seconds = timed(lambda: load_all(isins[0]), 1)
+        partitions_df, partitions_seconds = timed(lambda: query(isins[0])())
+        ReportQuery(file_operations, trg.trg_key, trg.trg_key_date_format, trg.trg_col_isin,
+                    trg.trg_col_date).cluster_partitions(date_strings[0], date_strings[-1])
+        clustered_df, clustered_seconds = timed(lambda: query(isins[0])())
+        warm_query = ReportQuery(file_operations, trg.trg_key, trg.trg_key_date_format, trg.trg_col_isin,
+                                 trg.trg_col_date)
+        warm_query.query([isins[1]])
+        _, warm_seconds = timed(lambda: [warm_query.query([isin]) for isin in isins[2:]][-1], 1)
+        _, cached_seconds = timed(query(isins[0], cached=True))
+    pandas.testing.assert_frame_equal(expected_df, partitions_df)
+    pandas.testing.assert_frame_equal(expected_df, clustered_df)
+    print(f'rows per ISIN: {len(expected_df)}')
+    print(f'{"lookup":<34}{"ms":>10}')
+    print(f'{"load all partitions":<34}{load_all_seconds * 1000:>10.1f}')
+    print(f'{"query daily partitions":<34}{partitions_seconds * 1000:>10.1f}')
+    print(f'{"query clustered, cold footers":<34}{clustered_seconds * 1000:>10.1f}')
+    print(f'{"query clustered, cached footers":<34}{warm_seconds * 1000 / len(isins[2:]):>10.1f}')
+    print(f'{"query result cache hit":<34}{cached_seconds * 1000:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ReportQuery lookups over report1 partitions')
+    parser.add_argument('--days', default=250, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins)
+
+
+if __name__ == '__main__':
+    main()
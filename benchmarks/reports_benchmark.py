@@ -0,0 +1,105 @@
+"""
+Benchmark for the single scan execution of several reports
+Runs XetraETL.etl_reports with a growing number of registered reports and compares it with one
+etl_reports run per report, which scans the source once per report. report1 of the shared scan
+is checked against transform_report1.
+
+Run from the project root: python -m benchmarks.reports_benchmark
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.bars_benchmark import bars_target_config
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.reports import REPORTS, HourlyVolumeTargetConfig, VwapTargetConfig
+from xetra.transformers.xetra_transformer import XetraETL
+
+REPORT_TARGET_CONFIGS = {
+    'report1': TARGET_CONFIG,
+    'vwap': VwapTargetConfig(
+        src_col_price='EndPrice',
+        trg_col_isin='ISIN',
+        trg_col_date='Date',
+        trg_col_vwap='vwap_eur',
+        trg_col_traded_vol='daily_traded_volume',
+        trg_key='vwap/xetra_daily_vwap_',
+        trg_key_date_format='%Y%m%d',
+        trg_format='parquet'
+    ),
+    'hourly_volume': HourlyVolumeTargetConfig(
+        src_col_trades='NumberOfTrades',
+        trg_col_isin='ISIN',
+        trg_col_date='Date',
+        trg_col_hour='hour',
+        trg_col_trades='trades_count',
+        trg_col_traded_vol='traded_volume',
+        trg_key='hourly_volume/xetra_hourly_volume_',
+        trg_key_date_format='%Y%m%d',
+        trg_format='parquet'
+    ),
+    'ohlcv_bars': bars_target_config(5)
+}
+
+
+def run_reports(source_path: str, target_path: str, date_strings: list, report_names: list) -> float:
+    """
+    Runs etl_reports for the reports and returns its seconds
+    """
+    xetra_etl = XetraETL(FileOperations(source_path), FileOperations(target_path), None, SOURCE_CONFIG,
+                         TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    reports = [REPORTS[name](SOURCE_CONFIG, REPORT_TARGET_CONFIGS[name]) for name in report_names]
+    start = time.perf_counter()
+    xetra_etl.etl_reports(reports)
+    return time.perf_counter() - start
+
+
+def check_report1(source_path: str, target_path: str, date_strings: list):
+    """
+    Asserts that report1 of the shared scan equals transform_report1
+    """
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, SOURCE_CONFIG, TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    # the partitions are read date by date
+    expected_df = xetra_etl.transform_report1(xetra_etl.extract()).sort_values(by=['Date', 'ISIN'],
+                                                                               ignore_index=True)
+    report_df = pandas.concat([pandas.read_parquet(path) for path in
+                               sorted(Path(target_path, 'report1').glob('*.parquet'))], ignore_index=True)
+    pandas.testing.assert_frame_equal(expected_df, report_df)
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int):
+    """
+    Prints the seconds of the shared scan and of separate scans for a growing number of reports
+    """
+    report_names = list(REPORTS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        date_strings = generate_source_days(source_path, '2022-03-01', days, isins_count, trades_per_minute)
+        print(f'{"reports":>8}{"shared scan":>14}{"separate scans":>16}')
+        for count in range(1, len(report_names) + 1):
+            shared_path = str(Path(temp_dir, f'shared_{count}'))
+            shared_seconds = run_reports(source_path, shared_path, date_strings, report_names[:count])
+            separate_seconds = sum(run_reports(source_path, str(Path(temp_dir, f'separate_{count}')), date_strings,
+                                               [name]) for name in report_names[:count])
+            print(f'{count:>8}{shared_seconds:>14.3f}{separate_seconds:>16.3f}')
+        check_report1(source_path, shared_path, date_strings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the single scan execution of several reports')
+    parser.add_argument('--days', default=5, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=1000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=500, type=int, help='Average source rows per minute')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark and parity check of the incremental rolling analytics
+Builds synthetic daily reports with random walk closing prices, where every ISIN skips some days, and pushes
+them day by day through RollingWindowState with the state persisted in a temporary location, as the daily
+etl does. The analytics of every day are checked against RollingWindowState.recompute over the full history.
+Prints the seconds of the daily update, including reading and writing the state, next to the seconds of a
+full recompute of the history up to that day.
+
+Run from the project root: python -m benchmarks.rolling_benchmark
+"""
+import argparse
+import tempfile
+import time
+
+import numpy
+import pandas
+
+from benchmarks.synthetic_data import trading_dates
+from xetra.common.file_operations import FileOperations
+from xetra.common.rolling_state import RollingWindowState
+
+STATE_KEY = '_rolling_window_state.npz'
+
+
+def report_days_df(start_date: str, days: int, isins_count: int, seed: int = 0) -> pandas.DataFrame:
+    """
+    :return: daily report rows of isins_count ISINs, each ISIN trades on about 95% of the days
+    """
+    rng = numpy.random.default_rng(seed)
+    date_strings = trading_dates(start_date, days)
+    close = 100 * numpy.exp(numpy.cumsum(rng.normal(0, 0.02, (days, isins_count)), axis=0))
+    spread = numpy.abs(rng.normal(0, 0.01, (days, isins_count))) + 0.001
+    traded = rng.random((days, isins_count)) < 0.95
+    day_index, isin_index = numpy.nonzero(traded)
+    return pandas.DataFrame({
+        'ISIN': numpy.char.add('DE', numpy.char.zfill(isin_index.astype(str), 10)),
+        'Date': numpy.asarray(date_strings)[day_index],
+        'closing_price_eur': close[traded].round(2),
+        'maximum_price_eur': (close[traded] * (1 + spread[traded])).round(2),
+        'minimum_price_eur': (close[traded] * (1 - spread[traded])).round(2)
+    })
+
+
+def run_benchmark(days: int, isins_count: int, report_every: int):
+    """
+    Prints the daily update and full recompute seconds and asserts the parity of every day
+    """
+    history_df = report_days_df('2021-01-04', days, isins_count)
+    day_dfs = [day_df for _, day_df in history_df.groupby('Date', sort=True)]
+    print(f'{len(history_df)} report rows, {isins_count} ISINs, {len(day_dfs)} days')
+    print(f'{"day":>6}{"update s":>12}{"recompute s":>14}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rolling_state = RollingWindowState(FileOperations(temp_dir), STATE_KEY, 'ISIN', 'Date', 'closing_price_eur',
+                                           'maximum_price_eur', 'minimum_price_eur')
+        analytics_dfs = []
+        for day, day_df in enumerate(day_dfs, start=1):
+            start = time.perf_counter()
+            state = rolling_state.read()
+            analytics_dfs.append(rolling_state.update(day_df, state))
+            rolling_state.write(state)
+            update_seconds = time.perf_counter() - start
+            if day % report_every == 0 or day == len(day_dfs):
+                start = time.perf_counter()
+                expected_df = rolling_state.recompute(pandas.concat(day_dfs[:day], ignore_index=True))
+                recompute_seconds = time.perf_counter() - start
+                print(f'{day:>6}{update_seconds:>12.4f}{recompute_seconds:>14.4f}')
+        incremental_df = pandas.concat(analytics_dfs, ignore_index=True)
+        incremental_df = incremental_df.sort_values(by=['ISIN', 'Date'], ignore_index=True)
+        pandas.testing.assert_frame_equal(expected_df, incremental_df, check_dtype=False, rtol=1e-9)
+        # pushing a day again leaves the state untouched
+        state = rolling_state.read()
+        assert rolling_state.update(day_dfs[-1], state).empty
+        for name, array in rolling_state.read().items():
+            numpy.testing.assert_array_equal(array, state[name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the incremental rolling analytics')
+    parser.add_argument('--days', default=300, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    parser.add_argument('--report_every', default=50, type=int, help='Days between the printed timings')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.report_every)
+
+
+if __name__ == '__main__':
+    main()
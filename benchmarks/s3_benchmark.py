@@ -0,0 +1,92 @@
+"""
+Benchmark for S3BucketConnector
+Uploads synthetic trading days into a bucket and measures listing and download throughput per worker count
+
+Without --endpoint the bucket is served in-process by moto, with --endpoint any S3 compatible server
+(e.g. MinIO) is used with the credentials from the AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY environment variables.
+
+Run from the project root: python -m benchmarks.s3_benchmark
+"""
+import argparse
+import contextlib
+import os
+import time
+
+import boto3
+import pandas
+
+from benchmarks.common import SRC_COLUMNS, SRC_DTYPES
+from benchmarks.synthetic_data import source_day_df, trading_dates
+from xetra.common.s3 import S3BucketConnector
+
+ACCESS_KEY = 'AWS_ACCESS_KEY_ID'
+SECRET_KEY = 'AWS_SECRET_ACCESS_KEY'
+
+
+def upload_source_days(endpoint_url: str, bucket: str, date_strings: list, isins_count: int,
+                       trades_per_minute: int):
+    """
+    Uploads the hourly csv files of every date under the prefix <date>/ and returns the uploaded bytes
+    """
+    s3_client = boto3.client('s3', endpoint_url=endpoint_url, region_name='us-east-1')
+    with contextlib.suppress(s3_client.exceptions.BucketAlreadyOwnedByYou):
+        s3_client.create_bucket(Bucket=bucket)
+    uploaded_bytes = 0
+    for date_string in date_strings:
+        data_frame = source_day_df(date_string, isins_count, trades_per_minute)
+        for hour, hour_df in data_frame.groupby(data_frame['Time'].str[:2]):
+            body = hour_df.to_csv(index=False).encode()
+            uploaded_bytes += len(body)
+            s3_client.put_object(Bucket=bucket, Key=f'{date_string}/{date_string}_BINS_XETR{hour}.csv', Body=body)
+    return uploaded_bytes
+
+
+def run_benchmark(endpoint_url: str, bucket: str, days: int, isins_count: int, trades_per_minute: int,
+                  workers_list: list):
+    """
+    Prints listing and download throughput for every worker count
+    """
+    date_strings = trading_dates('2022-03-01', days)
+    uploaded_bytes = upload_source_days(endpoint_url, bucket, date_strings, isins_count, trades_per_minute)
+    print(f'uploaded {uploaded_bytes / 1024 ** 2:.1f} MB for {days} day(s)')
+    baseline = None
+    print(f'{"workers":>8}{"files":>8}{"list s":>10}{"read s":>10}{"MB/s":>10}')
+    for workers in workers_list:
+        s3_bucket = S3BucketConnector(ACCESS_KEY, SECRET_KEY, endpoint_url, bucket, max_workers=workers)
+        start = time.perf_counter()
+        keys = s3_bucket.list_files_in_prefixes(date_strings, 'csv')
+        list_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        data_frame = pandas.concat(s3_bucket.read_csv_to_dfs(keys, columns=SRC_COLUMNS, dtypes=SRC_DTYPES),
+                                   ignore_index=True)
+        read_seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = data_frame
+        else:
+            pandas.testing.assert_frame_equal(baseline, data_frame)
+        print(f'{workers:>8}{len(keys):>8}{list_seconds:>10.3f}{read_seconds:>10.3f}'
+              f'{uploaded_bytes / 1024 ** 2 / read_seconds:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark S3BucketConnector listing and downloads')
+    parser.add_argument('--endpoint', default=None, type=str, help='S3 compatible endpoint, moto if not set')
+    parser.add_argument('--bucket', default='xetra-benchmark', type=str, help='Bucket name')
+    parser.add_argument('--days', default=1, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=3000, type=int, help='Average source rows per minute')
+    parser.add_argument('--workers', default=[1, 4, 16], nargs='+', type=int, help='Worker counts to test')
+    args = parser.parse_args()
+    if args.endpoint is not None:
+        run_benchmark(args.endpoint, args.bucket, args.days, args.isins, args.trades, args.workers)
+        return
+    from moto import mock_aws
+    os.environ.setdefault(ACCESS_KEY, 'testing')
+    os.environ.setdefault(SECRET_KEY, 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        run_benchmark(None, args.bucket, args.days, args.isins, args.trades, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for the ISIN sharded report1 of ShardedXetraETL
+Compares the run time of extract, transform_report1 and load in one process with ShardedXetraETL.etl_report1
+for several shard counts and asserts that all runs write the same partitions
+
+The sharded runs use one worker process per shard, they only pay off with as many free cores.
+
+Run from the project root: python -m benchmarks.sharded_benchmark --shards 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.sharded_etl import ShardedXetraETL
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def run_report1(source_path: str, target_path: str, date_strings: list, shard_count: int):
+    """
+    Runs report1 for the dates, in one process if shard_count is 0,
+    and returns the seconds and the written partitions
+    """
+    if shard_count:
+        xetra_etl = ShardedXetraETL(FileOperations(source_path), FileOperations(target_path), None, SOURCE_CONFIG,
+                                    TARGET_CONFIG, shard_count)
+    else:
+        xetra_etl = XetraETL(FileOperations(source_path), FileOperations(target_path), None, SOURCE_CONFIG,
+                             TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    start = time.perf_counter()
+    if shard_count:
+        xetra_etl.etl_report1()
+    else:
+        xetra_etl.load(xetra_etl.transform_report1(xetra_etl.extract()))
+    seconds = time.perf_counter() - start
+    report_df = pandas.concat([pandas.read_parquet(key) for key in sorted(Path(target_path).rglob('*.parquet'))],
+                              ignore_index=True)
+    return seconds, report_df
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, shard_counts: list):
+    """
+    Prints the run time per shard count and asserts that all runs write the same report
+    """
+    print(f'cpus: {os.cpu_count()}')
+    print(f'{"shards":<12}{"seconds":>10}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        date_strings = generate_source_days(source_path, '2022-03-01', days, isins_count, trades_per_minute)
+        single_seconds, single_df = run_report1(source_path, str(Path(temp_dir, 'single')), date_strings, 0)
+        print(f'{"none":<12}{single_seconds:>10.2f}')
+        for shard_count in shard_counts:
+            sharded_seconds, sharded_df = run_report1(source_path, str(Path(temp_dir, f'sharded_{shard_count}')),
+                                                      date_strings, shard_count)
+            pandas.testing.assert_frame_equal(single_df, sharded_df)
+            print(f'{shard_count:<12}{sharded_seconds:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the ISIN sharded report1')
+    parser.add_argument('--days', default=10, type=int, help='Number of trading days')
+    parser.add_argument('--isins', default=400, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=200, type=int, help='Average source rows per minute')
+    parser.add_argument('--shards', default=[1, 2, 4], type=int, nargs='+', help='Shard counts')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.shards)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark for the streaming extraction of XetraETL
+Compares peak memory and run time of the in-memory and the streaming mode on the same source folders
+
+Run from the project root: python -m benchmarks.streaming_benchmark
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import generate_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def run_report1(source_path: str, date_strings: list, memory_budget_mb: int):
+    """
+    Runs extract and transform_report1 and returns the report, seconds and peak traced memory
+    """
+    src_args = SOURCE_CONFIG._replace(src_memory_budget_mb=memory_budget_mb)
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, src_args, TARGET_CONFIG)
+    xetra_etl.extract_date_list = date_strings
+    tracemalloc.start()
+    start = time.perf_counter()
+    report_df = xetra_etl.transform_report1(xetra_etl.extract())
+    seconds = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return report_df, seconds, peak_bytes
+
+
+def run_benchmark(days: int, isins_count: int, trades_per_minute: int, memory_budget_mb: int):
+    """
+    Prints run time and peak memory of both modes and asserts that they produce the same report
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        date_strings = generate_source_days(temp_dir, '2022-03-01', days, isins_count, trades_per_minute)
+        in_memory_df, in_memory_seconds, in_memory_peak = run_report1(temp_dir, date_strings, 0)
+        streaming_df, streaming_seconds, streaming_peak = run_report1(temp_dir, date_strings, memory_budget_mb)
+    pandas.testing.assert_frame_equal(in_memory_df, streaming_df)
+    print(f'{"mode":<12}{"seconds":>10}{"peak MB":>10}')
+    print(f'{"in-memory":<12}{in_memory_seconds:>10.2f}{in_memory_peak / 1024 ** 2:>10.1f}')
+    print(f'{"streaming":<12}{streaming_seconds:>10.2f}{streaming_peak / 1024 ** 2:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming extraction of report1')
+    parser.add_argument('--days', default=5, type=int, help='Number of source dates')
+    parser.add_argument('--isins', default=1000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=600, type=int, help='Average source rows per minute')
+    parser.add_argument('--budget', default=16, type=int, help='Memory budget of the streaming mode in MB')
+    args = parser.parse_args()
+    run_benchmark(args.days, args.isins, args.trades, args.budget)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark suite of the Xetra ETL stages
+
+Generates synthetic trading days once and runs extract_all, extract_all_validated, transform_data,
+load_files_data and return_dates_list for every day scale. Every stage runs in a fresh process, so the recorded peak RSS
+belongs to that stage and its inputs only. Results are written as json, a previous result file
+can be given as baseline to flag stages that got slower. The overhead of the validation of the extract
+is printed per scale as ratio of extract_all_validated to extract_all.
+
+Run from the project root: python -m benchmarks.suite --output baseline.json
+Compare later runs with:    python -m benchmarks.suite --baseline baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SRC_COLUMNS, SRC_DTYPES
+from benchmarks.synthetic_data import generate_source_days
+from get_xtera_data import extract_all, extract_all_validated, load_files_data, return_dates_list, transform_data
+from xetra.common.meta_process import MetaProcess
+
+STAGES = ['extract_all', 'extract_all_validated', 'transform_data', 'load_files_data', 'return_dates_list']
+
+
+def peak_rss_mb():
+    """
+    :return: peak resident set size of the current process in MB, None where the resource module is missing
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+def run_stage(stage: str, source_path: str, work_path: str, dates: list) -> dict:
+    """
+    Prepares the inputs of a stage, times the stage and returns its measurements
+    """
+    if stage == 'return_dates_list':
+        meta_key = str(Path(work_path, 'meta.db'))
+        MetaProcess.update_meta_file(dates, meta_key)
+        start = time.perf_counter()
+        return_dates_list(meta_key, dates[0])
+        seconds = time.perf_counter() - start
+        rows = len(dates)
+    elif stage == 'extract_all_validated':
+        start = time.perf_counter()
+        data_frame, _ = extract_all_validated(Path(source_path), ',', 'csv', dates, SRC_COLUMNS, SRC_DTYPES)
+        seconds = time.perf_counter() - start
+        rows = len(data_frame)
+    else:
+        start = time.perf_counter()
+        data_frame = extract_all(Path(source_path), ',', 'csv', dates, SRC_COLUMNS, SRC_DTYPES)
+        seconds = time.perf_counter() - start
+        rows = len(data_frame)
+        if stage != 'extract_all':
+            start = time.perf_counter()
+            report_df = transform_data(data_frame, None, None)
+            seconds = time.perf_counter() - start
+        if stage == 'load_files_data':
+            rows = len(report_df)
+            start = time.perf_counter()
+            load_files_data(Path(work_path, 'output'), report_df, 'report1_', '%Y%m%d', dates)
+            seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': rows, 'rows_per_sec': rows / seconds if seconds else None,
+            'peak_rss_mb': peak_rss_mb()}
+
+
+def run_suite(scales: list, isins_count: int, trades_per_minute: int, stages: list) -> dict:
+    """
+    Runs every stage at every scale in its own process and returns the result document
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as source_path:
+        all_dates = generate_source_days(source_path, '2022-01-03', max(scales), isins_count, trades_per_minute)
+        for days in scales:
+            for stage in stages:
+                with tempfile.TemporaryDirectory() as work_path, context.Pool(processes=1) as pool:
+                    result = pool.apply(run_stage, (stage, source_path, work_path, all_dates[:days]))
+                result = {'stage': stage, 'days': days, **result}
+                results.append(result)
+                print(f'{stage:<20}{days:>6}{result["rows"]:>12}{result["seconds"]:>10.3f}'
+                      f'{result["rows_per_sec"] or 0:>14.0f}{result["peak_rss_mb"] or 0:>12.1f}', flush=True)
+    return {
+        'environment': {'python': platform.python_version(), 'pandas': pandas.__version__,
+                        'platform': platform.platform(), 'processor': platform.processor()},
+        'parameters': {'scales': scales, 'isins': isins_count, 'trades_per_minute': trades_per_minute},
+        'results': results
+    }
+
+
+def print_validation_overhead(document: dict):
+    """
+    Prints the extra run time of extract_all_validated over extract_all per scale
+    """
+    extract_seconds = {result['days']: result['seconds'] for result in document['results']
+                       if result['stage'] == 'extract_all'}
+    for result in document['results']:
+        if result['stage'] == 'extract_all_validated' and extract_seconds.get(result['days']):
+            overhead = result['seconds'] / extract_seconds[result['days']] - 1
+            print(f'validation overhead {result["days"]:>6} days{overhead:>10.1%}')
+
+
+def compare_with_baseline(document: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Prints the run time ratio to the baseline per stage and scale
+
+    :return: True if no stage got slower than the tolerance allows
+    """
+    baseline_seconds = {(result['stage'], result['days']): result['seconds'] for result in baseline['results']}
+    passed = True
+    for result in document['results']:
+        previous = baseline_seconds.get((result['stage'], result['days']))
+        if not previous:
+            continue
+        ratio = result['seconds'] / previous
+        regressed = ratio > 1 + tolerance
+        passed = passed and not regressed
+        print(f'{result["stage"]:<20}{result["days"]:>6}{ratio:>10.2f}x{"  REGRESSION" if regressed else ""}')
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of the Xetra ETL stages')
+    parser.add_argument('--scales', default=[1, 10, 100], nargs='+', type=int, help='Numbers of trading days')
+    parser.add_argument('--isins', default=500, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=200, type=int, help='Average source rows per minute')
+    parser.add_argument('--stages', default=STAGES, nargs='+', choices=STAGES, help='Stages to run')
+    parser.add_argument('--output', default='benchmark_results.json', type=str, help='Result file')
+    parser.add_argument('--baseline', default=None, type=str, help='Result file of an earlier run to compare with')
+    parser.add_argument('--tolerance', default=0.2, type=float, help='Allowed slowdown against the baseline')
+    args = parser.parse_args()
+    print(f'{"stage":<20}{"days":>6}{"rows":>12}{"seconds":>10}{"rows/sec":>14}{"peak RSS MB":>12}')
+    document = run_suite(args.scales, args.isins, args.trades, args.stages)
+    print_validation_overhead(document)
+    with open(args.output, 'w') as json_handler:
+        json.dump(document, json_handler, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as json_handler:
+            baseline = json.load(json_handler)
+        if not compare_with_baseline(document, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Deterministic generator of synthetic Xetra source data
+
+Writes one folder per trading day (weekends are skipped like in the real bucket) with hourly csv files
+<date>/<date>_BINS_XETR<HH>.csv in the Xetra column layout. Every ISIN follows its own random walk,
+an ISIN trades in a minute with probability trades_per_minute / isins_count, so the number of rows
+per minute averages trades_per_minute. The same parameters and seed always produce the same files.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+import numpy
+import pandas
+
+XETRA_COLUMNS = ['ISIN', 'Mnemonic', 'SecurityDesc', 'SecurityType', 'Currency', 'SecurityID', 'Date', 'Time',
+                 'StartPrice', 'MaxPrice', 'MinPrice', 'EndPrice', 'TradedVolume', 'NumberOfTrades']
+TRADING_START_MINUTE = 8 * 60
+TRADING_MINUTES = 510
+
+
+def trading_dates(start_date: str, days: int) -> List:
+    """
+    :param start_date: first calendar date in %Y-%m-%d
+    :param days: number of trading days
+    :return: the first days weekdays from start_date on as %Y-%m-%d strings
+    """
+    current_date = date.fromisoformat(start_date)
+    dates = []
+    while len(dates) < days:
+        if current_date.weekday() < 5:
+            dates.append(current_date.isoformat())
+        current_date += timedelta(days=1)
+    return dates
+
+
+def source_day_df(date_string: str, isins_count: int, trades_per_minute: int, seed: int = 0) -> pandas.DataFrame:
+    """
+    Builds the source rows of one trading day ordered by time and ISIN
+
+    :param date_string: trading date in %Y-%m-%d
+    :param isins_count: number of listed ISINs
+    :param trades_per_minute: average number of rows per minute
+    :param seed: seed of the generator
+    :return: data frame with the Xetra source columns
+    """
+    isin_rng = numpy.random.default_rng(seed)
+    base_prices = numpy.exp(isin_rng.uniform(numpy.log(1), numpy.log(2000), isins_count))
+    rng = numpy.random.default_rng([seed, date.fromisoformat(date_string).toordinal()])
+    # price path per ISIN and minute, the day starts with a random gap to the base price
+    returns = rng.normal(0, 0.001, (isins_count, TRADING_MINUTES))
+    returns[:, 0] += rng.normal(0, 0.02, isins_count)
+    prices = base_prices[:, None] * numpy.exp(numpy.cumsum(returns, axis=1))
+    traded = rng.random((isins_count, TRADING_MINUTES)) < min(1.0, trades_per_minute / isins_count)
+    isin_idx, minute_idx = numpy.nonzero(traded.T)[::-1]
+    start_price = prices[isin_idx, minute_idx]
+    spread = numpy.abs(rng.normal(0, 0.002, (2, len(isin_idx))))
+    max_price = start_price * (1 + spread[0])
+    min_price = start_price * (1 - spread[1])
+    end_price = min_price + (max_price - min_price) * rng.random(len(isin_idx))
+    minutes = TRADING_START_MINUTE + numpy.arange(TRADING_MINUTES)
+    time_labels = numpy.array([f'{minute // 60:02d}:{minute % 60:02d}' for minute in minutes], dtype=object)
+    isin_names = numpy.array([f'DE{isin:010d}' for isin in range(isins_count)], dtype=object)
+    mnemonics = numpy.array([f'X{isin:04X}' for isin in range(isins_count)], dtype=object)
+    return pandas.DataFrame({
+        'ISIN': isin_names[isin_idx],
+        'Mnemonic': mnemonics[isin_idx],
+        'SecurityDesc': 'SYNTHETIC SECURITY',
+        'SecurityType': 'Common stock',
+        'Currency': 'EUR',
+        'SecurityID': 2504000 + isin_idx,
+        'Date': date_string,
+        'Time': time_labels[minute_idx],
+        'StartPrice': start_price.round(2),
+        'MaxPrice': max_price.round(2),
+        'MinPrice': min_price.round(2),
+        'EndPrice': end_price.round(2),
+        'TradedVolume': numpy.ceil(rng.lognormal(5, 1.5, len(isin_idx))).astype('int64'),
+        'NumberOfTrades': 1 + rng.poisson(3, len(isin_idx))
+    }, columns=XETRA_COLUMNS)
+
+
+def generate_source_days(root_path: str, start_date: str, days: int, isins_count: int, trades_per_minute: int,
+                         seed: int = 0) -> List:
+    """
+    Writes the hourly source files of the trading days into date folders below root_path
+
+    :param root_path: dataset root
+    :param start_date: first calendar date in %Y-%m-%d
+    :param days: number of trading days
+    :param isins_count: number of listed ISINs
+    :param trades_per_minute: average number of rows per minute
+    :param seed: seed of the generator
+    :return: list of the written dates
+    """
+    dates = trading_dates(start_date, days)
+    for date_string in dates:
+        data_frame = source_day_df(date_string, isins_count, trades_per_minute, seed)
+        date_path = Path(root_path, date_string)
+        date_path.mkdir(parents=True, exist_ok=True)
+        for hour, hour_df in data_frame.groupby(data_frame['Time'].str[:2]):
+            hour_df.to_csv(Path(date_path, f'{date_string}_BINS_XETR{hour}.csv'), index=False)
+    return dates
@@ -0,0 +1,52 @@
+"""
+Benchmark for XetraETL.transform_report1 against get_xtera_data.transform_data
+Checks that both produce the same report before comparing the run times
+
+Run from the project root: python -m benchmarks.transform_benchmark
+"""
+import argparse
+import time
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, SRC_COLUMNS, TARGET_CONFIG
+from benchmarks.synthetic_data import source_day_df
+from get_xtera_data import transform_data
+from xetra.transformers.xetra_transformer import XetraETL
+
+
+def run_benchmark(isins_count: int, trades_per_minute: int):
+    """
+    Times both transformations on one synthetic day and asserts that their common columns are equal
+    """
+    # shuffled, so the transformations sort rows that are not already ordered by time
+    data_frame = source_day_df('2022-03-15', isins_count, trades_per_minute)[SRC_COLUMNS]
+    data_frame = data_frame.sample(frac=1, random_state=0, ignore_index=True)
+    print(f'rows: {len(data_frame)}')
+    xetra_etl = XetraETL(None, None, None, SOURCE_CONFIG, TARGET_CONFIG)
+
+    start = time.perf_counter()
+    current_df = transform_data(data_frame.copy(), None, None)
+    current_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report_df = xetra_etl.transform_report1(data_frame)
+    report_seconds = time.perf_counter() - start
+
+    current_df = current_df.sort_values(by=['ISIN', 'Date']).reset_index(drop=True)
+    pandas.testing.assert_frame_equal(current_df, report_df[current_df.columns], check_dtype=False)
+    print(f'transform_data:    {current_seconds:.3f}s')
+    print(f'transform_report1: {report_seconds:.3f}s')
+    print(f'speedup:           {current_seconds / report_seconds:.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the report1 transformation')
+    parser.add_argument('--isins', default=3500, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=3500, type=int, help='Average source rows per minute')
+    args = parser.parse_args()
+    run_benchmark(args.isins, args.trades)
+
+
+if __name__ == '__main__':
+    main()
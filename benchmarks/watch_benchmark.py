@@ -0,0 +1,143 @@
+"""
+Benchmark for the cold start of the CLI scripts and the latency of the watch mode
+Cold start: median seconds of fresh interpreters importing get_xtera_data and answering --help.
+Watch latency: a XetraWatcher thread catches up with yesterday, then today's hourly files land one by one,
+the latency is the time from a file landing to its date partition being written. The final partitions
+are checked against transform_report1 over both days.
+
+Run from the project root: python -m benchmarks.watch_benchmark
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import SOURCE_CONFIG, TARGET_CONFIG
+from benchmarks.synthetic_data import source_day_df
+from xetra.common.file_operations import FileOperations
+from xetra.common.partitioned_target import PartitionedTarget
+from xetra.transformers.xetra_transformer import XetraETL
+from xetra.transformers.xetra_watcher import XetraWatcher
+
+COLD_START_COMMANDS = {
+    'import get_xtera_data': [sys.executable, '-c', 'import get_xtera_data'],
+    'get_xtera_data imports, no pandas': [sys.executable, '-c', 'import argparse, logging, sqlite3, yaml'],
+    'watch_xetra_data.py --help': [sys.executable, 'watch_xetra_data.py', '--help'],
+    'backfill_xetra_data.py --help': [sys.executable, 'backfill_xetra_data.py', '--help']
+}
+
+
+def cold_start_seconds(command: list, repeat: int) -> float:
+    """
+    :return: median wall seconds of running the command in a fresh interpreter
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def hourly_files(date_string: str, isins_count: int, trades_per_minute: int, seed: int) -> list:
+    """
+    :return: list of (file name, data frame) of the hourly source files of a date
+    """
+    data_frame = source_day_df(date_string, isins_count, trades_per_minute, seed)
+    return [(f'{date_string}_BINS_XETR{hour}.csv', hour_df)
+            for hour, hour_df in data_frame.groupby(data_frame['Time'].str[:2])]
+
+
+def land_file(source_path: str, date_string: str, file_name: str, data_frame: pandas.DataFrame):
+    """
+    Writes a source file next to its folder and moves it in, like a finished download
+    """
+    date_path = Path(source_path, date_string)
+    date_path.mkdir(parents=True, exist_ok=True)
+    temp_path = Path(source_path, f'.{file_name}.tmp')
+    data_frame.to_csv(temp_path, index=False)
+    os.replace(temp_path, Path(date_path, file_name))
+
+
+def watch_latency(isins_count: int, trades_per_minute: int, poll_seconds: float, settle_seconds: float) -> list:
+    """
+    :return: seconds from landing to the written partition for every file of today
+    """
+    date_format = '%Y-%m-%d'
+    today = datetime.today().date()
+    dates = [(today - timedelta(days=1)).strftime(date_format), today.strftime(date_format)]
+    latencies = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = str(Path(temp_dir, 'source'))
+        target_path = str(Path(temp_dir, 'target'))
+        Path(source_path).mkdir()
+        for file_name, data_frame in hourly_files(dates[0], isins_count, trades_per_minute, 0):
+            land_file(source_path, dates[0], file_name, data_frame)
+        time.sleep(settle_seconds)
+        watcher = XetraWatcher(FileOperations(source_path), FileOperations(target_path), None,
+                               SOURCE_CONFIG._replace(src_first_extract_date=dates[0]), TARGET_CONFIG,
+                               poll_seconds, settle_seconds)
+        target = PartitionedTarget(FileOperations(target_path), TARGET_CONFIG.trg_key,
+                                   TARGET_CONFIG.trg_key_date_format, TARGET_CONFIG.trg_format,
+                                   TARGET_CONFIG.trg_col_date)
+        # catching up with yesterday before the thread starts, so every wait below belongs to one landed file
+        watcher.poll()
+        stop = threading.Event()
+        watch_thread = threading.Thread(target=watcher.run, args=(stop,))
+        watch_thread.start()
+        try:
+            for file_name, data_frame in hourly_files(dates[1], isins_count, trades_per_minute, 1):
+                files_processed = watcher.files_processed
+                land_file(source_path, dates[1], file_name, data_frame)
+                landed_at = time.perf_counter()
+                while watcher.files_processed == files_processed:
+                    time.sleep(0.01)
+                latencies.append(time.perf_counter() - landed_at)
+        finally:
+            stop.set()
+            watch_thread.join()
+        xetra_etl = XetraETL(FileOperations(source_path), None, None, SOURCE_CONFIG, TARGET_CONFIG)
+        xetra_etl.extract_date_list = dates
+        expected_df = xetra_etl.transform_report1(xetra_etl.extract()).sort_values(
+            by=[TARGET_CONFIG.trg_col_date, TARGET_CONFIG.trg_col_isin], ignore_index=True)
+        report_df = pandas.concat([FileOperations(target_path).read_parquet_to_df(key)
+                                   for key in target.latest_partitions()], ignore_index=True)
+    pandas.testing.assert_frame_equal(expected_df, report_df)
+    return latencies
+
+
+def run_benchmark(isins_count: int, trades_per_minute: int, poll_seconds: float, settle_seconds: float,
+                  repeat: int):
+    """
+    Prints the cold start seconds of the commands and the watch latencies
+    """
+    print(f'{"cold start":<40}{"seconds":>10}')
+    for name, command in COLD_START_COMMANDS.items():
+        print(f'{name:<40}{cold_start_seconds(command, repeat):>10.3f}')
+    latencies = watch_latency(isins_count, trades_per_minute, poll_seconds, settle_seconds)
+    print(f'watch latency of {len(latencies)} files with poll {poll_seconds}s and settle {settle_seconds}s')
+    print(f'{"median":<40}{statistics.median(latencies):>10.3f}')
+    print(f'{"max":<40}{max(latencies):>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cold start and the watch mode latency')
+    parser.add_argument('--isins', default=1000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=500, type=int, help='Average source rows per minute')
+    parser.add_argument('--poll_seconds', default=1.0, type=float, help='Seconds between listings')
+    parser.add_argument('--settle_seconds', default=1.0, type=float, help='Seconds a file has to be unchanged')
+    parser.add_argument('--repeat', default=3, type=int, help='Runs per cold start command')
+    args = parser.parse_args()
+    run_benchmark(args.isins, args.trades, args.poll_seconds, args.settle_seconds, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
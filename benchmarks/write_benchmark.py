@@ -0,0 +1,128 @@
+"""
+Benchmark of the data frame writers of the locations
+Writes synthetic source rows and their 5 minute OHLCV bars, a report shaped output, with
+FileOperations.write_df_to_location for every parquet codec, with all columns or only ISIN and date dictionary
+encoded, and as csv, and prints write seconds, read seconds and file size. The report is written with the
+row groups of the partitions. Every written file is read back and compared with the data frame.
+S3BucketConnector.write_df_to_s3 is timed with a single put and with multipart uploads of part_bytes.
+
+Without --endpoint the bucket is served in-process by moto, with --endpoint any S3 compatible server
+(e.g. MinIO) is used with the credentials from the AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY environment variables.
+
+Run from the project root: python -m benchmarks.write_benchmark
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import boto3
+import pandas
+
+from benchmarks.bars_benchmark import bars_target_config
+from benchmarks.common import SOURCE_CONFIG
+from benchmarks.synthetic_data import source_day_df
+from xetra.common.constants import FileTypes, ParquetCodecs, QuerySettings
+from xetra.common.file_operations import FileOperations
+from xetra.common.s3 import S3BucketConnector
+from xetra.transformers.reports import OhlcvBarsReport
+
+ACCESS_KEY = 'AWS_ACCESS_KEY_ID'
+SECRET_KEY = 'AWS_SECRET_ACCESS_KEY'
+WRITE_COLUMNS = ['ISIN', 'Date', 'Time', 'StartPrice', 'MaxPrice', 'MinPrice', 'EndPrice', 'TradedVolume']
+DICTIONARY_COLS = ['ISIN', 'Date']
+
+
+def write_variants() -> list:
+    """
+    :return: list of (file format, codec, dictionary columns) to write
+    """
+    return [(FileTypes.PARQUET.value, codec.value, dictionary_cols) for codec in ParquetCodecs
+            for dictionary_cols in (None, DICTIONARY_COLS)] + [(FileTypes.CSV.value, None, None)]
+
+
+def run_local(data_frame: pandas.DataFrame, row_group_rows: int, dtypes: dict):
+    """
+    Prints write seconds, read seconds and size of every variant written to a local location
+    """
+    print(f'{"format":<9}{"codec":<8}{"dictionary":<12}{"write s":>9}{"read s":>9}{"MB":>9}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_operations = FileOperations(temp_dir)
+        for file_format, codec, dictionary_cols in write_variants():
+            key = f'{codec}_{dictionary_cols is None}.{file_format}'
+            start = time.perf_counter()
+            if file_format == FileTypes.CSV.value:
+                path = file_operations.write_df_to_location(data_frame, key, file_format)
+            else:
+                path = file_operations.write_df_to_location(data_frame, key, file_format, row_group_rows, codec,
+                                                            dictionary_cols)
+            write_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            if file_format == FileTypes.CSV.value:
+                read_df = file_operations.read_csv_to_df(key, dtypes=dtypes)
+            else:
+                read_df = file_operations.read_parquet_to_df(key)
+            read_seconds = time.perf_counter() - start
+            pandas.testing.assert_frame_equal(data_frame, read_df, check_dtype=file_format != FileTypes.CSV.value)
+            dictionary = 'all' if dictionary_cols is None else '+'.join(dictionary_cols)
+            print(f'{file_format:<9}{codec or "-":<8}{dictionary:<12}{write_seconds:>9.3f}{read_seconds:>9.3f}'
+                  f'{Path(path).stat().st_size / 1024 ** 2:>9.1f}')
+
+
+def run_s3(endpoint_url: str, bucket: str, data_frame: pandas.DataFrame, part_bytes_list: list):
+    """
+    Prints the seconds of write_df_to_s3 with a single put and with multipart uploads
+    """
+    s3_client = boto3.client('s3', endpoint_url=endpoint_url, region_name='us-east-1')
+    with contextlib.suppress(s3_client.exceptions.BucketAlreadyOwnedByYou):
+        s3_client.create_bucket(Bucket=bucket)
+    s3_bucket = S3BucketConnector(ACCESS_KEY, SECRET_KEY, endpoint_url, bucket)
+    print(f'{"format":<9}{"upload":<18}{"write s":>9}{"MB":>9}')
+    for file_format, codec in ((FileTypes.PARQUET.value, ParquetCodecs.NONE.value), (FileTypes.CSV.value, None)):
+        for part_bytes in [None] + part_bytes_list:
+            key = f'write_benchmark/{part_bytes}.{file_format}'
+            bytes_written = s3_bucket.bytes_written
+            start = time.perf_counter()
+            # a part size above the body size uploads it with a single put
+            s3_bucket.write_df_to_s3(data_frame, key, file_format, compression=codec or ParquetCodecs.NONE.value,
+                                     part_bytes=part_bytes or 5 * 1024 ** 3)
+            seconds = time.perf_counter() - start
+            size_mb = (s3_bucket.bytes_written - bytes_written) / 1024 ** 2
+            upload = 'single put' if part_bytes is None else f'{part_bytes // 1024 ** 2} MB parts'
+            print(f'{file_format:<9}{upload:<18}{seconds:>9.3f}{size_mb:>9.1f}')
+            assert s3_client.head_object(Bucket=bucket, Key=key)['ContentLength'] == size_mb * 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the data frame writers across codecs')
+    parser.add_argument('--isins', default=3000, type=int, help='Number of ISINs')
+    parser.add_argument('--trades', default=2000, type=int, help='Average source rows per minute')
+    parser.add_argument('--row_group_rows', default=None, type=int, help='Rows per parquet row group')
+    parser.add_argument('--endpoint', default=None, type=str, help='S3 compatible endpoint, moto if not set')
+    parser.add_argument('--bucket', default='xetra-benchmark', type=str, help='Bucket name')
+    parser.add_argument('--part_mb', default=[5, 16], nargs='+', type=int, help='Multipart part sizes in MB')
+    args = parser.parse_args()
+    data_frame = source_day_df('2022-03-01', args.isins, args.trades)[WRITE_COLUMNS]
+    print(f'{len(data_frame)} source rows')
+    run_local(data_frame, args.row_group_rows, {'ISIN': str, 'Date': str, 'Time': str})
+    bars_report = OhlcvBarsReport(SOURCE_CONFIG, bars_target_config(5))
+    bars_report.add(data_frame)
+    bars_df = bars_report.result()
+    print(f'{len(bars_df)} rows of 5 minute bars')
+    run_local(bars_df, QuerySettings.ROW_GROUP_ROWS.value, {'ISIN': str, 'Date': str, 'bar_time': str})
+    part_bytes_list = [part_mb * 1024 ** 2 for part_mb in args.part_mb]
+    if args.endpoint is not None:
+        run_s3(args.endpoint, args.bucket, data_frame, part_bytes_list)
+        return
+    from moto import mock_aws
+    os.environ.setdefault(ACCESS_KEY, 'testing')
+    os.environ.setdefault(SECRET_KEY, 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        run_s3(None, args.bucket, data_frame, part_bytes_list)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,16 @@
 """
 Process to read yaml configuration file
+
+Parsed files are cached per path and modification time, so repeated Config objects in a long-running
+process do not parse the file again, every Config gets its own copy to modify.
 """
 
+import copy
 import yaml
 from pathlib import Path
 
-YAML_FILE_PATH = r'xetra_config.yaml'
+YAML_FILE_PATH = Path(__file__).with_name('xetra_config.yaml')
+_YAML_CACHE = {}
 
 
 class Config:
@@ -16,7 +21,10 @@ class Config:
     def __init__(self, config_file=Path(YAML_FILE_PATH)):
         self.config_file = Path(config_file)
         try:
-            with (open(self.config_file, 'r')) as yaml_handler:
-                self.yaml_file = yaml.safe_load(yaml_handler)
+            cache_key = (self.config_file.resolve(), self.config_file.stat().st_mtime_ns)
+            if cache_key not in _YAML_CACHE:
+                with (open(self.config_file, 'r')) as yaml_handler:
+                    _YAML_CACHE[cache_key] = yaml.safe_load(yaml_handler)
+            self.yaml_file = copy.deepcopy(_YAML_CACHE[cache_key])
         except FileNotFoundError:
             raise
@@ -0,0 +1,45 @@
+"""
+Locations and source and target configuration shared by the xetra ETL commands
+
+get_xtera_data.py, backfill_xetra_data.py and watch_xetra_data.py read the same source files into the
+same report, so their source columns, fixed dtypes and column names are only defined here.
+"""
+from xetra.transformers.xetra_transformer import XetraSourceConfig, XetraTargetConfig
+
+DATA_SET_PATH = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\Resources\dataset'
+META_FILE_PATH = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\meta_file.db'
+SOURCE_INDEX_PATH = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\source_index.json'
+SOURCE_CACHE_PATH = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\source_cache'
+OUTPUT_FILE_PATH = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\Resources\dataset\output'
+DEFAULT_DATE = '2022-03-15'
+
+SRC_COLUMNS = ['ISIN', 'Date', 'Time', 'StartPrice', 'MaxPrice', 'MinPrice', 'EndPrice', 'TradedVolume']
+SRC_DTYPES = {'ISIN': str, 'Date': str, 'Time': str, 'StartPrice': 'float64', 'MaxPrice': 'float64',
+              'MinPrice': 'float64', 'EndPrice': 'float64', 'TradedVolume': 'float64'}
+
+SOURCE_CONFIG = XetraSourceConfig(
+    src_first_extract_date=DEFAULT_DATE,
+    src_columns=SRC_COLUMNS,
+    src_col_date='Date',
+    src_col_isin='ISIN',
+    src_col_time='Time',
+    src_col_start_price='StartPrice',
+    src_col_min_price='MinPrice',
+    src_col_max_price='MaxPrice',
+    src_col_traded_vol='TradedVolume',
+    src_dtypes=SRC_DTYPES
+)
+
+TARGET_CONFIG = XetraTargetConfig(
+    trg_col_isin='ISIN',
+    trg_col_date='Date',
+    trg_col_op_price='opening_price_eur',
+    trg_col_clos_price='closing_price_eur',
+    trg_col_min_price='minimum_price_eur',
+    trg_col_max_price='maximum_price_eur',
+    trg_col_dail_trad_vol='daily_traded_volume',
+    trg_col_ch_prev_clos='change_prev_closing_%',
+    trg_key='main_data_',
+    trg_key_date_format='%Y%m%d',
+    trg_format='parquet'
+)
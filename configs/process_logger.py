@@ -1,27 +1,204 @@
 """
 Configure Logging for Xetra Project
+
+Besides the text log, every measured process stage writes one json line to the xetra.metrics logger,
+which the logging configuration routes to its own file handler.
 """
+import contextlib
+import functools
+import inspect
+import json
 import logging
 import logging.config
+import threading
+import time
 from pathlib import Path
 from configs.config import Config
 from datetime import datetime
 
+METRICS_LOGGER = 'xetra.metrics'
+
 
 class ProcessLog:
 
     def __init__(self, file_path: str):
         self.__file_path = file_path
         self.__logging_config = Config()
-        self.__log_file_name = Path(self.__file_path,
-                                    f"{(self.__logging_config.yaml_file['handlers']['filehandler']['filename']).split('.')[0]}_{datetime.strftime(datetime.now().astimezone(), '%Y-%m-%d %H-%M-%S')}.{(self.__logging_config.yaml_file['handlers']['filehandler']['filename']).split('.')[-1]}")
-        self.__logging_config.yaml_file['handlers']['filehandler']['filename'] = self.__log_file_name
-        print(self.__logging_config.yaml_file)
+        for handler in self.__logging_config.yaml_file['handlers'].values():
+            if 'filename' in handler:
+                handler['filename'] = self.__timestamped_file_name(handler['filename'])
+        self.__log_file_name = self.__logging_config.yaml_file['handlers']['filehandler']['filename']
         logging.config.dictConfig(self.__logging_config.yaml_file)
         self.__logger = logging.getLogger(__name__)
 
+    def __timestamped_file_name(self, file_name: str) -> Path:
+        return Path(self.__file_path,
+                    f"{file_name.split('.')[0]}_{datetime.strftime(datetime.now().astimezone(), '%Y-%m-%d %H-%M-%S')}.{file_name.split('.')[-1]}")
+
     def log_message(self, message: str = None, exec_info: bool = False):
         if exec_info:
             self.__logger.error(msg=message, exc_info=True)
         else:
             self.__logger.info(msg=message)
+
+
+def _reset_peak_rss():
+    """
+    Resets the peak RSS of the process on Linux, elsewhere the peak stays the process lifetime peak
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    """
+    :return: peak RSS since the last reset in MB, None if it can not be determined
+    """
+    try:
+        with open('/proc/self/status', 'r') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on other unix systems
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 ** 2 if max_rss > 1024 ** 3 else max_rss / 1024
+
+
+class StageMetrics:
+    """
+    Context manager measuring one process stage
+
+    Wall and CPU time are taken on enter and exit, rows and bytes are set by the stage on the yielded object.
+    Time spent in paused blocks, e.g. waiting on a full queue, is left out of both and logged as paused_seconds.
+    The peak RSS is reset when the first of several overlapping stages starts, so it covers the stage
+    and everything running concurrently with it.
+    """
+    _active_stages = 0
+    _lock = threading.Lock()
+
+    def __init__(self, stage: str, **fields):
+        """
+        :param stage: name of the stage
+        :param fields: additional json fields of the metrics line, e.g. the processed date
+        """
+        self.stage = stage
+        self.fields = fields
+        self.rows_in = None
+        self.rows_out = None
+        self.bytes_read = None
+        self.bytes_written = None
+        self._paused_wall_seconds = 0.0
+        self._paused_cpu_seconds = 0.0
+
+    @contextlib.contextmanager
+    def paused(self):
+        """
+        Leaves the time spent in the block out of the wall and CPU time of the stage
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self._paused_wall_seconds += time.perf_counter() - wall_start
+            self._paused_cpu_seconds += time.process_time() - cpu_start
+
+    def __enter__(self):
+        with StageMetrics._lock:
+            if StageMetrics._active_stages == 0:
+                _reset_peak_rss()
+            StageMetrics._active_stages += 1
+        self._started_at = datetime.now().astimezone()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_seconds = time.perf_counter() - self._wall_start - self._paused_wall_seconds
+        cpu_seconds = time.process_time() - self._cpu_start - self._paused_cpu_seconds
+        with StageMetrics._lock:
+            StageMetrics._active_stages -= 1
+        record = {
+            'stage': self.stage,
+            'status': 'ok' if exc_type is None else 'failed',
+            'started_at': self._started_at.isoformat(),
+            'wall_seconds': round(wall_seconds, 6),
+            'cpu_seconds': round(cpu_seconds, 6),
+            'paused_seconds': round(self._paused_wall_seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_rss_mb': _peak_rss_mb(),
+            **self.fields
+        }
+        logging.getLogger(METRICS_LOGGER).info(json.dumps(record, default=str))
+        return False
+
+
+def measure_stage(stage: str, connectors: tuple = ()):
+    """
+    Decorator measuring a method as a process stage
+
+    Rows in are taken from the first positional argument and rows out from the return value if they have a shape.
+    Bytes read and written are the change of the bytes_read/bytes_written counters of the connectors.
+    A method returning a generator is measured until the generator is exhausted, the time the consumer
+    holds a yielded chunk is paused and the rows out are counted over the chunks.
+
+    :param stage: name of the stage
+    :param connectors: attribute names of the instance holding FileOperations/S3BucketConnector objects
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stage_connectors = [getattr(self, name) for name in connectors if getattr(self, name, None) is not None]
+            bytes_read = sum(connector.bytes_read for connector in stage_connectors)
+            bytes_written = sum(connector.bytes_written for connector in stage_connectors)
+
+            def count_bytes(metrics: StageMetrics):
+                metrics.bytes_read = sum(connector.bytes_read for connector in stage_connectors) - bytes_read
+                metrics.bytes_written = \
+                    sum(connector.bytes_written for connector in stage_connectors) - bytes_written
+
+            with contextlib.ExitStack() as stage_stack:
+                metrics = stage_stack.enter_context(StageMetrics(stage))
+                if args and hasattr(args[0], 'shape'):
+                    metrics.rows_in = args[0].shape[0]
+                result = method(self, *args, **kwargs)
+                if inspect.isgenerator(result):
+                    # the stage stays open until the generator is exhausted
+                    return _measured_chunks(result, metrics, stage_stack.pop_all(), count_bytes)
+                if hasattr(result, 'shape'):
+                    metrics.rows_out = result.shape[0]
+                count_bytes(metrics)
+            return result
+        return wrapper
+    return decorator
+
+
+def _measured_chunks(chunks, metrics: StageMetrics, stage_stack: contextlib.ExitStack, count_bytes):
+    """
+    Yields the chunks of a measured stage, only the time spent producing them is measured
+
+    :param chunks: generator returned by the measured method
+    :param metrics: entered metrics of the stage
+    :param stage_stack: exit stack closing the metrics of the stage
+    :param count_bytes: sets the bytes read and written of the stage on the metrics
+    """
+    with stage_stack:
+        metrics.rows_out = 0
+        for chunk in chunks:
+            if hasattr(chunk, 'shape'):
+                metrics.rows_out += chunk.shape[0]
+            with metrics.paused():
+                yield chunk
+        count_bytes(metrics)
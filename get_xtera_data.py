@@ -1,9 +1,29 @@
+import logging
 import pandas
 from pathlib import Path
-import boto3
 import argparse
+from functools import partial
 from typing import List
+from itertools import repeat
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from configs.etl_config import DATA_SET_PATH, DEFAULT_DATE, META_FILE_PATH, OUTPUT_FILE_PATH, SOURCE_CACHE_PATH, \
+    SOURCE_CONFIG, SOURCE_INDEX_PATH, TARGET_CONFIG
+from configs.process_logger import ProcessLog, StageMetrics
+from xetra.common.compressed_source import DecompressingReader, read_compressed_csv, source_compression
+from xetra.common.constants import ExtractSettings, QuarantineReasons, WriteSettings
+from xetra.common.file_operations import FileOperations
+from xetra.common.partitioned_target import PartitionedTarget
+from xetra.common.closing_price_state import ClosingPriceState
+from xetra.common.rolling_state import RollingWindowState
+from xetra.common.meta_process import MetaProcess
+from xetra.common.source_cache import SourceCache
+from xetra.common.validation import QUARANTINE_FILE_COL, QUARANTINE_REASON_COL, ValidatedBatch
+from xetra.common.validation import coerce_numeric, quarantine_file, validate_source_df
+from xetra.transformers.sharded_etl import ShardedXetraETL
+
+logger = logging.getLogger(__name__)
 
 
 # Adapter Layer
@@ -41,49 +61,161 @@ def get_arguments(p_date_format: str, p_days_delta: int, p_default_date: str = N
 #             continue
 
 
-def get_files_paths_list(p_file_path: Path, p_file_string: str, p_file_extension: str):
-    files_path_list = []
-    for files in p_file_path.iterdir():
-        if p_file_string in files.as_posix():
-            for fpath in Path(p_file_path).glob(f'*{p_file_string}/*'):
-                if fpath.name.endswith(p_file_extension):
-                    files_path_list.append(fpath)
+def get_files_paths_list(p_file_path: Path, p_file_string: str, p_file_extension: str,
+                         p_file_operations: FileOperations = None):
+    file_operations = FileOperations(p_file_path) if p_file_operations is None else p_file_operations
+    files_path_list = [Path(p_file_path, key) for key in
+                       file_operations.list_files_in_location(p_file_string, p_file_extension)]
     return files_path_list
 
 
-def read_file_dataframe(p_file_path: str, p_file_delimiter: str):
+def read_file_dataframe(p_file_path: str, p_file_delimiter: str, p_columns: List = None, p_dtypes: dict = None,
+                        p_source_cache: SourceCache = None):
     try:
-        data_frame = pandas.read_csv(filepath_or_buffer=Path(p_file_path), delimiter=p_file_delimiter)
+        # .csv.gz and .csv.zst files are decompressed in a background thread while they are parsed
+        compression = source_compression(p_file_path)
+        if p_source_cache is not None:
+            return p_source_cache.read_csv_to_df(SourceCache.file_source_id(Path(p_file_path)),
+                                                 lambda: Path(p_file_path) if compression is None
+                                                 else DecompressingReader(str(p_file_path), compression),
+                                                 p_file_delimiter, p_columns, p_dtypes)
+        if compression is not None:
+            return read_compressed_csv(str(p_file_path), compression, p_file_delimiter, p_columns, p_dtypes)
+        data_frame = pandas.read_csv(filepath_or_buffer=Path(p_file_path), delimiter=p_file_delimiter,
+                                     usecols=p_columns, dtype=p_dtypes)
         return data_frame
     except Exception:
         raise
 
 
-def load_files_data(p_file_path: Path, p_data_frame):
-    p_data_frame.to_parquet(path=p_file_path, index=False)
+def read_validated_file_dataframe(p_file_path: str, p_file_delimiter: str, p_columns: List = None,
+                                  p_dtypes: dict = None, p_source_cache: SourceCache = None) -> ValidatedBatch:
+    """
+    Read a source file and set aside its invalid rows, a file that cannot be read is set aside as a whole
+
+    A file failing the read with the fixed dtypes is read again with string columns, so only the rows
+    with values that are no numbers are quarantined and its valid rows are kept.
+    """
+    invalid_rows = None
+    try:
+        data_frame = read_file_dataframe(p_file_path, p_file_delimiter, p_columns, p_dtypes, p_source_cache)
+    except (ValueError, OSError):
+        try:
+            data_frame = read_file_dataframe(p_file_path, p_file_delimiter, None, str)
+        except (ValueError, OSError) as error:
+            logger.warning('Quarantined unreadable file %s: %s', p_file_path, error)
+            return quarantine_file(p_file_path, f'{QuarantineReasons.UNREADABLE_FILE.value}: {error}', p_columns)
+        columns = list(data_frame.columns) if p_columns is None else p_columns
+        missing_columns = [column for column in columns if column not in data_frame.columns]
+        if missing_columns:
+            logger.warning('Quarantined file %s without columns %s', p_file_path, missing_columns)
+            return quarantine_file(p_file_path, f'{QuarantineReasons.MISSING_COLUMNS.value}: '
+                                                f'{", ".join(missing_columns)}', p_columns)
+        data_frame = data_frame[columns]
+        invalid_rows = coerce_numeric(data_frame, [column for column, dtype in (p_dtypes or {}).items()
+                                                   if dtype is not str and column in columns])
+    src = SOURCE_CONFIG
+    return validate_source_df(data_frame, p_file_path, src.src_col_isin, src.src_col_date, src.src_col_time,
+                              src.src_col_start_price, src.src_col_min_price, src.src_col_max_price,
+                              src.src_col_traded_vol, invalid_rows)
+
+
+def load_files_data(p_file_path: Path, p_data_frame, p_target_key: str, p_target_key_date_format: str,
+                    p_partition_dates: List = None, p_compression: str = WriteSettings.PARQUET_CODEC.value,
+                    p_file_operations: FileOperations = None):
+    file_operations = FileOperations(p_file_path) if p_file_operations is None else p_file_operations
+    target = PartitionedTarget(file_operations, p_target_key, p_target_key_date_format, 'parquet', 'Date',
+                               compression=p_compression, dictionary_cols=['ISIN', 'Date'])
+    return target.write_partitions(p_data_frame, p_partition_dates)
 
 
 def write_csv_files_data(p_file_path: Path, p_data_frame):
-    p_data_frame.to_csv(path_or_buf=p_file_path, index=False)
+    # written to a temporary file and renamed, a crash never leaves a half written csv file
+    FileOperations(Path(p_file_path).parent).write_df_to_location(p_data_frame, Path(p_file_path).name, 'csv')
 
 
 # Application Layer
 
-def extract_all(p_files_path: Path, p_file_delimiter: str, p_file_extension: str, p_process_date_list: List):
+def extract_all(p_files_path: Path, p_file_delimiter: str, p_file_extension: str, p_process_date_list: List,
+                p_columns: List = None, p_dtypes: dict = None, p_workers: int = 1, p_use_processes: bool = False,
+                p_index_path: str = None, p_source_cache: SourceCache = None):
+    """
+    Read all source files of the process dates into one data frame
+
+    With p_workers > 1 the files are read by a thread pool (process pool if p_use_processes is set).
+    Files are sorted within each date, so the concatenated frame has the same row order for any worker count.
+    p_columns/p_dtypes restrict the read to the source columns with fixed dtypes, so read_csv skips inference.
+    With p_index_path the date folders are looked up in the persisted source index instead of globbing per date.
+    With p_source_cache every csv file is parsed once and later reads memory-map its cached columnar copy.
+    p_file_extension may be a tuple, e.g. ExtractSettings.SOURCE_FILE_TYPES to read plain and compressed files.
+    """
+    data_frames = read_all_files(read_file_dataframe, p_files_path, p_file_delimiter, p_file_extension,
+                                 p_process_date_list, p_columns, p_dtypes, p_workers, p_use_processes, p_index_path,
+                                 p_source_cache)
+    main_data_frame = pandas.concat(objs=data_frames, ignore_index=True)
+    return main_data_frame
+
+
+def extract_all_validated(p_files_path: Path, p_file_delimiter: str, p_file_extension: str,
+                          p_process_date_list: List, p_columns: List = None, p_dtypes: dict = None,
+                          p_workers: int = 1, p_use_processes: bool = False, p_index_path: str = None,
+                          p_source_cache: SourceCache = None) -> ValidatedBatch:
+    """
+    Read all source files of the process dates like extract_all and validate every file batch
+
+    Invalid rows and unreadable files do not abort the extract, they are returned as quarantine data frame
+    with the source file and the reason of every row.
+    """
+    batches = read_all_files(read_validated_file_dataframe, p_files_path, p_file_delimiter, p_file_extension,
+                             p_process_date_list, p_columns, p_dtypes, p_workers, p_use_processes, p_index_path,
+                             p_source_cache)
+    # the empty frames of quarantined files would turn the concatenated columns into objects
+    data_frames = [batch.data_frame for batch in batches if not batch.data_frame.empty]
+    data_frame = pandas.concat(objs=data_frames or [batch.data_frame for batch in batches], ignore_index=True)
+    quarantine_dfs = [batch.quarantine_df for batch in batches if not batch.quarantine_df.empty]
+    quarantine_df = pandas.concat(objs=quarantine_dfs, ignore_index=True) if quarantine_dfs else \
+        pandas.DataFrame(columns=[QUARANTINE_FILE_COL, QUARANTINE_REASON_COL])
+    return ValidatedBatch(data_frame, quarantine_df)
+
+
+def source_files_size(p_files_path: Path, p_file_extension: str, p_process_date_list: List,
+                      p_index_path: str = None) -> int:
+    """
+    Sum of the sizes of the source files of the process dates, the bytes the extract reads from the source
+    """
+    file_operations = FileOperations(p_files_path, p_index_path)
+    return sum(path.stat().st_size for date_string in p_process_date_list
+               for path in get_files_paths_list(p_files_path, date_string, p_file_extension, file_operations))
+
+
+def read_all_files(p_read_function, p_files_path: Path, p_file_delimiter: str, p_file_extension: str,
+                   p_process_date_list: List, p_columns: List = None, p_dtypes: dict = None, p_workers: int = 1,
+                   p_use_processes: bool = False, p_index_path: str = None, p_source_cache: SourceCache = None):
+    """
+    Apply p_read_function to every source file of the process dates, in date and file order
+    """
+    file_operations = FileOperations(p_files_path, p_index_path)
     files_path = [fpath for date_string in p_process_date_list for fpath in
-                  get_files_paths_list(p_files_path, date_string, p_file_extension)]
+                  get_files_paths_list(p_files_path, date_string, p_file_extension, file_operations)]
 
-    main_data_frame = pandas.concat(
-        objs=[read_file_dataframe(paths, p_file_delimiter) for paths in files_path],
-        ignore_index=True)
-    return main_data_frame
+    if p_workers > 1:
+        executor_class = ProcessPoolExecutor if p_use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=p_workers) as executor:
+            return list(executor.map(p_read_function, files_path, repeat(p_file_delimiter),
+                                     repeat(p_columns), repeat(p_dtypes), repeat(p_source_cache)))
+    return [p_read_function(paths, p_file_delimiter, p_columns, p_dtypes, p_source_cache) for paths in files_path]
 
 
-def transform_data(data_frame: pandas.DataFrame, p_process_date: datetime, p_date_format):
+def transform_data(data_frame: pandas.DataFrame, p_process_date: datetime, p_date_format,
+                   p_closing_state: ClosingPriceState = None, p_closing_state_df: pandas.DataFrame = None):
+    rows_count = len(data_frame)
     data_frame.dropna(inplace=True)
-    data_frame['opening_price'] = data_frame.sort_values(by=['Time']).groupby(['ISIN', 'Date'])[
+    if len(data_frame) < rows_count:
+        logger.warning('Dropped %s source rows with missing values', rows_count - len(data_frame))
+    # a stable sort keeps the source order of trades at the same time, the earlier one opens, the later one closes
+    data_frame['opening_price'] = data_frame.sort_values(by=['Time'], kind='stable').groupby(['ISIN', 'Date'])[
         'StartPrice'].transform('first')
-    data_frame['closing_price'] = data_frame.sort_values(by=['Time']).groupby(['ISIN', 'Date'])[
+    data_frame['closing_price'] = data_frame.sort_values(by=['Time'], kind='stable').groupby(['ISIN', 'Date'])[
         'StartPrice'].transform('last')
     data_frame = data_frame.groupby(['ISIN', 'Date'], as_index=False).agg(
         opening_price_eur=('opening_price', 'min'),
@@ -94,6 +226,10 @@ def transform_data(data_frame: pandas.DataFrame, p_process_date: datetime, p_dat
 
     data_frame['previous_closing_price'] = data_frame.sort_values(by=['Date']).groupby(['ISIN'])[
         'closing_price_eur'].shift(1)
+    if p_closing_state is not None and p_closing_state_df is not None:
+        # first date of an ISIN in this run takes the closing price carried over from earlier runs
+        data_frame['previous_closing_price'] = data_frame['previous_closing_price'].fillna(
+            p_closing_state.previous_closing_price(data_frame, p_closing_state_df))
     data_frame['change_prev_closing_%'] = (data_frame['closing_price_eur'] - data_frame[
         'previous_closing_price']) / data_frame['previous_closing_price'] * 100
     data_frame.drop(columns=['previous_closing_price'], inplace=True)
@@ -102,78 +238,254 @@ def transform_data(data_frame: pandas.DataFrame, p_process_date: datetime, p_dat
     return data_frame
 
 
+def transform_data_sharded(data_frame: pandas.DataFrame, p_process_date: datetime, p_date_format, p_shards: int,
+                           p_closing_state: ClosingPriceState = None, p_closing_state_df: pandas.DataFrame = None):
+    """
+    Run transform_data on ISIN shards of the data frame in p_shards worker processes
+
+    Every aggregation of transform_data is per ISIN, so the shards are transformed independently.
+    The shards are exchanged with the workers through part files by ShardedXetraETL, the shard results
+    are merged in the ISIN and date order of transform_data.
+    """
+    sharded_etl = ShardedXetraETL(None, None, None, SOURCE_CONFIG, TARGET_CONFIG, p_shards)
+    return sharded_etl.transform_sharded(data_frame, partial(transform_data, p_process_date=p_process_date,
+                                                             p_date_format=p_date_format,
+                                                             p_closing_state=p_closing_state,
+                                                             p_closing_state_df=p_closing_state_df))
+
+
 def etl_process(p_data_set_path: str, p_output_file_path: str,p_meta_file_path:str, p_process_dates_list: List, p_default_date: str,
                 p_date_format: str,
-                p_days_delta: int, p_file_delimiter: str, p_file_extension: str, parquet_filename: str):
+                p_days_delta: int, p_file_delimiter: str, p_file_extension: str, p_target_key: str,
+                p_target_key_date_format: str, p_state_key: str,
+                p_src_columns: List = None, p_src_dtypes: dict = None, p_extract_workers: int = 1,
+                p_source_index_path: str = None, p_source_cache_path: str = None, p_transform_shards: int = 1,
+                p_analytics_state_key: str = None, p_analytics_key: str = None, p_quarantine_key: str = None):
     process_date = get_arguments(p_date_format, p_days_delta, p_default_date)
-    print(f"Starting data load process since: {process_date}")
+    logger.info('Starting data load process since: %s', process_date)
 
+    # the output location is shared by the writes of all stages, its byte counter gives their bytes written
+    output_files = FileOperations(p_output_file_path)
+    closing_state = ClosingPriceState(output_files, p_state_key, 'ISIN', 'Date', 'closing_price_eur')
+    closing_state_df = closing_state.read()
     # extract dates to be processed
+    # the first date of the list is only needed for the previous closing price, skip it if the state carries it,
+    # on a rerun or after a later backfill the state holds later prices and the first date is extracted again
+    extract_dates_list = p_process_dates_list[1:] if len(p_process_dates_list) > 1 and closing_state.precedes(
+        closing_state_df, p_process_dates_list[1]) else p_process_dates_list
+    source_cache = None if p_source_cache_path is None else SourceCache(p_source_cache_path)
 
     # extract all files into data frame
-    data_frame_all = extract_all(Path(p_data_set_path), p_file_delimiter, p_file_extension, p_process_dates_list)
+    with StageMetrics('extract') as metrics:
+        bytes_written = output_files.bytes_written
+        if p_quarantine_key is None:
+            data_frame_all = extract_all(Path(p_data_set_path), p_file_delimiter, p_file_extension,
+                                         extract_dates_list, p_src_columns, p_src_dtypes, p_extract_workers,
+                                         p_index_path=p_source_index_path, p_source_cache=source_cache)
+        else:
+            # invalid rows and unreadable files are written to the quarantine file of the run, valid rows go on
+            data_frame_all, quarantine_df = extract_all_validated(
+                Path(p_data_set_path), p_file_delimiter, p_file_extension, extract_dates_list, p_src_columns,
+                p_src_dtypes, p_extract_workers, p_index_path=p_source_index_path, p_source_cache=source_cache)
+            metrics.fields['rows_quarantined'] = len(quarantine_df)
+            if not quarantine_df.empty:
+                quarantine_key = p_quarantine_key + datetime.strptime(
+                    p_process_dates_list[-1], p_date_format).strftime(p_target_key_date_format) + '.csv'
+                output_files.write_df_to_location(quarantine_df, quarantine_key, 'csv')
+                logger.warning('Quarantined %s source rows and files to %s', len(quarantine_df), quarantine_key)
+        metrics.rows_out = len(data_frame_all)
+        metrics.bytes_read = source_files_size(Path(p_data_set_path), p_file_extension, extract_dates_list,
+                                               p_source_index_path)
+        metrics.bytes_written = output_files.bytes_written - bytes_written
     # transform extracted data
-    data_frame_all = transform_data(data_frame_all, process_date, p_date_format)
-
-    # output data frame to folder
-    load_files_data(Path(p_output_file_path, parquet_filename), data_frame_all)
-    update_meta_file(p_meta_file_path, p_file_delimiter, p_process_dates_list)
-
-
-def return_dates_list(p_file_path: str, p_file_delimiter: str, p_process_date: str, p_date_format: str):
-    today = datetime.today().date()
-    min_date = datetime.strptime(p_process_date, p_date_format).date() - timedelta(days=1)
-    try:
-        df_meta = read_file_dataframe(Path(p_file_path), p_file_delimiter)
-        dates = [(min_date + timedelta(days=x)) for x in range(0, (today - min_date).days + 1)]
-        src_dates = set(pandas.to_datetime(df_meta['source_date']).dt.date)
-        dates_missing = set(dates[1:]) - src_dates
-        if dates_missing:
-            min_date = min(set(dates[1:]) - src_dates) - timedelta(days=1)
-            return_dates = [date.strftime(p_date_format) for date in dates if date >= min_date]
-            return_min_date = (min_date + timedelta(days=1)).strftime(p_date_format)
+    with StageMetrics('transform') as metrics:
+        metrics.rows_in = len(data_frame_all)
+        if p_transform_shards > 1:
+            data_frame_all = transform_data_sharded(data_frame_all, process_date, p_date_format, p_transform_shards,
+                                                    closing_state, closing_state_df)
         else:
-            return_dates = []
-            return_min_date = datetime(2200, 1, 1).date()
-    except Exception:
-        return_dates = [(min_date + timedelta(days=x)).strftime(p_date_format) for x in
-                        range(0, (today - min_date).days + 1)]
-        return_min_date = p_process_date
-    return return_min_date, return_dates
+            data_frame_all = transform_data(data_frame_all, process_date, p_date_format, closing_state,
+                                            closing_state_df)
+        metrics.rows_out = len(data_frame_all)
 
-
-def update_meta_file(p_file_path: str, p_file_delimiter, extracted_date_list):
-    dataframe_new = pandas.DataFrame(columns=['source_date', 'datetime_of_processing'])
-    dataframe_new['source_date'] = extracted_date_list
-    dataframe_new['datetime_of_processing'] = datetime.today().strftime('%Y-%m-%d')
-    dataframe_old = read_file_dataframe(p_file_path, p_file_delimiter)
-    dataframe_all = pandas.concat(dataframe_old, dataframe_new)
-    write_csv_files_data(p_file_path, dataframe_all)
+    # output data frame to folder
+    # the first date of the list is only extracted for the previous closing price, its partition stays untouched
+    with StageMetrics('load') as metrics:
+        metrics.rows_in = len(data_frame_all)
+        bytes_written = output_files.bytes_written
+        load_files_data(Path(p_output_file_path), data_frame_all, p_target_key, p_target_key_date_format,
+                        p_process_dates_list[1:], p_file_operations=output_files)
+        closing_state.update(data_frame_all)
+        metrics.bytes_written = output_files.bytes_written - bytes_written
+    # rolling analytics, the ring buffers of the state are pushed by the new days only
+    if p_analytics_state_key is not None:
+        with StageMetrics('analytics') as metrics:
+            bytes_read, bytes_written = output_files.bytes_read, output_files.bytes_written
+            rolling_state = RollingWindowState(output_files, p_analytics_state_key, 'ISIN', 'Date',
+                                               'closing_price_eur', 'maximum_price_eur', 'minimum_price_eur')
+            new_days_df = data_frame_all[data_frame_all['Date'].isin(p_process_dates_list[1:])]
+            metrics.rows_in = len(new_days_df)
+            state = rolling_state.read()
+            analytics_df = rolling_state.update(new_days_df, state)
+            load_files_data(Path(p_output_file_path), analytics_df, p_analytics_key, p_target_key_date_format,
+                            p_process_dates_list[1:], p_file_operations=output_files)
+            rolling_state.write(state)
+            metrics.rows_out = len(analytics_df)
+            metrics.bytes_read = output_files.bytes_read - bytes_read
+            metrics.bytes_written = output_files.bytes_written - bytes_written
+    with StageMetrics('meta_update') as metrics:
+        metrics.rows_in = len(p_process_dates_list)
+        update_meta_file(p_meta_file_path, p_process_dates_list)
+
+
+def plan_backfill_batches(p_missing_dates_list: List, p_source_dates_list: List, p_batch_size: int) -> List:
+    """
+    Split the missing dates into batches of at most p_batch_size source dates
+
+    :return: list of (checkpoint dates, source dates, extract dates) per batch, the checkpoint dates are all missing
+        dates of the batch, the extract dates lead with the last source date before the batch for the previous
+        closing prices of its first date
+    """
+    source_dates = set(p_source_dates_list)
+    date_batches = []
+    checkpoint_dates, batch_source_dates = [], []
+    for date_string in p_missing_dates_list:
+        if date_string in source_dates and len(batch_source_dates) == p_batch_size:
+            date_batches.append((checkpoint_dates, batch_source_dates))
+            checkpoint_dates, batch_source_dates = [], []
+        checkpoint_dates.append(date_string)
+        if date_string in source_dates:
+            batch_source_dates.append(date_string)
+    if checkpoint_dates:
+        date_batches.append((checkpoint_dates, batch_source_dates))
+    batches = []
+    for checkpoint_dates, batch_source_dates in date_batches:
+        extract_dates = list(batch_source_dates)
+        if batch_source_dates:
+            position = bisect_left(p_source_dates_list, batch_source_dates[0])
+            extract_dates = p_source_dates_list[max(0, position - 1):position] + extract_dates
+        batches.append((checkpoint_dates, batch_source_dates, extract_dates))
+    return batches
+
+
+def transform_batch(p_data_set_path: str, p_extract_dates_list: List, p_batch_dates_list: List, p_date_format,
+                    p_file_delimiter: str, p_file_extension: str, p_src_columns: List = None,
+                    p_src_dtypes: dict = None, p_source_index_path: str = None):
+    """
+    Extract and transform the source dates of a backfill batch, runs in a worker process
+    The dates of p_extract_dates_list before the batch only give the previous closing prices
+    """
+    data_frame = extract_all(Path(p_data_set_path), p_file_delimiter, p_file_extension, p_extract_dates_list,
+                             p_src_columns, p_src_dtypes, p_index_path=p_source_index_path)
+    data_frame = transform_data(data_frame, None, p_date_format)
+    return data_frame[data_frame['Date'].isin(p_batch_dates_list)].reset_index(drop=True)
+
+
+def backfill_process(p_data_set_path: str, p_output_file_path: str, p_meta_file_path: str, p_first_date: str,
+                     p_last_date: str, p_batch_size: int, p_parallelism: int, p_date_format: str,
+                     p_file_delimiter: str, p_file_extension: str, p_target_key: str, p_target_key_date_format: str,
+                     p_state_key: str, p_src_columns: List = None, p_src_dtypes: dict = None,
+                     p_source_index_path: str = None):
+    """
+    Backfill the dates from p_first_date to p_last_date that are missing in the meta file
+
+    The missing dates are split into batches of p_batch_size source dates, p_parallelism worker processes
+    extract and transform the batches. Every finished batch is loaded and checkpointed to the meta file
+    right away, so a rerun after a crash only processes the batches without checkpoint. Dates without
+    a source folder are found with one listing of the source location and checkpointed without work.
+    The first date of a batch takes the previous closing prices from the last source date before the batch.
+    """
+    missing_dates_list = MetaProcess.return_missing_dates(p_first_date, p_meta_file_path, p_last_date)
+    if not missing_dates_list:
+        logger.info('Nothing to backfill from %s to %s', p_first_date, p_last_date)
+        return
+    source_dates_list = FileOperations(p_data_set_path, p_source_index_path).list_source_dates(
+        '', missing_dates_list[-1])
+    batches = plan_backfill_batches(missing_dates_list, source_dates_list, p_batch_size)
+    logger.info('Backfilling %s dates in %s batches since: %s', len(missing_dates_list), len(batches),
+                missing_dates_list[0])
+    output_files = FileOperations(p_output_file_path)
+    closing_state = ClosingPriceState(output_files, p_state_key, 'ISIN', 'Date', 'closing_price_eur')
+    batch_error = None
+    with ProcessPoolExecutor(max_workers=p_parallelism) as executor:
+        futures = {}
+        for checkpoint_dates, batch_source_dates, extract_dates in batches:
+            if not batch_source_dates:
+                update_meta_file(p_meta_file_path, checkpoint_dates)
+                continue
+            future = executor.submit(transform_batch, p_data_set_path, extract_dates, batch_source_dates,
+                                     p_date_format, p_file_delimiter, p_file_extension, p_src_columns, p_src_dtypes,
+                                     p_source_index_path)
+            futures[future] = (checkpoint_dates, batch_source_dates)
+        for future in as_completed(futures):
+            checkpoint_dates, batch_source_dates = futures[future]
+            try:
+                data_frame = future.result()
+            except Exception as error:
+                # the other batches are still loaded and checkpointed, a rerun only repeats the failed ones
+                logger.exception('Backfill batch from %s to %s failed', checkpoint_dates[0], checkpoint_dates[-1])
+                batch_error = batch_error or error
+                continue
+            with StageMetrics('backfill_batch', first_date=checkpoint_dates[0],
+                              last_date=checkpoint_dates[-1]) as metrics:
+                metrics.rows_in = len(data_frame)
+                bytes_written = output_files.bytes_written
+                load_files_data(Path(p_output_file_path), data_frame, p_target_key, p_target_key_date_format,
+                                batch_source_dates, p_file_operations=output_files)
+                closing_state.update(data_frame)
+                update_meta_file(p_meta_file_path, checkpoint_dates)
+                metrics.bytes_written = output_files.bytes_written - bytes_written
+            logger.info('Backfill batch from %s to %s checkpointed', checkpoint_dates[0], checkpoint_dates[-1])
+    if batch_error is not None:
+        raise batch_error
+
+
+def return_dates_list(p_meta_key: str, p_process_date: str):
+    return MetaProcess.return_date_list(p_process_date, p_meta_key)
+
+
+def update_meta_file(p_meta_key: str, extracted_date_list):
+    MetaProcess.update_meta_file(extracted_date_list, p_meta_key)
 
 
 def main():
-    data_set_path = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\Resources\dataset'
-    meta_file_path = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\meta_file.csv'
-    output_file_path = r'D:\OneDrive\Babar\Main\Python\Projects\xetra_project\Resources\dataset\output'
-    default_date = '2022-03-15'
     date_format = '%Y-%m-%d'
     file_delimiter = ','
-    parquet_filename = 'main_data.parquet'
+    target_key = 'main_data_'
+    target_key_date_format = '%Y%m%d'
+    state_key = '_closing_price_state.parquet'
+    analytics_state_key = '_rolling_window_state.npz'
+    analytics_key = 'analytics/rolling_analytics_'
+    quarantine_key = 'quarantine/quarantine_'
     days_delta = 1
-    file_extension = 'csv'
+    file_extension = ExtractSettings.SOURCE_FILE_TYPES.value
+    extract_workers = 4
+    transform_shards = 4
 
-    extract_date, process_dates_list = return_dates_list(meta_file_path, file_delimiter, default_date, date_format)
+    ProcessLog(OUTPUT_FILE_PATH)
+    extract_date, process_dates_list = return_dates_list(META_FILE_PATH, DEFAULT_DATE)
 
-    etl_process(p_data_set_path=data_set_path,
-                p_output_file_path=output_file_path,
-                p_meta_file_path=meta_file_path,
+    etl_process(p_data_set_path=DATA_SET_PATH,
+                p_output_file_path=OUTPUT_FILE_PATH,
+                p_meta_file_path=META_FILE_PATH,
                 p_process_dates_list=process_dates_list,
                 p_default_date=extract_date,
                 p_date_format=date_format,
                 p_days_delta=days_delta,
                 p_file_delimiter=file_delimiter,
                 p_file_extension=file_extension,
-                parquet_filename=parquet_filename
+                p_target_key=target_key,
+                p_target_key_date_format=target_key_date_format,
+                p_state_key=state_key,
+                p_src_columns=SOURCE_CONFIG.src_columns,
+                p_src_dtypes=SOURCE_CONFIG.src_dtypes,
+                p_extract_workers=extract_workers,
+                p_source_index_path=SOURCE_INDEX_PATH,
+                p_source_cache_path=SOURCE_CACHE_PATH,
+                p_transform_shards=transform_shards,
+                p_analytics_state_key=analytics_state_key,
+                p_analytics_key=analytics_key,
+                p_quarantine_key=quarantine_key
                 )
 
 
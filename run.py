@@ -10,7 +10,9 @@ s3_bucket_name = 'xetra-1234'
 
 
 def get_bucket_contents(s3_client_param, bucket_name_param, prefix_param=''):
-    s3_response = s3_client_param.list_objects_v2(Bucket=bucket_name_param, Prefix=prefix_param)
+    paginator = s3_client_param.get_paginator('list_objects_v2')
+    s3_response = [obj for page in paginator.paginate(Bucket=bucket_name_param, Prefix=prefix_param)
+                   for obj in page.get('Contents', [])]
     return s3_response
 
 
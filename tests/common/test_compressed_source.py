@@ -0,0 +1,66 @@
+"""
+Tests of the streaming decompression of compressed source files
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas
+import pyarrow
+import pytest
+
+from xetra.common.compressed_source import DecompressingReader, read_compressed_csv, source_compression
+
+SOURCE_DF = pandas.DataFrame({'ISIN': [f'DE{isin:010d}' for isin in range(2000)],
+                              'StartPrice': [isin / 100 for isin in range(2000)]})
+
+
+def compress(content: bytes, compression: str) -> bytes:
+    """
+    :return: content compressed with the pyarrow codec
+    """
+    output_stream = pyarrow.BufferOutputStream()
+    with pyarrow.CompressedOutputStream(output_stream, compression) as stream:
+        stream.write(content)
+    return output_stream.getvalue().to_pybytes()
+
+
+@pytest.mark.parametrize('file_type', ['csv.gz', 'csv.zst'])
+@pytest.mark.parametrize('chunksize', [None, 300])
+def test_read_compressed_csv(tmp_path, file_type, chunksize):
+    """
+    Compressed files and in-memory objects give the rows of the plain csv file
+    """
+    source_path = tmp_path / f'source.{file_type}'
+    source_path.write_bytes(compress(SOURCE_DF.to_csv(index=False).encode(), source_compression(source_path)))
+    for source in (str(source_path), source_path.read_bytes()):
+        data_frame = read_compressed_csv(source, source_compression(source_path), chunksize=chunksize)
+        if chunksize is not None:
+            with data_frame as chunks:
+                data_frame = pandas.concat(list(chunks))
+        pandas.testing.assert_frame_equal(SOURCE_DF, data_frame)
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'zstd'])
+def test_truncated_stream_raises(compression):
+    """
+    A truncated file raises in the reader instead of leaving it waiting for blocks that never come
+    """
+    content = compress(SOURCE_DF.to_csv(index=False).encode(), compression)
+    reader = DecompressingReader(content[:len(content) // 2], compression, block_bytes=1024)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(OSError):
+            executor.submit(reader.read).result(timeout=10)
+    reader.close()
+    reader._thread.join(timeout=10)
+    assert not reader._thread.is_alive()
+
+
+def test_closed_reader_stops_its_thread():
+    """
+    Closing a reader before the end releases the background thread waiting for room in the queue
+    """
+    content = compress(SOURCE_DF.to_csv(index=False).encode(), 'gzip')
+    reader = DecompressingReader(content, 'gzip', block_bytes=64, queue_blocks=1)
+    assert reader.read(10)
+    reader.close()
+    reader._thread.join(timeout=10)
+    assert not reader._thread.is_alive()
@@ -0,0 +1,112 @@
+"""
+Tests of the persisted source folder index and the parquet codecs of FileOperations
+"""
+import json
+import os
+from pathlib import Path
+
+import pandas
+import pyarrow.parquet
+import pytest
+
+from xetra.common.constants import FileTypes, ParquetCodecs
+from xetra.common.custom_exceptions import WrongFormatException
+from xetra.common.file_operations import FileOperations
+
+
+def write_files(root_path: Path, keys: list):
+    """
+    Writes empty files at the keys below root_path
+    """
+    for key in keys:
+        Path(root_path, key).parent.mkdir(parents=True, exist_ok=True)
+        Path(root_path, key).write_text('')
+
+
+def bump_mtime(path: Path):
+    """
+    Moves the modification time of a folder forward, a change within the timestamp resolution would go unseen
+    """
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_index_is_built_and_persisted(tmp_path):
+    """
+    The first listing scans the location and persists the folders, a new instance lists from the index
+    """
+    source_path, index_path = tmp_path / 'source', str(tmp_path / 'index.json')
+    write_files(source_path, ['2022-03-14/a.csv', '2022-03-15/a.csv', '2022-03-15/b.csv.gz', '2022-03-15/c.txt',
+                              'prefix_2022-03-16/a.csv', 'output/report.parquet'])
+    file_operations = FileOperations(str(source_path), index_path)
+    assert file_operations.list_files_in_location('2022-03-15') == ['2022-03-15/a.csv', '2022-03-15/b.csv.gz']
+    index = json.loads(Path(index_path).read_text())
+    assert sorted(index['folders']) == ['2022-03-14', '2022-03-15', 'output', 'prefix_2022-03-16']
+    assert index['folders']['2022-03-15']['files'] == ['a.csv', 'b.csv.gz', 'c.txt']
+    indexed_operations = FileOperations(str(source_path), index_path)
+    assert indexed_operations.list_files_in_location('2022-03-16') == ['prefix_2022-03-16/a.csv']
+    assert indexed_operations.list_files_in_location('2022-03-17') == []
+    assert indexed_operations.list_files_in_location('put', 'parquet') == ['output/report.parquet']
+
+
+def test_index_follows_modification_times(tmp_path):
+    """
+    New files and folders are listed once the modification time of their folder changed
+    """
+    source_path, index_path = tmp_path / 'source', str(tmp_path / 'index.json')
+    write_files(source_path, ['2022-03-15/a.csv'])
+    file_operations = FileOperations(str(source_path), index_path)
+    assert file_operations.list_files_in_location('2022-03-15') == ['2022-03-15/a.csv']
+    write_files(source_path, ['2022-03-15/b.csv', '2022-03-16/a.csv'])
+    bump_mtime(source_path / '2022-03-15')
+    bump_mtime(source_path)
+    assert file_operations.list_files_in_location('2022-03-15') == ['2022-03-15/a.csv', '2022-03-15/b.csv']
+    assert file_operations.list_files_in_location('2022-03-16') == ['2022-03-16/a.csv']
+    # a restart reads the updated index
+    assert FileOperations(str(source_path), index_path).list_files_in_location('2022-03-15') == [
+        '2022-03-15/a.csv', '2022-03-15/b.csv']
+
+
+def test_date_range_listing(tmp_path):
+    """
+    Dates without a source folder are skipped, with and without index
+    """
+    source_path = tmp_path / 'source'
+    write_files(source_path, ['2022-03-11/a.csv', '2022-03-14/a.csv', '2022-03-14/b.csv', '2022-03-15/a.csv',
+                              '2022-03-21/a.csv', 'output/report.parquet'])
+    for index_path in (None, str(tmp_path / 'index.json')):
+        file_operations = FileOperations(str(source_path), index_path)
+        assert file_operations.list_source_dates('2022-03-12', '2022-03-20') == ['2022-03-14', '2022-03-15']
+        assert file_operations.list_files_in_date_range('2022-03-12', '2022-03-20') == [
+            '2022-03-14/a.csv', '2022-03-14/b.csv', '2022-03-15/a.csv']
+
+
+@pytest.mark.parametrize('dictionary_cols', [None, ['ISIN', 'Date']])
+@pytest.mark.parametrize('codec', list(ParquetCodecs))
+def test_parquet_round_trip_per_codec(tmp_path, codec, dictionary_cols):
+    """
+    Every codec reads back unchanged, the column chunks carry the codec and only the dictionary columns
+    have a dictionary page
+    """
+    data_frame = pandas.DataFrame({'ISIN': ['DE0000000000', 'DE0000000001'] * 50, 'Date': '2022-03-15',
+                                   'closing_price_eur': [index / 3 for index in range(100)]})
+    file_operations = FileOperations(str(tmp_path))
+    path = file_operations.write_df_to_location(data_frame, 'report.parquet', FileTypes.PARQUET.value,
+                                                compression=codec.value, dictionary_cols=dictionary_cols)
+    pandas.testing.assert_frame_equal(file_operations.read_parquet_to_df('report.parquet'), data_frame)
+    row_group = pyarrow.parquet.ParquetFile(path).metadata.row_group(0)
+    expected_dictionary_cols = list(data_frame.columns) if dictionary_cols is None else dictionary_cols
+    for index, column in enumerate(data_frame.columns):
+        column_chunk = row_group.column(index)
+        assert column_chunk.compression == ('UNCOMPRESSED' if codec == ParquetCodecs.NONE else codec.name)
+        assert column_chunk.has_dictionary_page == (column in expected_dictionary_cols)
+
+
+def test_unsupported_codec_is_refused(tmp_path):
+    """
+    A codec that is no value of ParquetCodecs raises and leaves no file behind
+    """
+    with pytest.raises(WrongFormatException):
+        FileOperations(str(tmp_path)).write_df_to_location(pandas.DataFrame({'ISIN': ['A']}), 'report.parquet',
+                                                           FileTypes.PARQUET.value, compression='lzo')
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,110 @@
+"""
+Tests of the SQLite meta file of MetaProcess
+"""
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas
+
+from xetra.common.constants import MetaProcessFormat
+from xetra.common.meta_process import MetaProcess
+
+DATE_FORMAT = MetaProcessFormat.META_DATE_FORMAT.value
+
+
+def march(*days) -> list:
+    """
+    :return: dates of the days of March 2022
+    """
+    return [f'2022-03-{day:02d}' for day in days]
+
+
+def days_ago(*days) -> list:
+    """
+    :return: dates the days before today
+    """
+    return [(datetime.today().date() - timedelta(days=day)).strftime(DATE_FORMAT) for day in days]
+
+
+def meta_ranges(meta_key: str) -> list:
+    """
+    :return: (range_start, range_end) of the processed ranges in order
+    """
+    with closing(sqlite3.connect(meta_key)) as connection:
+        return connection.execute(f'SELECT range_start, range_end FROM {MetaProcessFormat.META_RANGES_TABLE.value} '
+                                  'ORDER BY range_start').fetchall()
+
+
+def test_adjacent_and_overlapping_dates_merge_into_ranges(tmp_path):
+    """
+    Dates next to or inside a processed range extend it, a date closing a gap joins both ranges
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    MetaProcess.update_meta_file(march(1, 2), meta_key)
+    MetaProcess.update_meta_file(march(5, 4), meta_key)
+    MetaProcess.update_meta_file(march(8), meta_key)
+    assert meta_ranges(meta_key) == [('2022-03-01', '2022-03-02'), ('2022-03-04', '2022-03-05'),
+                                     ('2022-03-08', '2022-03-08')]
+    MetaProcess.update_meta_file(march(3), meta_key)
+    assert meta_ranges(meta_key) == [('2022-03-01', '2022-03-05'), ('2022-03-08', '2022-03-08')]
+    MetaProcess.update_meta_file(march(4, 5, 6, 6), meta_key)
+    assert meta_ranges(meta_key) == [('2022-03-01', '2022-03-06'), ('2022-03-08', '2022-03-08')]
+    MetaProcess.update_meta_file(march(7, 9), meta_key)
+    assert meta_ranges(meta_key) == [('2022-03-01', '2022-03-09')]
+
+
+def test_missing_dates_are_the_gaps_between_ranges(tmp_path):
+    """
+    return_missing_dates finds the gaps before, between and after the processed ranges
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    MetaProcess.update_meta_file(march(3, 4, 7, 8), meta_key)
+    assert MetaProcess.return_missing_dates('2022-03-01', meta_key, '2022-03-10') == march(1, 2, 5, 6, 9, 10)
+    assert MetaProcess.return_missing_dates('2022-03-04', meta_key, '2022-03-08') == march(5, 6)
+    assert MetaProcess.return_missing_dates('2022-03-07', meta_key, '2022-03-08') == []
+
+
+def test_date_list_with_first_date_inside_a_range(tmp_path):
+    """
+    A first date inside a processed range starts the list with the last date of the range
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    MetaProcess.update_meta_file(days_ago(10, 9, 8, 7, 6, 5), meta_key)
+    extract_date, date_list = MetaProcess.return_date_list(days_ago(8)[0], meta_key)
+    assert extract_date == days_ago(4)[0]
+    assert date_list == days_ago(5, 4, 3, 2, 1, 0)
+
+
+def test_date_list_with_first_date_before_a_range(tmp_path):
+    """
+    A first date before the processed ranges is processed again with all later dates
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    MetaProcess.update_meta_file(days_ago(5, 4), meta_key)
+    extract_date, date_list = MetaProcess.return_date_list(days_ago(8)[0], meta_key)
+    assert extract_date == days_ago(8)[0]
+    assert date_list == days_ago(9, 8, 7, 6, 5, 4, 3, 2, 1, 0)
+
+
+def test_date_list_of_a_meta_covering_today(tmp_path):
+    """
+    A meta file covering today returns the sentinel date without dates, the first missing date is tomorrow
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    MetaProcess.update_meta_file(days_ago(2, 1, 0), meta_key)
+    assert MetaProcess.return_date_list(days_ago(2)[0], meta_key) == ('2200-01-01', [])
+    assert MetaProcess.first_missing_date(days_ago(2)[0], meta_key) == days_ago(-1)[0]
+
+
+def test_csv_meta_file_is_imported(tmp_path):
+    """
+    The dates of a csv meta file of earlier versions are imported into the ranges
+    """
+    meta_key = str(tmp_path / 'meta.db')
+    pandas.DataFrame({MetaProcessFormat.META_SOURCE_DATE_COL.value: march(1, 2, 3, 6),
+                      MetaProcessFormat.META_PROCESS_COL.value: '2022-03-10 08:00:00'}).to_csv(
+        tmp_path / 'meta_file.csv', index=False)
+    MetaProcess.import_meta_csv(str(tmp_path / 'meta_file.csv'), meta_key)
+    assert meta_ranges(meta_key) == [('2022-03-01', '2022-03-03'), ('2022-03-06', '2022-03-06')]
+    assert MetaProcess.return_missing_dates('2022-03-01', meta_key, '2022-03-06') == march(4, 5)
@@ -0,0 +1,98 @@
+"""
+Tests of the logging configuration and the stage metrics
+"""
+import json
+import logging
+import time
+
+import pandas
+import pytest
+
+import get_xtera_data
+from configs.process_logger import METRICS_LOGGER, ProcessLog, StageMetrics, measure_stage
+
+
+class _RecordsHandler(logging.Handler):
+    """
+    Keeps the json lines of the metrics logger
+    """
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(json.loads(record.getMessage()))
+
+
+class _SlowSource:
+    """
+    Stage taking 0.05 s per chunk it produces and counting the bytes it reads
+    """
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.connector = self
+
+    @measure_stage('extract', connectors=('connector',))
+    def extract(self, chunks: int):
+        return self._chunks(chunks)
+
+    def _chunks(self, chunks: int):
+        for _ in range(chunks):
+            time.sleep(0.05)
+            self.bytes_read += 100
+            yield pandas.DataFrame({'ISIN': ['A', 'B']})
+
+
+@pytest.fixture
+def metrics_records():
+    """
+    Metrics lines logged during the test
+    """
+    handler = _RecordsHandler()
+    metrics_logger = logging.getLogger(METRICS_LOGGER)
+    level = metrics_logger.level
+    metrics_logger.addHandler(handler)
+    metrics_logger.setLevel(logging.INFO)
+    yield handler.records
+    metrics_logger.removeHandler(handler)
+    metrics_logger.setLevel(level)
+
+
+def test_module_loggers_stay_enabled(tmp_path):
+    """
+    Loggers created at import before the logging configuration still emit afterwards
+    """
+    ProcessLog(str(tmp_path))
+    assert not get_xtera_data.logger.disabled
+    assert get_xtera_data.logger.isEnabledFor(logging.INFO)
+
+
+def test_paused_time_is_left_out(metrics_records):
+    """
+    Waiting in a paused block does not count as wall time of the stage
+    """
+    with StageMetrics('extract') as metrics:
+        with metrics.paused():
+            time.sleep(0.2)
+    assert metrics_records[0]['wall_seconds'] < 0.1
+    assert metrics_records[0]['paused_seconds'] >= 0.2
+
+
+def test_generator_stage_is_measured_while_producing(metrics_records):
+    """
+    A stage returning a generator is logged once it is exhausted, with the time spent producing
+    the chunks and without the time the consumer spent on them
+    """
+    chunks = _SlowSource().extract(3)
+    assert metrics_records == []
+    for _ in chunks:
+        time.sleep(0.1)
+    record, = metrics_records
+    assert record['stage'] == 'extract' and record['status'] == 'ok'
+    assert 0.15 <= record['wall_seconds'] < 0.3
+    assert record['paused_seconds'] >= 0.3
+    assert record['rows_out'] == 6
+    assert record['bytes_read'] == 300
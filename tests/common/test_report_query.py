@@ -0,0 +1,131 @@
+"""
+Tests of the partition, row group and cluster selection of ReportQuery
+"""
+import pandas
+import pyarrow.parquet
+import pytest
+
+from xetra.common.constants import FileTypes
+from xetra.common.file_operations import FileOperations
+from xetra.common.partitioned_target import PartitionedTarget
+from xetra.common.report_query import ReportQuery
+
+TRG_KEY = 'report/xetra_report_'
+TRG_KEY_DATE_FORMAT = '%Y%m%d'
+DATES = ['2022-03-14', '2022-03-15', '2022-03-16']
+ISINS = [f'DE{index:010d}' for index in range(8)]
+
+
+def report_df(dates: list = None, price_offset: float = 0.0) -> pandas.DataFrame:
+    """
+    Report rows of every ISIN on every date, sorted by ISIN
+    """
+    dates = DATES if dates is None else dates
+    return pandas.DataFrame([{'ISIN': isin, 'Date': date_string, 'closing_price_eur': index + price_offset}
+                             for index, isin in enumerate(ISINS) for date_string in dates])
+
+
+@pytest.fixture
+def report_query(tmp_path):
+    """
+    ReportQuery of a report with row groups of two ISINs per partition
+    """
+    file_operations = FileOperations(str(tmp_path))
+    PartitionedTarget(file_operations, TRG_KEY, TRG_KEY_DATE_FORMAT, FileTypes.PARQUET.value, 'Date',
+                      row_group_rows=2).write_partitions(report_df())
+    return ReportQuery(file_operations, TRG_KEY, TRG_KEY_DATE_FORMAT, 'ISIN', 'Date')
+
+
+@pytest.fixture
+def read_row_groups(monkeypatch):
+    """
+    Records the number of row groups of the file and the row groups read, for every read
+    """
+    calls = []
+    read = pyarrow.parquet.ParquetFile.read_row_groups
+
+    def recording_read(parquet_file, row_groups, *args, **kwargs):
+        calls.append((parquet_file.reader.metadata.num_row_groups, list(row_groups)))
+        return read(parquet_file, row_groups, *args, **kwargs)
+
+    monkeypatch.setattr(pyarrow.parquet.ParquetFile, 'read_row_groups', recording_read)
+    return calls
+
+
+def read_keys(report_query: ReportQuery, monkeypatch) -> list:
+    """
+    Records the keys of the files read by the query
+    """
+    keys = []
+    read_file = report_query._read_file
+
+    def recording_read_file(key, *args):
+        keys.append(key)
+        return read_file(key, *args)
+
+    monkeypatch.setattr(report_query, '_read_file', recording_read_file)
+    return keys
+
+
+def isin_statistics(isins: list):
+    """
+    :return: statistics of the ISIN column chunk of a parquet row group holding the ISINs
+    """
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(pyarrow.table({'ISIN': isins}), sink)
+    return pyarrow.parquet.ParquetFile(pyarrow.BufferReader(sink.getvalue())).metadata.row_group(0).column(0).statistics
+
+
+def test_statistics_pruning():
+    """
+    Row groups are skipped only if their statistics can not match, missing statistics never skip
+    """
+    statistics = isin_statistics(['DE02', 'DE05'])
+    assert ReportQuery._may_contain(statistics, ['DE01', 'DE03'])
+    assert ReportQuery._may_contain(statistics, ['DE05'])
+    assert not ReportQuery._may_contain(statistics, ['DE01', 'DE06'])
+    assert not ReportQuery._may_contain(statistics, [])
+    assert ReportQuery._overlaps(statistics, 'DE05', 'DE09')
+    assert ReportQuery._overlaps(statistics, 'DE00', 'DE02')
+    assert not ReportQuery._overlaps(statistics, 'DE06', 'DE09')
+    assert ReportQuery._may_contain(None, ['DE01']) and ReportQuery._overlaps(None, 'DE06', 'DE09')
+
+
+def test_query_reads_only_matching_partitions_and_row_groups(report_query, read_row_groups):
+    """
+    Dates outside the range are not opened and only the row groups of the ISINs are read
+    """
+    query_df = report_query.query([ISINS[5], ISINS[0]], DATES[1], DATES[2], ['closing_price_eur'])
+    assert query_df['closing_price_eur'].tolist() == [0.0, 0.0, 5.0, 5.0]
+    assert read_row_groups == [(4, [0, 2]), (4, [0, 2])]
+
+
+def test_cluster_is_used_until_a_partition_is_rewritten(report_query, read_row_groups, monkeypatch):
+    """
+    A clustered range is read from one file, after a partition of it was written again
+    the rewritten daily partition is read and the cluster is no longer used
+    """
+    cluster_key = report_query.cluster_partitions(DATES[0], DATES[2], row_group_rows=3)
+    keys = read_keys(report_query, monkeypatch)
+    query_df = report_query.query([ISINS[3]])
+    assert keys == [cluster_key]
+    assert read_row_groups == [(8, [3])]
+    assert query_df['Date'].tolist() == DATES
+    report_query.target.write_partitions(report_df([DATES[1]], price_offset=100.0))
+    keys.clear()
+    query_df = report_query.query([ISINS[3]])
+    assert sorted(keys) == sorted(report_query.target.partition_key(date_string) for date_string in DATES)
+    assert query_df['closing_price_eur'].tolist() == [3.0, 103.0, 3.0]
+
+
+def test_result_cache_follows_the_manifest(report_query, monkeypatch):
+    """
+    A repeated query is served from the cache, a query after write_partitions reads the new rows
+    """
+    keys = read_keys(report_query, monkeypatch)
+    first_df = report_query.query([ISINS[1]], DATES[2], DATES[2])
+    assert report_query.query([ISINS[1]], DATES[2], DATES[2]).equals(first_df)
+    assert len(keys) == 1
+    report_query.target.write_partitions(report_df([DATES[2]], price_offset=100.0))
+    assert report_query.query([ISINS[1]], DATES[2], DATES[2])['closing_price_eur'].tolist() == [101.0]
+    assert len(keys) == 2
@@ -0,0 +1,82 @@
+"""
+Tests of the incremental rolling analytics against the pandas recompute
+"""
+import numpy
+import pandas
+import pytest
+
+from xetra.common.file_operations import FileOperations
+from xetra.common.rolling_state import RollingWindowState
+
+STATE_KEY = 'state/rolling_state.npz'
+ZERO_CLOSE_ISIN = 'DE0000000002'
+
+
+def history_df(days: int = 12) -> pandas.DataFrame:
+    """
+    Report rows of three ISINs, the second one not trading on every third day, the third one closing at zero once
+    """
+    rng = numpy.random.default_rng(7)
+    dates = pandas.bdate_range('2022-03-01', periods=days).strftime('%Y-%m-%d')
+    rows = []
+    for isin in ('DE0000000000', 'DE0000000001', ZERO_CLOSE_ISIN):
+        close = 10 + rng.random(days).cumsum()
+        if isin == ZERO_CLOSE_ISIN:
+            close[4] = 0.0
+        for day, date_string in enumerate(dates):
+            if isin == 'DE0000000001' and day % 3 == 2:
+                continue
+            rows.append({'ISIN': isin, 'Date': date_string, 'closing_price_eur': close[day],
+                         'maximum_price_eur': close[day] + rng.random(),
+                         'minimum_price_eur': close[day] - rng.random()})
+    return pandas.DataFrame(rows)
+
+
+def rolling_state(tmp_path, **windows) -> RollingWindowState:
+    """
+    RollingWindowState with short windows, so they fill within the history
+    """
+    windows = {'ma_windows': (2, 3), 'volatility_window': 3, 'high_low_window': 4, **windows}
+    return RollingWindowState(FileOperations(str(tmp_path)), STATE_KEY, 'ISIN', 'Date', 'closing_price_eur',
+                              'maximum_price_eur', 'minimum_price_eur', **windows)
+
+
+@pytest.mark.parametrize('days_per_update', [1, 5])
+def test_update_over_days_equals_recompute(tmp_path, days_per_update):
+    """
+    Updating the persisted state day by day or in batches of days gives the metrics of the full recompute,
+    a zero close gives no return in both
+    """
+    state_handler = rolling_state(tmp_path)
+    report_df = history_df()
+    dates = sorted(report_df['Date'].unique())
+    analytics_dfs = []
+    for start in range(0, len(dates), days_per_update):
+        state = state_handler.read()
+        analytics_dfs.append(state_handler.update(
+            report_df[report_df['Date'].isin(dates[start:start + days_per_update])], state))
+        state_handler.write(state)
+    incremental_df = pandas.concat(analytics_dfs, ignore_index=True).sort_values(by=['ISIN', 'Date'],
+                                                                                 ignore_index=True)
+    expected_df = state_handler.recompute(report_df)
+    assert numpy.isfinite(expected_df['volatility_3_%'].dropna()).all()
+    assert expected_df[expected_df['ISIN'] == ZERO_CLOSE_ISIN]['volatility_3_%'].notna().any()
+    pandas.testing.assert_frame_equal(expected_df, incremental_df, check_dtype=False, rtol=1e-9)
+
+
+def test_state_of_other_windows_is_rebuilt(tmp_path):
+    """
+    A state written with other windows is refused until it is rebuilt from the history,
+    the rebuilt state continues like a state updated from the start
+    """
+    report_df = history_df()
+    last_date = report_df['Date'].max()
+    rolling_state(tmp_path, high_low_window=2).rebuild(report_df[report_df['Date'] < last_date])
+    state_handler = rolling_state(tmp_path)
+    with pytest.raises(ValueError):
+        state_handler.read()
+    state_handler.rebuild(report_df[report_df['Date'] < last_date])
+    analytics_df = state_handler.update(report_df[report_df['Date'] == last_date])
+    expected_df = state_handler.recompute(report_df)
+    pandas.testing.assert_frame_equal(expected_df[expected_df['Date'] == last_date].reset_index(drop=True),
+                                      analytics_df, check_dtype=False, rtol=1e-9)
@@ -0,0 +1,115 @@
+"""
+Tests of the S3BucketConnector against a moto S3 bucket
+"""
+import pandas
+import pytest
+from botocore.exceptions import IncompleteReadError, ReadTimeoutError
+from moto import mock_aws
+
+from xetra.common.constants import FileTypes
+from xetra.common.s3 import S3BucketConnector
+from xetra.common.source_cache import SourceCache
+
+BUCKET = 'xetra-test'
+
+
+@pytest.fixture
+def s3_connector(monkeypatch):
+    """
+    S3BucketConnector of an empty moto bucket
+    """
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-central-1')
+    with mock_aws():
+        s3_connector = S3BucketConnector('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY',
+                                         'https://s3.eu-central-1.amazonaws.com', BUCKET, max_workers=4,
+                                         backoff_seconds=0)
+        s3_connector._client.create_bucket(Bucket=BUCKET,
+                                           CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+        yield s3_connector
+
+
+def put_csv(s3_connector: S3BucketConnector, key: str, data_frame: pandas.DataFrame):
+    """
+    Puts the data frame as csv object to the bucket
+    """
+    s3_connector._client.put_object(Bucket=BUCKET, Key=key, Body=data_frame.to_csv(index=False).encode())
+
+
+def test_listing_follows_pagination(s3_connector):
+    """
+    More keys than one list_objects_v2 page are listed, source dates come from the top level prefixes
+    """
+    for index in range(1100):
+        s3_connector._client.put_object(Bucket=BUCKET, Key=f'2022-03-15/file_{index:04d}.csv', Body=b'')
+    for key in ('2022-03-14/file.csv', '2022-03-16/file.csv.gz', 'output/report.parquet'):
+        s3_connector._client.put_object(Bucket=BUCKET, Key=key, Body=b'')
+    keys = s3_connector.list_files_in_location('2022-03-15')
+    assert keys == [f'2022-03-15/file_{index:04d}.csv' for index in range(1100)]
+    assert s3_connector.list_files_in_prefixes(['2022-03-14', '2022-03-16']) == ['2022-03-14/file.csv',
+                                                                                 '2022-03-16/file.csv.gz']
+    assert s3_connector.list_source_dates('2022-03-15', '2022-03-31') == ['2022-03-15', '2022-03-16']
+    assert 0 <= s3_connector.file_age_seconds(keys[0]) < 60
+
+
+@pytest.mark.parametrize('error', [IncompleteReadError(actual_bytes=1, expected_bytes=2),
+                                   ReadTimeoutError(endpoint_url='https://s3.eu-central-1.amazonaws.com')])
+def test_interrupted_reads_are_retried(s3_connector, monkeypatch, error):
+    """
+    A body read failing with a retryable error is repeated until max_attempts
+    """
+    data_frame = pandas.DataFrame({'ISIN': ['A', 'B'], 'StartPrice': [1.0, 2.0]})
+    put_csv(s3_connector, '2022-03-15/file.csv', data_frame)
+    get_object = s3_connector._client.get_object
+    calls = []
+
+    def failing_get_object(**kwargs):
+        calls.append(kwargs['Key'])
+        if len(calls) < 5:
+            raise error
+        return get_object(**kwargs)
+
+    monkeypatch.setattr(s3_connector._client, 'get_object', failing_get_object)
+    s3_connector.max_attempts = 5
+    pandas.testing.assert_frame_equal(s3_connector.read_csv_to_df('2022-03-15/file.csv'), data_frame)
+    assert len(calls) == 5
+    calls.clear()
+    s3_connector.max_attempts = 4
+    with pytest.raises(type(error)):
+        s3_connector.read_object('2022-03-15/file.csv')
+    assert len(calls) == 4
+
+
+def test_source_cache_is_keyed_by_etag(s3_connector, tmp_path):
+    """
+    A cached object is not downloaded again until it is overwritten with another ETag
+    """
+    s3_connector.source_cache = SourceCache(str(tmp_path))
+    first_df = pandas.DataFrame({'ISIN': ['A', 'B'], 'StartPrice': [1.0, 2.0]})
+    put_csv(s3_connector, '2022-03-15/file.csv', first_df)
+    pandas.testing.assert_frame_equal(s3_connector.read_csv_to_df('2022-03-15/file.csv'), first_df)
+    bytes_read = s3_connector.bytes_read
+    pandas.testing.assert_frame_equal(s3_connector.read_csv_to_df('2022-03-15/file.csv'), first_df)
+    assert s3_connector.bytes_read == bytes_read
+    second_df = pandas.DataFrame({'ISIN': ['C'], 'StartPrice': [3.0]})
+    put_csv(s3_connector, '2022-03-15/file.csv', second_df)
+    pandas.testing.assert_frame_equal(s3_connector.read_csv_to_df('2022-03-15/file.csv'), second_df)
+    assert s3_connector.bytes_read > bytes_read
+
+
+def test_large_frames_are_uploaded_in_parts(s3_connector):
+    """
+    A body larger than part_bytes is written as multipart upload and reads back unchanged
+    """
+    part_bytes = 5 * 1024 ** 2
+    data_frame = pandas.DataFrame({'ISIN': [f'DE{index:010d}' for index in range(300000)],
+                                   'StartPrice': [index / 7 for index in range(300000)]})
+    assert s3_connector.write_df_to_s3(data_frame, 'output/report.csv', FileTypes.CSV.value,
+                                       part_bytes=part_bytes)
+    head = s3_connector._client.head_object(Bucket=BUCKET, Key='output/report.csv')
+    assert head['ContentLength'] > part_bytes
+    # the ETag of a multipart object ends with the number of parts
+    assert head['ETag'].strip('"').endswith(f'-{-(-head["ContentLength"] // part_bytes)}')
+    assert s3_connector.bytes_written == head['ContentLength']
+    pandas.testing.assert_frame_equal(s3_connector.read_csv_to_df('output/report.csv'), data_frame)
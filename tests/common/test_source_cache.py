@@ -0,0 +1,51 @@
+"""
+Tests of the columnar source cache
+"""
+import gzip
+
+import pandas
+import pytest
+
+from xetra.common.compressed_source import DecompressingReader
+from xetra.common.source_cache import SourceCache
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    source_path = tmp_path / 'source.csv'
+    pandas.DataFrame({'ISIN': ['DE0000000001', 'DE0000000002', 'DE0000000003'],
+                      'StartPrice': [1.5, 2.5, 3.5]}).to_csv(source_path, index=False)
+    return source_path
+
+
+@pytest.mark.parametrize('chunksize', [None, 2])
+def test_miss_and_hit_return_the_same_rows(tmp_path, source_file, chunksize):
+    """
+    The data frame parsed on a miss equals the one read from the cache file on a hit
+    """
+    source_cache = SourceCache(str(tmp_path / 'cache'))
+    source_id = SourceCache.file_source_id(source_file)
+    miss = source_cache.read_csv_to_df(source_id, lambda: source_file, chunksize=chunksize)
+    hit = source_cache.read_csv_to_df(source_id, lambda: source_file, chunksize=chunksize)
+    if chunksize is not None:
+        miss, hit = pandas.concat(list(miss)), pandas.concat(list(hit))
+    assert (source_cache.misses, source_cache.hits) == (1, 1)
+    pandas.testing.assert_frame_equal(miss, hit)
+    pandas.testing.assert_frame_equal(miss, pandas.read_csv(source_file))
+
+
+def test_failed_parse_closes_the_source(tmp_path):
+    """
+    The decompressing reader of a miss is closed if the parse fails, which stops its background thread
+    """
+    source_path = tmp_path / 'source.csv.gz'
+    source_path.write_bytes(gzip.compress(b'ISIN,StartPrice\nDE0000000001,1.5\n'))
+    readers = []
+
+    def load_source():
+        readers.append(DecompressingReader(str(source_path), 'gzip'))
+        return readers[-1]
+
+    with pytest.raises(ValueError):
+        SourceCache(str(tmp_path / 'cache')).read_csv_to_df('source', load_source, columns=['TradedVolume'])
+    assert readers[0].closed
@@ -0,0 +1,95 @@
+"""
+Tests of the validation and quarantine of source batches
+"""
+from pathlib import Path
+
+import pandas
+import pytest
+
+from configs.etl_config import SOURCE_CONFIG, SRC_COLUMNS, SRC_DTYPES
+from get_xtera_data import read_validated_file_dataframe
+from xetra.common.constants import QuarantineReasons
+from xetra.common.validation import QUARANTINE_FILE_COL, QUARANTINE_REASON_COL, validate_source_df
+
+
+def source_batch() -> pandas.DataFrame:
+    """
+    Clean source rows of two ISINs
+    """
+    return pandas.DataFrame({'ISIN': ['A', 'A', 'B'], 'Date': '2022-03-15', 'Time': ['08:00', '08:01', '08:00'],
+                             'StartPrice': [10.0, 10.5, 20.0], 'MaxPrice': [10.5, 11.0, 20.5],
+                             'MinPrice': [9.5, 10.0, 19.5], 'EndPrice': [10.2, 10.7, 20.2],
+                             'TradedVolume': [100.0, 200.0, 300.0]})[SRC_COLUMNS]
+
+
+def validate(data_frame: pandas.DataFrame):
+    """
+    Validates a batch with the column names of the source configuration
+    """
+    src = SOURCE_CONFIG
+    return validate_source_df(data_frame, 'file.csv', src.src_col_isin, src.src_col_date, src.src_col_time,
+                              src.src_col_start_price, src.src_col_min_price, src.src_col_max_price,
+                              src.src_col_traded_vol)
+
+
+def test_clean_batch_is_returned_unchanged():
+    """
+    A batch without invalid rows is passed on as it is and nothing is quarantined
+    """
+    data_frame = source_batch()
+    validated = validate(data_frame)
+    assert validated.data_frame is data_frame
+    assert validated.quarantine_df.empty
+    assert list(validated.quarantine_df.columns) == [QUARANTINE_FILE_COL, QUARANTINE_REASON_COL]
+
+
+@pytest.mark.parametrize('reason, column, value', [
+    (QuarantineReasons.MISSING_VALUE, 'EndPrice', None),
+    (QuarantineReasons.PRICE_RANGE, 'StartPrice', 12.0),
+    (QuarantineReasons.PRICE_RANGE, 'StartPrice', 9.0),
+    (QuarantineReasons.NEGATIVE_VOLUME, 'TradedVolume', -1.0),
+    (QuarantineReasons.DUPLICATE_ROW, 'Time', '08:00'),
+])
+def test_invalid_rows_are_quarantined(reason, column, value):
+    """
+    The second row breaks one check, it is quarantined with its reason and the other rows stay valid
+    """
+    data_frame = source_batch()
+    data_frame.loc[1, column] = value
+    validated = validate(data_frame)
+    pandas.testing.assert_frame_equal(validated.data_frame, data_frame.iloc[[0, 2]].reset_index(drop=True))
+    assert validated.quarantine_df[QUARANTINE_REASON_COL].tolist() == [reason.value]
+    assert validated.quarantine_df[QUARANTINE_FILE_COL].tolist() == ['file.csv']
+    pandas.testing.assert_frame_equal(validated.quarantine_df[SRC_COLUMNS],
+                                      data_frame.iloc[[1]].reset_index(drop=True))
+
+
+def test_invalid_number_is_quarantined(tmp_path):
+    """
+    A value that is no number only quarantines its row, the other rows of the file are read
+    """
+    data_frame = source_batch()
+    data_frame['StartPrice'] = data_frame['StartPrice'].astype(object)
+    data_frame.loc[1, 'StartPrice'] = '10,5 EUR'
+    data_frame.to_csv(tmp_path / 'file.csv', index=False)
+    validated = read_validated_file_dataframe(str(tmp_path / 'file.csv'), ',', SRC_COLUMNS, SRC_DTYPES)
+    pandas.testing.assert_frame_equal(validated.data_frame, source_batch().iloc[[0, 2]].reset_index(drop=True))
+    assert validated.quarantine_df[QUARANTINE_REASON_COL].tolist() == [QuarantineReasons.INVALID_NUMBER.value]
+
+
+@pytest.mark.parametrize('file_name, content, reason', [
+    ('missing.csv', None, QuarantineReasons.UNREADABLE_FILE),
+    ('corrupt.csv.gz', b'no gzip stream', QuarantineReasons.UNREADABLE_FILE),
+    ('columns.csv', b'ISIN,Date,Time\nA,2022-03-15,08:00\n', QuarantineReasons.MISSING_COLUMNS),
+])
+def test_unreadable_files_are_quarantined(tmp_path, file_name, content, reason):
+    """
+    A file that cannot be read with the source columns is quarantined as a single row without values
+    """
+    if content is not None:
+        Path(tmp_path, file_name).write_bytes(content)
+    validated = read_validated_file_dataframe(str(tmp_path / file_name), ',', SRC_COLUMNS, SRC_DTYPES)
+    assert validated.data_frame.empty
+    assert list(validated.data_frame.columns) == SRC_COLUMNS
+    assert validated.quarantine_df[QUARANTINE_FILE_COL].tolist() == [str(tmp_path / file_name)]
+    assert validated.quarantine_df[QUARANTINE_REASON_COL].str.startswith(reason.value).all()
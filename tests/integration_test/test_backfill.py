@@ -0,0 +1,96 @@
+"""
+Integration tests of the batched backfill of get_xtera_data
+"""
+from pathlib import Path
+
+import pandas
+import pytest
+
+import get_xtera_data
+from benchmarks.synthetic_data import generate_source_days
+from configs.etl_config import SRC_COLUMNS, SRC_DTYPES
+from xetra.common.meta_process import MetaProcess
+
+FAILING_DATE = '2022-03-07'
+transform_batch = get_xtera_data.transform_batch
+
+
+def failing_transform_batch(p_data_set_path, p_extract_dates_list, p_batch_dates_list, *args):
+    """
+    transform_batch failing for the batch of FAILING_DATE, defined at module level so the worker processes
+    can unpickle it
+    """
+    if FAILING_DATE in p_batch_dates_list:
+        raise RuntimeError(f'Batch of {FAILING_DATE} failed')
+    return transform_batch(p_data_set_path, p_extract_dates_list, p_batch_dates_list, *args)
+
+
+def run_backfill(tmp_path: Path, output_folder: str, batch_size: int, last_date: str = '2022-03-08'):
+    """
+    Backfills from 2022-03-01 to last_date into the output folder with its own meta file
+    """
+    get_xtera_data.backfill_process(str(tmp_path / 'source'), str(tmp_path / output_folder),
+                                    str(tmp_path / f'{output_folder}.db'), '2022-03-01', last_date, batch_size, 2,
+                                    '%Y-%m-%d', ',', '.csv', 'main_data_', '%Y%m%d', '_closing_price_state.parquet',
+                                    SRC_COLUMNS, SRC_DTYPES)
+
+
+def read_report(tmp_path: Path, output_folder: str) -> pandas.DataFrame:
+    """
+    :return: the written report partitions in date order
+    """
+    return pandas.concat([pandas.read_parquet(path)
+                          for path in sorted((tmp_path / output_folder).glob('main_data_*'))], ignore_index=True)
+
+
+def test_batches_lead_with_the_look_back_date():
+    """
+    Batches hold at most batch size source dates, dates without source are checkpointed with the batch before
+    the next source date and every batch extracts the last source date before it
+    """
+    source_dates = ['2022-02-28', '2022-03-01', '2022-03-02', '2022-03-03', '2022-03-04', '2022-03-07', '2022-03-08']
+    missing_dates = [f'2022-03-{day:02d}' for day in range(1, 9)]
+    assert get_xtera_data.plan_backfill_batches(missing_dates, source_dates, 2) == [
+        (['2022-03-01', '2022-03-02'], ['2022-03-01', '2022-03-02'], ['2022-02-28', '2022-03-01', '2022-03-02']),
+        (['2022-03-03', '2022-03-04', '2022-03-05', '2022-03-06'], ['2022-03-03', '2022-03-04'],
+         ['2022-03-02', '2022-03-03', '2022-03-04']),
+        (['2022-03-07', '2022-03-08'], ['2022-03-07', '2022-03-08'], ['2022-03-04', '2022-03-07', '2022-03-08']),
+    ]
+    assert get_xtera_data.plan_backfill_batches(['2022-03-05', '2022-03-06'], source_dates, 2) == [
+        (['2022-03-05', '2022-03-06'], [], [])]
+    assert get_xtera_data.plan_backfill_batches(missing_dates[:2], source_dates[1:], 5) == [
+        (missing_dates[:2], missing_dates[:2], missing_dates[:2])]
+
+
+def test_batch_boundaries_match_a_single_batch(tmp_path):
+    """
+    The first date of every batch gets its previous closing prices from the look-back date,
+    so small batches write the same report as one batch over all dates
+    """
+    date_strings = generate_source_days(str(tmp_path / 'source'), '2022-03-01', 6, 10, 10)
+    run_backfill(tmp_path, 'batched', 2)
+    run_backfill(tmp_path, 'single', 10)
+    batched_df = read_report(tmp_path, 'batched')
+    assert batched_df['Date'].unique().tolist() == date_strings
+    assert batched_df[batched_df['Date'] > date_strings[0]]['change_prev_closing_%'].notna().all()
+    pandas.testing.assert_frame_equal(read_report(tmp_path, 'single'), batched_df)
+
+
+def test_rerun_resumes_after_a_failed_batch(tmp_path, monkeypatch):
+    """
+    The batches next to a failed one are still checkpointed, a rerun only processes the failed batch
+    """
+    generate_source_days(str(tmp_path / 'source'), '2022-03-01', 6, 10, 10)
+    run_backfill(tmp_path, 'single', 10)
+    monkeypatch.setattr(get_xtera_data, 'transform_batch', failing_transform_batch)
+    with pytest.raises(RuntimeError):
+        run_backfill(tmp_path, 'batched', 2)
+    meta_key = str(tmp_path / 'batched.db')
+    assert MetaProcess.return_missing_dates('2022-03-01', meta_key, '2022-03-08') == ['2022-03-07', '2022-03-08']
+    assert not (tmp_path / 'batched' / 'main_data_20220307.parquet').exists()
+    monkeypatch.setattr(get_xtera_data, 'transform_batch', transform_batch)
+    written_at = (tmp_path / 'batched' / 'main_data_20220301.parquet').stat().st_mtime_ns
+    run_backfill(tmp_path, 'batched', 2)
+    assert (tmp_path / 'batched' / 'main_data_20220301.parquet').stat().st_mtime_ns == written_at
+    assert MetaProcess.return_missing_dates('2022-03-01', meta_key, '2022-03-08') == []
+    pandas.testing.assert_frame_equal(read_report(tmp_path, 'single'), read_report(tmp_path, 'batched'))
@@ -0,0 +1,52 @@
+"""
+Integration tests of the local ETL process of get_xtera_data
+"""
+from pathlib import Path
+
+import pandas
+import pytest
+
+import get_xtera_data
+from benchmarks.synthetic_data import generate_source_days
+from configs.etl_config import SRC_COLUMNS, SRC_DTYPES
+
+
+def run_etl_process(tmp_path: Path, process_dates_list: list) -> pandas.DataFrame:
+    """
+    Runs etl_process over the process dates and returns the written report partitions
+    """
+    get_xtera_data.etl_process(str(tmp_path / 'source'), str(tmp_path / 'output'), str(tmp_path / 'meta.db'),
+                               process_dates_list, process_dates_list[1], '%Y-%m-%d', 0, ',', '.csv',
+                               'main_data_', '%Y%m%d', '_closing_price_state.parquet', SRC_COLUMNS, SRC_DTYPES)
+    return pandas.concat([pandas.read_parquet(path) for path in sorted((tmp_path / 'output').glob('main_data_*'))],
+                         ignore_index=True)
+
+
+def test_rerun_keeps_change_prev_closing(tmp_path, monkeypatch):
+    """
+    A rerun of processed dates extracts the look-back date again, the closing price state already holds
+    the prices of the rerun dates and cannot give the previous closing prices of the first date
+    """
+    monkeypatch.setattr('sys.argv', ['get_xtera_data'])
+    date_strings = generate_source_days(str(tmp_path / 'source'), '2022-03-01', 4, 20, 20)
+    first_df = run_etl_process(tmp_path, date_strings)
+    rerun_df = run_etl_process(tmp_path, date_strings)
+    assert first_df['change_prev_closing_%'].notna().all()
+    pandas.testing.assert_frame_equal(first_df, rerun_df)
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_parallel_extract_matches_serial(tmp_path, use_processes):
+    """
+    extract_all with several workers concatenates the source files in date and file order like the serial read
+    """
+    date_strings = generate_source_days(str(tmp_path), '2022-03-01', 3, 10, 10)
+    serial_df = get_xtera_data.extract_all(tmp_path, ',', '.csv', date_strings, SRC_COLUMNS, SRC_DTYPES)
+    parallel_df = get_xtera_data.extract_all(tmp_path, ',', '.csv', date_strings, SRC_COLUMNS, SRC_DTYPES,
+                                             p_workers=4, p_use_processes=use_processes)
+    files_df = pandas.concat([pandas.read_csv(path, usecols=SRC_COLUMNS, dtype=SRC_DTYPES)
+                              for date_string in date_strings
+                              for path in sorted((tmp_path / date_string).glob('*.csv'))], ignore_index=True)
+    assert len(list(tmp_path.rglob('*.csv'))) > 3 * 4
+    pandas.testing.assert_frame_equal(files_df, serial_df)
+    pandas.testing.assert_frame_equal(serial_df, parallel_df)
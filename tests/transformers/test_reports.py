@@ -0,0 +1,117 @@
+"""
+Tests of the reports of the shared source scan against pandas groupby references
+"""
+import numpy
+import pandas
+import pytest
+
+from benchmarks.bars_benchmark import bars_target_config
+from benchmarks.common import SOURCE_CONFIG
+from benchmarks.reports_benchmark import REPORT_TARGET_CONFIGS
+from benchmarks.synthetic_data import source_day_df, trading_dates
+from xetra.transformers.reports import HourlyVolumeReport, OhlcvBarsReport, VwapReport
+
+SINGLE_TICK_ISIN = 'XS0000000001'
+GAP_ISIN = 'DE0000000000'
+
+
+@pytest.fixture(scope='module')
+def source_df() -> pandas.DataFrame:
+    """
+    Source rows of two days with an ISIN trading once, an ISIN without trades from 10:00 to 10:59,
+    ties in time and a row with a missing value
+    """
+    data_frame = pandas.concat([source_day_df(date_string, 20, 20) for date_string in trading_dates('2022-03-01', 2)],
+                               ignore_index=True)
+    single_tick_df = data_frame.iloc[[len(data_frame) // 2]].assign(ISIN=SINGLE_TICK_ISIN)
+    tied_df = data_frame.iloc[::50].assign(StartPrice=lambda tie_df: tie_df['StartPrice'] + 0.5,
+                                           EndPrice=lambda tie_df: tie_df['EndPrice'] + 0.5)
+    data_frame = pandas.concat([data_frame, single_tick_df, tied_df]).sort_index(kind='stable').reset_index(drop=True)
+    data_frame = data_frame[~((data_frame['ISIN'] == GAP_ISIN) & data_frame['Time'].str.startswith('10:'))]
+    data_frame.loc[data_frame.index[7], 'EndPrice'] = None
+    return data_frame.reset_index(drop=True)
+
+
+def run_report(report, data_frame: pandas.DataFrame, batches: int = 7) -> pandas.DataFrame:
+    """
+    Feeds the source rows to the report in batches, so the partial aggregates are merged
+    """
+    bounds = numpy.linspace(0, len(data_frame), batches + 1).astype(int)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        report.add(data_frame[report.source_columns()].iloc[start:end])
+    return report.result()
+
+
+def valid_rows(report, data_frame: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    :return: the rows without missing values in the columns of the report
+    """
+    return data_frame[data_frame[report.source_columns()].notna().all(axis=1)]
+
+
+def test_vwap_matches_groupby(source_df):
+    """
+    The VWAP is the volume weighted end price per ISIN and date
+    """
+    trg = REPORT_TARGET_CONFIGS['vwap']
+    report = VwapReport(SOURCE_CONFIG, trg)
+    rows_df = valid_rows(report, source_df).assign(price_volume=lambda df: df['EndPrice'] * df['TradedVolume'])
+    reference_df = rows_df.groupby(['ISIN', 'Date'], as_index=False).agg(
+        price_volume=('price_volume', 'sum'), **{trg.trg_col_traded_vol: ('TradedVolume', 'sum')})
+    reference_df[trg.trg_col_vwap] = reference_df['price_volume'] / reference_df[trg.trg_col_traded_vol]
+    reference_df = reference_df[['ISIN', 'Date', trg.trg_col_vwap, trg.trg_col_traded_vol]].round(decimals=2)
+    report_df = run_report(report, source_df)
+    assert report_df[report_df['ISIN'] == SINGLE_TICK_ISIN][trg.trg_col_vwap].tolist() == \
+        source_df[source_df['ISIN'] == SINGLE_TICK_ISIN]['EndPrice'].tolist()
+    pandas.testing.assert_frame_equal(reference_df, report_df, check_dtype=False)
+
+
+def test_hourly_volume_matches_groupby(source_df):
+    """
+    Trades and volume are summed per ISIN, date and hour, hours without trades have no row
+    """
+    trg = REPORT_TARGET_CONFIGS['hourly_volume']
+    report = HourlyVolumeReport(SOURCE_CONFIG, trg)
+    rows_df = valid_rows(report, source_df).assign(**{trg.trg_col_hour: lambda df: df['Time'].str[:2].astype(int)})
+    reference_df = rows_df.groupby(['ISIN', 'Date', trg.trg_col_hour], as_index=False).agg(**{
+        trg.trg_col_trades: ('NumberOfTrades', 'sum'), trg.trg_col_traded_vol: ('TradedVolume', 'sum')})
+    report_df = run_report(report, source_df)
+    assert 10 not in report_df[report_df['ISIN'] == GAP_ISIN][trg.trg_col_hour].tolist()
+    assert len(report_df[report_df['ISIN'] == SINGLE_TICK_ISIN]) == 1
+    pandas.testing.assert_frame_equal(reference_df, report_df, check_dtype=False)
+
+
+@pytest.mark.parametrize('bar_minutes', [5, 60])
+def test_ohlcv_bars_match_groupby(source_df, bar_minutes):
+    """
+    Bars take the first start price and the last end price in time order, on equal times in source order,
+    bars without trades have no row
+    """
+    trg = bars_target_config(bar_minutes)
+    report = OhlcvBarsReport(SOURCE_CONFIG, trg)
+    rows_df = valid_rows(report, source_df)
+    minutes = rows_df['Time'].str[:2].astype(int) * 60 + rows_df['Time'].str[3:5].astype(int)
+    bar_start = minutes // bar_minutes * bar_minutes
+    rows_df = rows_df.assign(**{trg.trg_col_bar_time: (bar_start // 60).map('{:02d}'.format) + ':' +
+                                (bar_start % 60).map('{:02d}'.format)}).sort_values(by=['Time'], kind='stable')
+    reference_df = rows_df.groupby(['ISIN', 'Date', trg.trg_col_bar_time], as_index=False).agg(**{
+        trg.trg_col_open_price: ('StartPrice', 'first'), trg.trg_col_high_price: ('MaxPrice', 'max'),
+        trg.trg_col_low_price: ('MinPrice', 'min'), trg.trg_col_close_price: ('EndPrice', 'last'),
+        trg.trg_col_traded_vol: ('TradedVolume', 'sum')}).round(decimals=2)
+    report_df = run_report(report, source_df)
+    gap_bars = report_df[report_df['ISIN'] == GAP_ISIN][trg.trg_col_bar_time]
+    assert not gap_bars.str.startswith('10:').any()
+    assert len(report_df[report_df['ISIN'] == SINGLE_TICK_ISIN]) == 1
+    pandas.testing.assert_frame_equal(reference_df, report_df, check_dtype=False)
+
+
+def test_reports_of_no_rows_are_empty():
+    """
+    A report without source rows returns an empty data frame with its columns
+    """
+    for report in (VwapReport(SOURCE_CONFIG, REPORT_TARGET_CONFIGS['vwap']),
+                   HourlyVolumeReport(SOURCE_CONFIG, REPORT_TARGET_CONFIGS['hourly_volume']),
+                   OhlcvBarsReport(SOURCE_CONFIG, bars_target_config(5))):
+        report_df = report.result()
+        assert report_df.empty
+        assert report_df.columns[:2].tolist() == ['ISIN', 'Date']
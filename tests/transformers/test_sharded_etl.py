@@ -0,0 +1,49 @@
+"""
+Tests of the ISIN sharded report1
+"""
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import TARGET_CONFIG
+from get_xtera_data import transform_data, transform_data_sharded
+from tests.transformers.test_xetra_transformer import TEST_SOURCE_CONFIG, source_days_df, write_source_days
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.sharded_etl import ShardedXetraETL
+
+
+def run_sharded_report1(source_path: str, target_path: str, date_strings: list, compact: bool) -> pandas.DataFrame:
+    """
+    Runs the sharded report1 on two workers and returns the written partitions
+    """
+    xetra_etl = ShardedXetraETL(FileOperations(source_path), FileOperations(target_path), None,
+                                TEST_SOURCE_CONFIG._replace(src_compact_schema=compact), TARGET_CONFIG,
+                                shard_count=2, max_workers=2)
+    xetra_etl.extract_date_list = date_strings
+    xetra_etl.etl_report1()
+    return pandas.concat([pandas.read_parquet(key) for key in sorted(Path(target_path).rglob('*.parquet'))],
+                         ignore_index=True)
+
+
+def test_compact_schema_with_missing_isin_day(tmp_path):
+    """
+    An ISIN not trading on a day gets no row for that day under the compact schema, as under the plain one
+    """
+    date_strings = write_source_days(str(tmp_path / 'source'), 4, 20, missing_isin_day=1)
+    plain_df = run_sharded_report1(str(tmp_path / 'source'), str(tmp_path / 'plain'), date_strings, False)
+    compact_df = run_sharded_report1(str(tmp_path / 'source'), str(tmp_path / 'compact'), date_strings, True)
+    assert len(plain_df) == 4 * 20 - 1
+    assert compact_df[TARGET_CONFIG.trg_col_op_price].notna().all()
+    # the compact schema publishes the volume as integer
+    pandas.testing.assert_frame_equal(plain_df, compact_df, check_dtype=False)
+
+
+def test_transform_data_sharded_matches_transform_data():
+    """
+    transform_data run by the shard workers gives the report of transform_data on all rows
+    """
+    data_frame = source_days_df(3, 20)
+    expected_df = transform_data(data_frame.copy(), None, None).sort_values(by=['ISIN', 'Date'], ignore_index=True)
+    sharded_df = transform_data_sharded(data_frame, None, None, 3)
+    assert sharded_df['ISIN'].nunique() == 20
+    pandas.testing.assert_frame_equal(expected_df, sharded_df)
@@ -0,0 +1,129 @@
+"""
+Tests of the report1 transformation of XetraETL
+"""
+from pathlib import Path
+
+import pandas
+import pytest
+
+from benchmarks.common import SOURCE_CONFIG, SRC_DTYPES, TARGET_CONFIG
+from benchmarks.synthetic_data import source_day_df, trading_dates
+from get_xtera_data import transform_data
+from xetra.common.compact_schema import compact_source_df
+from xetra.common.constants import MetaProcessFormat, TransformEngines
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import Report1Aggregate, XetraETL
+
+TEST_SOURCE_CONFIG = SOURCE_CONFIG._replace(src_dtypes=SRC_DTYPES)
+
+
+def write_source_days(root_path: str, days: int, isins_count: int, missing_isin_day: int = None) -> list:
+    """
+    Writes hourly source files of synthetic trading days, the first ISIN does not trade on missing_isin_day
+
+    :return: list of the written dates
+    """
+    date_strings = trading_dates('2022-03-01', days)
+    for day, date_string in enumerate(date_strings):
+        data_frame = source_day_df(date_string, isins_count, isins_count)
+        if day == missing_isin_day:
+            data_frame = data_frame[data_frame['ISIN'] != data_frame['ISIN'].min()]
+        date_path = Path(root_path, date_string)
+        date_path.mkdir(parents=True, exist_ok=True)
+        for hour, hour_df in data_frame.groupby(data_frame['Time'].str[:2]):
+            hour_df.to_csv(Path(date_path, f'{date_string}_BINS_XETR{hour}.csv'), index=False)
+    return date_strings
+
+
+def compact_batch(isins: list, date_string: str, categories: list) -> pandas.DataFrame:
+    """
+    :return: compact source batch with one row per ISIN and ISIN categories shared by all batches
+    """
+    src = TEST_SOURCE_CONFIG
+    data_frame = pandas.DataFrame({
+        src.src_col_isin: isins, src.src_col_date: date_string, src.src_col_time: '08:00',
+        src.src_col_start_price: 10.0, src.src_col_min_price: 9.5, src.src_col_max_price: 10.5,
+        src.src_col_traded_vol: 100.0})
+    data_frame = compact_source_df(data_frame, src.src_col_isin, src.src_col_date, src.src_col_time,
+                                   [src.src_col_start_price, src.src_col_min_price, src.src_col_max_price],
+                                   src.src_col_traded_vol, MetaProcessFormat.META_DATE_FORMAT.value)
+    data_frame[src.src_col_isin] = data_frame[src.src_col_isin].cat.set_categories(categories)
+    return data_frame
+
+
+def test_compact_aggregate_skips_missing_isin_days():
+    """
+    Merging compact batches sharing the ISIN categories must not add rows for ISIN-days without trades
+    """
+    aggregate = Report1Aggregate(TEST_SOURCE_CONFIG._replace(src_compact_schema=True), TARGET_CONFIG)
+    for isins, date_string in ((['A', 'B'], '2022-03-01'), (['A'], '2022-03-02'), (['A'], '2022-03-03')):
+        aggregate.add(compact_batch(isins, date_string, ['A', 'B']))
+    report_df = aggregate.result()
+    assert list(zip(report_df[TARGET_CONFIG.trg_col_isin], report_df[TARGET_CONFIG.trg_col_date])) == [
+        ('A', '2022-03-01'), ('A', '2022-03-02'), ('A', '2022-03-03'), ('B', '2022-03-01')]
+    assert report_df[TARGET_CONFIG.trg_col_op_price].notna().all()
+
+
+def source_days_df(days: int, isins_count: int) -> pandas.DataFrame:
+    """
+    Source rows of several synthetic days with rows sharing the trade time of another row of the ISIN-day
+    and rows with missing values, in source order
+    """
+    data_frame = pandas.concat([source_day_df(date_string, isins_count, isins_count)
+                                for date_string in trading_dates('2022-03-01', days)], ignore_index=True)
+    # copies of the first and last trades of every ISIN-day at the same time with other prices
+    first_df = data_frame.groupby(['ISIN', 'Date']).head(1)
+    last_df = data_frame.groupby(['ISIN', 'Date']).tail(1)
+    tied_df = pandas.concat([first_df, last_df]).assign(StartPrice=lambda tie_df: tie_df['StartPrice'] + 0.5)
+    data_frame = pandas.concat([data_frame, tied_df]).sort_index(kind='stable').reset_index(drop=True)
+    data_frame.loc[data_frame.index[::97], 'MinPrice'] = None
+    data_frame.loc[data_frame.index[::89], 'StartPrice'] = None
+    return data_frame[TEST_SOURCE_CONFIG.src_columns]
+
+
+def test_transform_report1_matches_transform_data():
+    """
+    transform_report1 gives the report of the previous transformation get_xtera_data.transform_data
+    """
+    data_frame = source_days_df(4, 30)
+    xetra_etl = XetraETL(None, None, None, TEST_SOURCE_CONFIG, TARGET_CONFIG)
+    report_df = xetra_etl.transform_report1(data_frame.copy())
+    previous_df = transform_data(data_frame.copy(), None, None)
+    previous_df = previous_df.sort_values(by=['ISIN', 'Date']).reset_index(drop=True)
+    assert report_df[TARGET_CONFIG.trg_col_ch_prev_clos].notna().sum() == 3 * 30
+    pandas.testing.assert_frame_equal(previous_df, report_df[previous_df.columns], check_dtype=False)
+
+
+@pytest.fixture(scope='module')
+def source_path(tmp_path_factory) -> str:
+    """
+    Source location with four synthetic days, the first ISIN does not trade on the second day
+    """
+    root_path = str(tmp_path_factory.mktemp('source'))
+    write_source_days(root_path, 4, 30, missing_isin_day=1)
+    return root_path
+
+
+def engine_report(source_path: str, engine: str, compact: bool, memory_budget_mb: int) -> pandas.DataFrame:
+    """
+    :return: report1 of the source days transformed with the engine
+    """
+    src_args = TEST_SOURCE_CONFIG._replace(src_transform_engine=engine, src_compact_schema=compact,
+                                           src_memory_budget_mb=memory_budget_mb)
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, src_args, TARGET_CONFIG)
+    xetra_etl.extract_date_list = trading_dates('2022-03-01', 4)
+    return xetra_etl.transform_report1(xetra_etl.extract())
+
+
+@pytest.mark.parametrize('memory_budget_mb', [0, 1])
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('engine', [engine.value for engine in TransformEngines])
+def test_engines_match_pandas_reference(source_path, engine, compact, memory_budget_mb):
+    """
+    Every engine, schema and memory budget gives the report of the pandas engine on the plain schema
+    """
+    reference_df = engine_report(source_path, TransformEngines.PANDAS.value, False, 0)
+    report_df = engine_report(source_path, engine, compact, memory_budget_mb)
+    assert len(reference_df) == 4 * 30 - 1
+    # the compact schema publishes the volume as integer
+    pandas.testing.assert_frame_equal(reference_df, report_df, check_dtype=not compact)
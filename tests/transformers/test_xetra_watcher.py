@@ -0,0 +1,65 @@
+"""
+Tests of the watch mode of report1
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas
+
+from benchmarks.common import TARGET_CONFIG
+from benchmarks.synthetic_data import source_day_df, trading_dates
+from tests.transformers.test_xetra_transformer import TEST_SOURCE_CONFIG, write_source_days
+from xetra.common.constants import MetaProcessFormat
+from xetra.common.file_operations import FileOperations
+from xetra.common.meta_process import MetaProcess
+from xetra.transformers.xetra_transformer import XetraETL
+from xetra.transformers.xetra_watcher import XetraWatcher
+
+
+def test_backlog_is_worked_off_in_retained_dates_per_poll(tmp_path):
+    """
+    A first start with a backlog of dates takes at most retained_dates dates per poll
+    and writes the report of transform_report1 in the end
+    """
+    source_path, target_path = str(tmp_path / 'source'), str(tmp_path / 'target')
+    date_strings = write_source_days(source_path, 5, 10)
+    src_args = TEST_SOURCE_CONFIG._replace(src_first_extract_date=date_strings[0])
+    watcher = XetraWatcher(FileOperations(source_path), FileOperations(target_path), None, src_args, TARGET_CONFIG,
+                           settle_seconds=0, retained_dates=2)
+    files_per_date = len(FileOperations(source_path).list_files_in_location(date_strings[0]))
+    polled_files = []
+    while True:
+        polled_files.append(watcher.poll())
+        assert len(watcher._aggregates) <= watcher.retained_dates
+        if not polled_files[-1]:
+            break
+    assert polled_files == [2 * files_per_date, 2 * files_per_date, files_per_date, 0]
+    xetra_etl = XetraETL(FileOperations(source_path), None, None, src_args, TARGET_CONFIG)
+    xetra_etl.extract_date_list = trading_dates(date_strings[0], 5)
+    report_df = xetra_etl.transform_report1(xetra_etl.extract())
+    written_df = pandas.concat([pandas.read_parquet(path) for path in sorted(Path(target_path).rglob('*.parquet'))],
+                               ignore_index=True).sort_values(by=['ISIN', 'Date'], ignore_index=True)
+    pandas.testing.assert_frame_equal(report_df, written_df)
+
+
+def test_watch_starts_after_a_meta_covering_today(tmp_path):
+    """
+    A watch started on a meta file that covers today waits for tomorrow instead of the sentinel date
+    of MetaProcess.return_date_list
+    """
+    source_path, target_path = str(tmp_path / 'source'), str(tmp_path / 'target')
+    meta_key = str(tmp_path / 'meta.db')
+    date_format = MetaProcessFormat.META_DATE_FORMAT.value
+    today = datetime.today().date()
+    first_date = (today - timedelta(days=3)).strftime(date_format)
+    MetaProcess.update_meta_file([(today - timedelta(days=day)).strftime(date_format) for day in range(4)], meta_key)
+    for date_string in (first_date, today.strftime(date_format)):
+        Path(source_path, date_string).mkdir(parents=True)
+        source_day_df(date_string, 5, 5).to_csv(Path(source_path, date_string, f'{date_string}_BINS_XETR08.csv'),
+                                                index=False)
+    watcher = XetraWatcher(FileOperations(source_path), FileOperations(target_path), meta_key,
+                           TEST_SOURCE_CONFIG._replace(src_first_extract_date=first_date), TARGET_CONFIG,
+                           settle_seconds=0)
+    assert watcher.watch_date == (today + timedelta(days=1)).strftime(date_format)
+    assert watcher.poll() == 0
+    assert not Path(target_path).exists()
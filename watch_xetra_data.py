@@ -0,0 +1,50 @@
+"""
+Watch mode of the xetra ETL
+
+Stays resident and writes report 1 for every source file as it lands in the dataset folder, e.g.
+
+    python watch_xetra_data.py --first_dt 2022-03-15 --poll_seconds 1
+
+pandas and the ETL modules are imported after the arguments are parsed, so --help answers without them.
+SIGINT and SIGTERM stop the watch after the running poll.
+"""
+import argparse
+import signal
+import threading
+
+from xetra.common.constants import WatchSettings
+
+
+def get_watch_arguments(p_default_date: str):
+    parser = argparse.ArgumentParser(description='Watch the dataset folder and process new source files')
+    parser.add_argument('--first_dt', default=p_default_date, metavar='YYYY-MM-DD',
+                        help='First date to watch if the meta file has no later gap', type=str)
+    parser.add_argument('--poll_seconds', default=WatchSettings.POLL_SECONDS.value,
+                        help='Seconds between listings of the dataset folder', type=float)
+    parser.add_argument('--settle_seconds', default=WatchSettings.SETTLE_SECONDS.value,
+                        help='Seconds a file has to be unchanged before it is read', type=float)
+    return parser.parse_args()
+
+
+def main():
+    default_date = '2022-03-15'
+
+    args = get_watch_arguments(default_date)
+    from configs.etl_config import DATA_SET_PATH, META_FILE_PATH, OUTPUT_FILE_PATH, SOURCE_CONFIG, \
+        SOURCE_INDEX_PATH, TARGET_CONFIG
+    from configs.process_logger import ProcessLog
+    from xetra.common.file_operations import FileOperations
+    from xetra.transformers.xetra_watcher import XetraWatcher
+
+    ProcessLog(OUTPUT_FILE_PATH)
+    watcher = XetraWatcher(FileOperations(DATA_SET_PATH, SOURCE_INDEX_PATH), FileOperations(OUTPUT_FILE_PATH),
+                           META_FILE_PATH, SOURCE_CONFIG._replace(src_first_extract_date=args.first_dt),
+                           TARGET_CONFIG, args.poll_seconds, args.settle_seconds)
+    stop = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: stop.set())
+    watcher.run(stop)
+
+
+if __name__ == '__main__':
+    main()
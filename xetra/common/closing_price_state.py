@@ -0,0 +1,84 @@
+"""
+Carry-over state with the last closing price per ISIN
+
+The state holds one row per ISIN with the date and the closing price of its last traded day.
+The transformation joins the new days against it instead of extracting the previous day again.
+"""
+import logging
+
+import pandas
+
+from xetra.common.constants import FileTypes
+from xetra.common.file_operations import FileOperations
+
+
+class ClosingPriceState:
+    """
+    Persisted last closing price and date per ISIN, indexed by ISIN
+    """
+
+    def __init__(self, file_operations: FileOperations, key: str, isin_col: str, date_col: str, price_col: str):
+        """
+        :param file_operations: connection to the location of the state file
+        :param key: key of the state file
+        :param isin_col: column name for isin
+        :param date_col: column name for date
+        :param price_col: column name for closing price
+        """
+        self._logger = logging.getLogger(__name__)
+        self.file_operations = file_operations
+        self.key = key
+        self.isin_col = isin_col
+        self.date_col = date_col
+        self.price_col = price_col
+
+    def read(self) -> pandas.DataFrame:
+        """
+        :return: state data frame indexed by isin, empty if no state was written yet
+        """
+        try:
+            state_df = self.file_operations.read_parquet_to_df(self.key)
+        except FileNotFoundError:
+            state_df = pandas.DataFrame(columns=[self.isin_col, self.date_col, self.price_col])
+        return state_df.set_index(self.isin_col)
+
+    def previous_closing_price(self, data_frame: pandas.DataFrame, state_df: pandas.DataFrame) -> pandas.Series:
+        """
+        Looks up the carried closing price for every row of a daily aggregate
+        A carried price is only used for a row if it belongs to an earlier date than the row itself
+
+        :param data_frame: daily aggregate with isin and date column
+        :param state_df: state data frame returned by read
+        :return: previous closing price aligned with data_frame, NaN where the state has no earlier price
+        """
+        carried = state_df.reindex(data_frame[self.isin_col])
+        is_earlier = carried[self.date_col].fillna('').to_numpy() < data_frame[self.date_col].to_numpy()
+        return pandas.Series(carried[self.price_col].to_numpy(dtype='float64'),
+                             index=data_frame.index).where(is_earlier)
+
+    def precedes(self, state_df: pandas.DataFrame, date_string: str) -> bool:
+        """
+        Tells whether the state can replace the extraction of the day before date_string,
+        a rerun or a later backfill leaves prices in the state that are not earlier than date_string
+
+        :param state_df: state data frame returned by read
+        :param date_string: first date that is processed
+        :return: True if the state holds prices and all of them belong to dates before date_string
+        """
+        return not state_df.empty and bool((state_df[self.date_col] < date_string).all())
+
+    def update(self, data_frame: pandas.DataFrame):
+        """
+        Merges the last closing price per ISIN of data_frame into the state
+        The state file is replaced atomically, so a failed run leaves the previous state in place
+
+        :param data_frame: daily aggregate with isin, date and closing price column
+        """
+        latest_df = data_frame.sort_values(by=[self.date_col]).groupby(self.isin_col).tail(1)
+        latest_df = latest_df.set_index(self.isin_col)[[self.date_col, self.price_col]]
+        state_df = self.read()
+        if not state_df.empty:
+            latest_df = pandas.concat([state_df, latest_df])
+        state_df = latest_df.sort_values(by=[self.date_col], kind='stable').groupby(level=0).tail(1).sort_index()
+        self.file_operations.write_df_to_location(state_df.reset_index(), self.key, FileTypes.PARQUET.value)
+        self._logger.info('Closing price state updated for %s ISINs', len(state_df))
@@ -0,0 +1,91 @@
+"""
+Compact in-memory representation of Xetra source rows
+
+    ISIN: categorical, the strings are stored once per file and the rows hold small integer codes
+    Date: int32 days since 1970-01-01
+    Time: int16 minutes since midnight
+    prices: float32
+    traded volume: smallest integer type holding the values of the batch
+
+Precision contract for the float32 prices: float32 keeps 24 significant bits, so every price below
+131072 EUR is stored within 0.004 EUR of its value. Rounding a float32 price back to 2 decimals
+therefore gives the exact source price in cents, aggregations only select or compare prices,
+and results are rounded to 2 decimals before they are published.
+
+Integer columns cannot hold missing values, so rows with a missing value in a compacted column are dropped.
+"""
+from typing import List
+
+import numpy
+import pandas
+from pandas.api.types import union_categoricals
+
+EPOCH = pandas.Timestamp('1970-01-01')
+
+
+def compact_source_df(data_frame: pandas.DataFrame, isin_col: str, date_col: str, time_col: str,
+                      price_cols: List, volume_col: str, date_format: str) -> pandas.DataFrame:
+    """
+    Converts a batch of source rows to the compact representation
+
+    Date and time strings repeat across the rows of a file, they are factorized first,
+    so only the distinct values are parsed.
+
+    :param data_frame: batch of source rows with string ISIN, date and time
+    :param isin_col: column name for isin
+    :param date_col: column name for date
+    :param time_col: column name for time in HH:MM
+    :param price_cols: column names of the prices
+    :param volume_col: column name for traded volume
+    :param date_format: format of the date strings
+    :return: compact data frame with the same columns
+    """
+    compact_cols = [isin_col, date_col, time_col, volume_col] + list(price_cols)
+    data_frame = data_frame[data_frame[compact_cols].notna().all(axis=1)]
+    compact_df = {}
+    for column in data_frame.columns:
+        values = data_frame[column]
+        if column == isin_col:
+            compact_df[column] = values.astype('category')
+        elif column == date_col:
+            codes, uniques = pandas.factorize(values)
+            days = (pandas.to_datetime(uniques, format=date_format) - EPOCH).days.to_numpy(dtype='int32')
+            compact_df[column] = days.take(codes) if len(codes) else codes.astype('int32')
+        elif column == time_col:
+            codes, uniques = pandas.factorize(values)
+            uniques = pandas.Index(uniques, dtype=object)
+            minutes = (uniques.str[:2].astype('int16') * 60 + uniques.str[3:5].astype('int16')).to_numpy()
+            compact_df[column] = minutes.astype('int16').take(codes) if len(codes) else codes.astype('int16')
+        elif column in price_cols:
+            compact_df[column] = values.to_numpy(dtype='float32')
+        elif column == volume_col:
+            compact_df[column] = pandas.to_numeric(values.astype('int64'), downcast='integer').to_numpy()
+        else:
+            compact_df[column] = values.to_numpy()
+    return pandas.DataFrame(compact_df, index=data_frame.index)
+
+
+def concat_compact_dfs(data_frames: List, isin_col: str) -> pandas.DataFrame:
+    """
+    Concatenates compact batches, the ISIN categories of the batches are unioned,
+    a plain concat would fall back to object strings for differing categories
+
+    :param data_frames: compact data frames
+    :param isin_col: column name for isin
+    :return: concatenated compact data frame
+    """
+    isin_values = union_categoricals([data_frame[isin_col] for data_frame in data_frames], ignore_order=True)
+    data_frame = pandas.concat([data_frame.drop(columns=[isin_col]) for data_frame in data_frames],
+                               ignore_index=True)
+    data_frame[isin_col] = isin_values
+    return data_frame[data_frames[0].columns]
+
+
+def expand_date_values(days: pandas.Series, date_format: str) -> pandas.Series:
+    """
+    :param days: int32 days since 1970-01-01
+    :param date_format: format of the returned date strings
+    :return: date strings
+    """
+    return pandas.Series(pandas.to_datetime(numpy.asarray(days, dtype='int64'), unit='D').strftime(date_format),
+                         index=days.index)
@@ -0,0 +1,158 @@
+"""
+Streaming decompression of compressed source csv files
+
+Source files ending in .csv.gz or .csv.zst are decompressed with the codecs of pyarrow, which release the GIL,
+by a background thread while pandas parses the blocks the thread already handed over. The thread reads ahead
+a bounded number of blocks, so the decompressed text is never held in memory as a whole.
+"""
+import io
+import queue
+import threading
+from typing import List, Union
+
+import pandas
+import pyarrow
+
+from xetra.common.constants import ExtractSettings, FileTypes
+
+# pyarrow codec per compressed source file type
+SOURCE_COMPRESSIONS = {
+    FileTypes.CSV_GZ.value: 'gzip',
+    FileTypes.CSV_ZST.value: 'zstd'
+}
+
+
+def source_compression(key: str) -> str:
+    """
+    :param key: key or path of a source file
+    :return: pyarrow codec of a compressed source file, None for plain csv files
+    """
+    for file_type, compression in SOURCE_COMPRESSIONS.items():
+        if str(key).endswith(file_type):
+            return compression
+    return None
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Binary file object returning the decompressed content of a file or an in-memory object,
+    the decompression runs in a background thread ahead of the reads
+    """
+
+    def __init__(self, source: Union[str, bytes], compression: str,
+                 block_bytes: int = ExtractSettings.DECOMPRESS_BLOCK_BYTES.value,
+                 queue_blocks: int = ExtractSettings.DECOMPRESS_QUEUE_BLOCKS.value):
+        """
+        :param source: path of the compressed file or its content
+        :param compression: pyarrow codec, a value of SOURCE_COMPRESSIONS
+        :param block_bytes: size of the decompressed blocks handed over to the reader
+        :param queue_blocks: decompressed blocks the thread reads ahead
+        """
+        super().__init__()
+        self._blocks = queue.Queue(maxsize=queue_blocks)
+        self._stop = threading.Event()
+        self._block = memoryview(b'')
+        self._finished = False
+        self._thread = threading.Thread(target=self._decompress, args=(source, compression, block_bytes),
+                                        daemon=True)
+        self._thread.start()
+
+    def _decompress(self, source: Union[str, bytes], compression: str, block_bytes: int):
+        """
+        Puts the decompressed blocks into the queue, followed by None at the end or the error of a failed read
+        """
+        try:
+            stream_source = pyarrow.py_buffer(source) if isinstance(source, bytes) else source
+            with pyarrow.input_stream(stream_source, compression=compression) as stream:
+                while not self._stop.is_set():
+                    block = stream.read(block_bytes)
+                    if not block:
+                        break
+                    self._put(block)
+            self._put(None)
+        except Exception as error:
+            self._put(error)
+
+    def _put(self, item):
+        """
+        Waits for room in the queue until the reader is closed
+        """
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._block:
+            if self._finished:
+                return 0
+            item = self._blocks.get()
+            if item is None or isinstance(item, Exception):
+                self._finished = True
+                if item is not None:
+                    raise item
+                return 0
+            self._block = memoryview(item)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+    def close(self):
+        # a reader closed before the end releases the thread waiting for room in the queue
+        self._stop.set()
+        super().close()
+
+
+class _StreamChunks:
+    """
+    Iterator of data frames with chunksize rows over a decompressing reader,
+    usable as context manager like the reader of pandas.read_csv, the reader is closed on exit
+    """
+
+    def __init__(self, csv_reader, source_reader: DecompressingReader):
+        self._csv_reader = csv_reader
+        self._source_reader = source_reader
+
+    def __iter__(self):
+        try:
+            yield from self._csv_reader
+        finally:
+            self.close()
+
+    def close(self):
+        self._csv_reader.close()
+        self._source_reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def read_compressed_csv(source: Union[str, bytes], compression: str, delimiter: str = ',', columns: List = None,
+                        dtypes: dict = None, chunksize: int = None):
+    """
+    Reading a compressed csv file into a data frame with streaming decompression
+
+    :param source: path of the compressed file or its content
+    :param compression: pyarrow codec, a value of SOURCE_COMPRESSIONS
+    :param delimiter: delimiter of the csv file
+    :param columns: columns that should be read, all columns if None
+    :param dtypes: fixed dtypes per column, inferred if None
+    :param chunksize: if set, an iterator of data frames with chunksize rows is returned
+    :return: pandas DataFrame or iterator of data frames
+    """
+    source_reader = DecompressingReader(source, compression)
+    if chunksize is None:
+        with source_reader:
+            return pandas.read_csv(source_reader, delimiter=delimiter, usecols=columns, dtype=dtypes)
+    return _StreamChunks(pandas.read_csv(source_reader, delimiter=delimiter, usecols=columns, dtype=dtypes,
+                                         chunksize=chunksize), source_reader)
@@ -10,6 +10,22 @@ class FileTypes(Enum):
     """
     CSV = 'csv'
     PARQUET = 'parquet'
+    # compressed source files, decompressed while they are parsed
+    CSV_GZ = 'csv.gz'
+    CSV_ZST = 'csv.zst'
+
+
+class ParquetCodecs(Enum):
+    """
+    compression codecs of the parquet files written to a location
+    """
+    NONE = 'none'
+    # pyarrow default, fast with moderate ratio
+    SNAPPY = 'snappy'
+    LZ4 = 'lz4'
+    ZSTD = 'zstd'
+    GZIP = 'gzip'
+    BROTLI = 'brotli'
 
 
 class MetaProcessFormat(Enum):
@@ -20,7 +36,103 @@ class MetaProcessFormat(Enum):
     META_PROCESS_FORMAT = '%Y-%m-%d %H:%M:%S'
     META_SOURCE_DATE_COL = 'source_date'
     META_PROCESS_COL = 'datetime_of_processing'
-    META_FILE_FORMAT = 'csv'
+    META_FILE_FORMAT = 'sqlite'
+    META_TABLE = 'meta'
+    META_RANGES_TABLE = 'meta_ranges'
+
+
+class ExtractSettings(Enum):
+    """
+    settings for the extraction of source files
+    """
+    # estimated memory of one parsed source row, used to derive the chunk size from the memory budget
+    ROW_BYTES_ESTIMATE = 256
+    MIN_CHUNK_ROWS = 10000
+    # extensions of the source files picked up by the listings
+    SOURCE_FILE_TYPES = (FileTypes.CSV.value, FileTypes.CSV_GZ.value, FileTypes.CSV_ZST.value)
+    # decompressed blocks of compressed source files and the number of blocks read ahead of the parser
+    DECOMPRESS_BLOCK_BYTES = 1024 ** 2
+    DECOMPRESS_QUEUE_BLOCKS = 8
+
+
+class TransformEngines(Enum):
+    """
+    engines aggregating the source rows of report1
+    """
+    # reference implementation
+    PANDAS = 'pandas'
+    # pyarrow compute, hash aggregations run multi-threaded
+    ARROW = 'arrow'
+
+
+class QuerySettings(Enum):
+    """
+    settings for the queries over the report output
+    """
+    # query results kept in the LRU cache of a ReportQuery
+    RESULT_CACHE_SIZE = 128
+    # parquet footers kept in the LRU cache of a ReportQuery
+    METADATA_CACHE_SIZE = 1024
+    # rows per row group of the clustered files and of partitions written for queries,
+    # small row groups let an ISIN lookup skip more
+    ROW_GROUP_ROWS = 2000
+
+
+class PipelineSettings(Enum):
+    """
+    settings for the pipelined extract, transform and load of XetraETL
+    """
+    # source batches read ahead of the transformation, one batch is a file or a chunk of a file
+    EXTRACT_QUEUE_SIZE = 8
+    # transformed dates waiting to be written
+    LOAD_QUEUE_SIZE = 2
+    # interval in which a blocked stage checks whether the pipeline was stopped
+    POLL_SECONDS = 0.1
 
 
-print(FileTypes.CSV)
+class WatchSettings(Enum):
+    """
+    settings for the long-running XetraWatcher
+    """
+    # interval in which the source location is listed for new files
+    POLL_SECONDS = 1.0
+    # files are only read once they were not modified for this long, so half written files are skipped,
+    # longer than a poll interval, a file still growing at one poll is seen unchanged at the next one
+    SETTLE_SECONDS = 1.5
+    # most recent source dates whose aggregates are kept in memory for late files
+    RETAINED_DATES = 2
+
+
+class WriteSettings(Enum):
+    """
+    settings for the data frames written to a location
+    """
+    PARQUET_CODEC = ParquetCodecs.SNAPPY.value
+    # part size of the multipart uploads to S3, bodies up to this size are uploaded with a single request,
+    # S3 requires at least 5 MB for every part but the last
+    MULTIPART_PART_BYTES = 8 * 1024 ** 2
+
+
+class RollingSettings(Enum):
+    """
+    windows of the rolling analytics per ISIN, counted in trading days of the ISIN
+    """
+    # moving averages of the closing price
+    MA_WINDOWS = (20, 50)
+    # standard deviation of the daily returns of the closing price
+    VOLATILITY_WINDOW = 20
+    # highest and lowest price of the last 52 weeks
+    HIGH_LOW_WINDOW = 252
+
+
+class QuarantineReasons(Enum):
+    """
+    reasons of the source rows and files set aside by the validation of the extract
+    """
+    UNREADABLE_FILE = 'unreadable file'
+    MISSING_COLUMNS = 'missing columns'
+    MISSING_VALUE = 'missing value'
+    INVALID_NUMBER = 'invalid number'
+    PRICE_RANGE = 'start price outside min and max price'
+    NEGATIVE_VOLUME = 'negative traded volume'
+    DUPLICATE_ROW = 'duplicate isin, date and time'
@@ -1,3 +1,9 @@
 """
 Custom Exceptions
-"""
\ No newline at end of file
+"""
+
+
+class WrongFormatException(Exception):
+    """
+    Raised when a file format is not supported by the process
+    """
@@ -4,13 +4,87 @@ S3 bucket methods can also be implemented
 FileOperations class is similar to S3BucketConnector class in the course
 
 Instance Variables:
+    file_path: root folder of the location, all keys are relative to it
+    bytes_read: number of bytes of the files read so far
+    bytes_written: number of bytes of the files written so far
+    index_path: path of the persisted folder index, folders are listed by globbing if None
+    source_cache: SourceCache the csv reads go through, csv files are parsed on every read if None
 
 Instance Methods:
-""" 
+    list_files_in_location: lists the keys of the files in the folders matching a prefix
+    list_files_in_date_range: lists the keys of the files in the date folders of a date range
+    list_source_dates: lists the dates of a date range that have a source folder
+    file_age_seconds: seconds since a file was last modified
+    read_csv_to_df: reads a csv key of the location into a data frame or chunks of it
+    read_parquet_to_df: reads a parquet key of the location into a data frame
+    write_df_to_location: writes a data frame atomically to a key of the location with the given codec
+    write_json_to_location: writes a dictionary as json atomically to a key of the location
+    read_json_from_location: reads a json key of the location into a dictionary
+    write_arrays_to_location: writes NumPy arrays as npz atomically to a key of the location
+    read_arrays_from_location: reads the NumPy arrays of a npz key of the location
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import numpy
 import pandas
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List
-from configs.process_logger import ProcessLog
+from xetra.common.compressed_source import DecompressingReader, read_compressed_csv, source_compression
+from xetra.common.constants import ExtractSettings, FileTypes, MetaProcessFormat, ParquetCodecs, WriteSettings
+from xetra.common.custom_exceptions import WrongFormatException
+from xetra.common.source_cache import SourceCache
+
+
+def folders_by_date(folders) -> dict:
+    """
+    Maps the date at the end of every folder name to the folders, shared by the local and the S3 locations
+
+    :param folders: folder names of the location
+    :return: folder names per date at the end of the name, folders not ending with a date are left out
+    """
+    date_format = MetaProcessFormat.META_DATE_FORMAT.value
+    date_length = len(datetime.today().strftime(date_format))
+    date_folders = {}
+    for folder in folders:
+        try:
+            datetime.strptime(folder[-date_length:], date_format)
+        except ValueError:
+            continue
+        date_folders.setdefault(folder[-date_length:], []).append(folder)
+    return date_folders
+
+
+def write_df(data_frame: pandas.DataFrame, path_or_buffer, file_format: str, row_group_rows: int = None,
+             compression: str = WriteSettings.PARQUET_CODEC.value, dictionary_cols: List = None):
+    """
+    Writes a data frame to a path or an in-memory buffer, shared by the local and the S3 locations
+
+    :param data_frame: pandas DataFrame that should be written
+    :param path_or_buffer: path or binary buffer the file is written to
+    :param file_format: format of the written file
+    :param row_group_rows: maximum rows per parquet row group, the pyarrow default if None
+    :param compression: codec of the parquet file, a value of ParquetCodecs
+    :param dictionary_cols: columns of the parquet file that are dictionary encoded, all columns if None.
+        Repetitive columns like ISIN and date shrink to small integer codes, for prices and volumes
+        the dictionary is built for nothing and pyarrow falls back to plain encoding
+    """
+    if file_format == FileTypes.PARQUET.value:
+        if compression not in {codec.value for codec in ParquetCodecs}:
+            logging.getLogger(__name__).info('The parquet codec %s is not supported!', compression)
+            raise WrongFormatException
+        data_frame.to_parquet(path=path_or_buffer, index=False, row_group_size=row_group_rows,
+                              compression=compression, use_dictionary=True if dictionary_cols is None
+                              else list(dictionary_cols))
+    elif file_format == FileTypes.CSV.value:
+        data_frame.to_csv(path_or_buf=path_or_buffer, index=False)
+    else:
+        logging.getLogger(__name__).info('The file format %s is not supported to be written!', file_format)
+        raise WrongFormatException
 
 
 class FileOperations:
@@ -18,17 +92,280 @@ class FileOperations:
     To interact with files on local folders
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, index_path: str = None, source_cache: SourceCache = None):
         """
         :param file_path: Local file path
+        :param index_path: path of the folder index file, it has to be outside of file_path,
+            as writing it would change the modification time of the location
+        :param source_cache: cache of parsed csv files, keyed by path, size and modification time
         """
+        self._logger = logging.getLogger(__name__)
         self.file_path = file_path
+        self.index_path = index_path
+        self.source_cache = source_cache
+        self._index = None
+        self._index_changed = False
+        self._date_folders = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._bytes_lock = threading.Lock()
+
+    def __getstate__(self):
+        # locations are passed to the shard workers, locks and loggers are created again in the worker
+        state = self.__dict__.copy()
+        del state['_bytes_lock'], state['_logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bytes_lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    def list_files_in_location(self, prefix: str, file_extension=ExtractSettings.SOURCE_FILE_TYPES.value) -> List:
+        """
+        Listing all files in the folders of the location matching the prefix
+        With an index_path the folders are looked up in the index instead of globbing the location
+
+        :param prefix: part of the folder name, e.g. the date of a source folder
+        :param file_extension: extension or tuple of extensions of the files that should be listed,
+            plain and compressed source files by default
+        :return: sorted list of keys relative to the location
+        """
+        if self.index_path is None:
+            files = [path.relative_to(self.file_path).as_posix()
+                     for path in Path(self.file_path).glob(f'*{prefix}/*') if path.name.endswith(file_extension)]
+            return sorted(files)
+        self._refresh_index()
+        if prefix in folders_by_date([prefix]):
+            # a date without a folder, e.g. a weekend, has no files, only other prefixes are matched by name
+            folders = self._date_folders.get(prefix, [])
+        else:
+            folders = [folder for folder in self._index['folders'] if folder.endswith(prefix)]
+        files = [f'{folder}/{name}' for folder in folders for name in self._indexed_files(folder)
+                 if name.endswith(file_extension)]
+        self._save_index()
+        return sorted(files)
+
+    def list_files_in_date_range(self, start_date: str, end_date: str,
+                                 file_extension=ExtractSettings.SOURCE_FILE_TYPES.value) -> List:
+        """
+        Listing all files in the date folders from start_date to end_date
+
+        :param start_date: first date in META_DATE_FORMAT
+        :param end_date: last date in META_DATE_FORMAT
+        :param file_extension: extension or tuple of extensions of the files that should be listed
+        :return: list of keys ordered by date
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        first_date = datetime.strptime(start_date, date_format).date()
+        last_date = datetime.strptime(end_date, date_format).date()
+        return [key for day in range((last_date - first_date).days + 1)
+                for key in self.list_files_in_location((first_date + timedelta(days=day)).strftime(date_format),
+                                                       file_extension)]
+
+    def list_source_dates(self, start_date: str, end_date: str) -> List:
+        """
+        Listing the dates from start_date to end_date that have a source folder
+        The folders of the location are listed once, so dates without a folder like weekends and holidays
+        are skipped without looking for their files
+
+        :param start_date: first date in META_DATE_FORMAT
+        :param end_date: last date in META_DATE_FORMAT
+        :return: sorted list of dates in META_DATE_FORMAT
+        """
+        if self.index_path is None:
+            date_folders = folders_by_date(path.name for path in Path(self.file_path).iterdir() if path.is_dir())
+        else:
+            self._refresh_index()
+            self._save_index()
+            date_folders = self._date_folders
+        return sorted(date_string for date_string in date_folders if start_date <= date_string <= end_date)
+
+    def file_age_seconds(self, key: str) -> float:
+        """
+        :param key: key of the file relative to the location
+        :return: seconds since the file was last modified
+        """
+        return time.time() - Path(self.file_path, key).stat().st_mtime
 
-    def list_files_in_location(self):
-        pass
+    def _count_bytes(self, read: int = 0, written: int = 0):
+        """
+        Adds to the byte counters, reads may run in several threads
+        """
+        with self._bytes_lock:
+            self.bytes_read += read
+            self.bytes_written += written
 
-    def read_csv_to_df(self):
-        pass
+    def _refresh_index(self):
+        """
+        Loads the index and rescans the folder names of the location if its modification time changed
+        """
+        if self._index is None:
+            try:
+                self._index = self.read_json_from_location(self.index_path)
+            except FileNotFoundError:
+                self._index = {'mtime_ns': None, 'folders': {}}
+            self._map_date_folders()
+        mtime_ns = Path(self.file_path).stat().st_mtime_ns
+        if mtime_ns == self._index['mtime_ns']:
+            return
+        folder_names = {path.name for path in Path(self.file_path).iterdir() if path.is_dir()}
+        folders = self._index['folders']
+        self._index['folders'] = {name: folders.get(name, {'mtime_ns': None, 'files': []})
+                                  for name in sorted(folder_names)}
+        self._index['mtime_ns'] = mtime_ns
+        self._index_changed = True
+        self._map_date_folders()
 
-    def write_df_to_location(self):
-        pass
+    def _map_date_folders(self):
+        """
+        Maps the date at the end of every indexed folder name to the folder
+        """
+        self._date_folders = folders_by_date(self._index['folders'])
+
+    def _indexed_files(self, folder: str) -> List:
+        """
+        Returns the file names of an indexed folder, rescanning it if its modification time changed
+        """
+        entry = self._index['folders'][folder]
+        mtime_ns = Path(self.file_path, folder).stat().st_mtime_ns
+        if mtime_ns != entry['mtime_ns']:
+            entry['files'] = sorted(path.name for path in Path(self.file_path, folder).iterdir() if path.is_file())
+            entry['mtime_ns'] = mtime_ns
+            self._index_changed = True
+        return entry['files']
+
+    def _save_index(self):
+        """
+        Persists the index if it changed since it was loaded
+        """
+        if self._index_changed:
+            self.write_json_to_location(self._index, self.index_path)
+            self._index_changed = False
+
+    def read_csv_to_df(self, key: str, delimiter: str = ',', columns: List = None, dtypes: dict = None,
+                       chunksize: int = None):
+        """
+        Reading a csv file of the location into a data frame
+        Files ending in .csv.gz or .csv.zst are decompressed while they are parsed
+
+        :param key: key of the file relative to the location
+        :param delimiter: delimiter of the csv file
+        :param columns: columns that should be read, all columns if None
+        :param dtypes: fixed dtypes per column, inferred if None
+        :param chunksize: if set, an iterator of data frames with chunksize rows is returned
+        :return: pandas DataFrame or iterator of data frames
+        """
+        self._logger.info('Reading file %s/%s', self.file_path, key)
+        path = Path(self.file_path, key)
+        compression = source_compression(key)
+        if self.source_cache is not None:
+            def load_source():
+                self._count_bytes(read=path.stat().st_size)
+                return path if compression is None else DecompressingReader(str(path), compression)
+            return self.source_cache.read_csv_to_df(SourceCache.file_source_id(path), load_source, delimiter,
+                                                    columns, dtypes, chunksize)
+        self._count_bytes(read=path.stat().st_size)
+        if compression is not None:
+            return read_compressed_csv(str(path), compression, delimiter, columns, dtypes, chunksize)
+        return pandas.read_csv(filepath_or_buffer=path, delimiter=delimiter, usecols=columns,
+                               dtype=dtypes, chunksize=chunksize)
+
+    def read_parquet_to_df(self, key: str, columns: List = None) -> pandas.DataFrame:
+        """
+        Reading a parquet file of the location into a data frame
+
+        :param key: key of the file relative to the location
+        :param columns: columns that should be read, all columns if None
+        :return: pandas DataFrame with the file content
+        """
+        self._logger.info('Reading file %s/%s', self.file_path, key)
+        self._count_bytes(read=Path(self.file_path, key).stat().st_size)
+        return pandas.read_parquet(path=Path(self.file_path, key), columns=columns)
+
+    def write_df_to_location(self, data_frame: pandas.DataFrame, key: str, file_format: str,
+                             row_group_rows: int = None, compression: str = WriteSettings.PARQUET_CODEC.value,
+                             dictionary_cols: List = None):
+        """
+        Writing a pandas DataFrame to the location
+        The file is written to a temporary file next to the key and renamed,
+        so readers never see a partially written file and a crash leaves the previous file in place
+
+        :param data_frame: pandas DataFrame that should be written
+        :param key: target key of the saved file relative to the location
+        :param file_format: format of the saved file
+        :param row_group_rows: maximum rows per parquet row group, the pyarrow default if None
+        :param compression: codec of a parquet file, a value of ParquetCodecs
+        :param dictionary_cols: columns of a parquet file that are dictionary encoded, all columns if None
+        :return: path of the written file
+        """
+        if file_format not in (FileTypes.PARQUET.value, FileTypes.CSV.value):
+            self._logger.info('The file format %s is not supported to be written to %s', file_format, key)
+            raise WrongFormatException
+        self._logger.info('Writing file to %s/%s', self.file_path, key)
+        return self._atomic_write(key, lambda path: write_df(data_frame, path, file_format, row_group_rows,
+                                                             compression, dictionary_cols))
+
+    def write_json_to_location(self, content: dict, key: str):
+        """
+        Writing a dictionary as json to the location with the same temporary file and rename as data frames
+
+        :param content: json serializable dictionary
+        :param key: target key of the saved file relative to the location
+        :return: path of the written file
+        """
+        def writer(path):
+            with open(path, 'w') as json_handler:
+                json.dump(content, json_handler, indent=2)
+        return self._atomic_write(key, writer)
+
+    def read_json_from_location(self, key: str) -> dict:
+        """
+        Reading a json key of the location
+
+        :param key: key of the file relative to the location
+        :return: dictionary with the file content
+        """
+        with open(Path(self.file_path, key), 'r') as json_handler:
+            return json.load(json_handler)
+
+    def write_arrays_to_location(self, arrays: dict, key: str):
+        """
+        Writing NumPy arrays as uncompressed npz to the location with the same temporary file and rename
+
+        :param arrays: arrays by name, string arrays have to be fixed width, object arrays are not written
+        :param key: target key of the saved file relative to the location
+        :return: path of the written file
+        """
+        def writer(path):
+            with open(path, 'wb') as npz_handler:
+                numpy.savez(npz_handler, **arrays)
+        return self._atomic_write(key, writer)
+
+    def read_arrays_from_location(self, key: str) -> dict:
+        """
+        Reading the NumPy arrays of a npz key of the location
+
+        :param key: key of the file relative to the location
+        :return: arrays by name
+        """
+        path = Path(self.file_path, key)
+        self._count_bytes(read=path.stat().st_size)
+        with numpy.load(path, allow_pickle=False) as npz_file:
+            return {name: npz_file[name] for name in npz_file.files}
+
+    def _atomic_write(self, key: str, writer) -> Path:
+        """
+        Calls writer with a temporary path in the target folder and renames the result to the key
+        """
+        target_path = Path(self.file_path, key)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = Path(target_path.parent, f'.{target_path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            writer(temp_path)
+            self._count_bytes(written=temp_path.stat().st_size)
+            os.replace(temp_path, target_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return target_path
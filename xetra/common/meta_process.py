@@ -1,17 +1,167 @@
 """
-Methods to process meta file for process control meta_file.csv
+Methods to process meta file for process control
+
+The meta file is a SQLite database with two tables:
+    meta: append-only log of processed source dates, indexed on source_date
+    meta_ranges: maximal ranges of consecutive processed source dates, keyed by their first date
+The ranges are maintained on every append, so finding the first missing date is one index lookup
+regardless of the length of the processed history.
 """
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from xetra.common.constants import MetaProcessFormat
 
 
 class MetaProcess:
     """
-    Class to process meta file for process control meta_file.csv
+    Class to process meta file for process control
     """
+
     @staticmethod
-    def update_meta_file():
-        pass
+    def _connect(meta_key: str) -> sqlite3.Connection:
+        """
+        Opens the meta database in WAL mode, so readers are not blocked by a running update
+
+        :param meta_key: path of the meta database
+        :return: connection with the meta tables created
+        """
+        connection = sqlite3.connect(meta_key, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {MetaProcessFormat.META_TABLE.value} ('
+                           f'{MetaProcessFormat.META_SOURCE_DATE_COL.value} TEXT NOT NULL, '
+                           f'{MetaProcessFormat.META_PROCESS_COL.value} TEXT NOT NULL)')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {MetaProcessFormat.META_TABLE.value}_source_date_idx '
+                           f'ON {MetaProcessFormat.META_TABLE.value} ({MetaProcessFormat.META_SOURCE_DATE_COL.value})')
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {MetaProcessFormat.META_RANGES_TABLE.value} ('
+                           'range_start TEXT PRIMARY KEY, range_end TEXT NOT NULL)')
+        return connection
+
+    @staticmethod
+    def _range_at(connection: sqlite3.Connection, date_string: str) -> Tuple:
+        """
+        :return: (range_start, range_end) of the last range starting on or before date_string, None if there is none
+        """
+        return connection.execute(f'SELECT range_start, range_end FROM {MetaProcessFormat.META_RANGES_TABLE.value} '
+                                  'WHERE range_start <= ? ORDER BY range_start DESC LIMIT 1',
+                                  (date_string,)).fetchone()
+
+    @staticmethod
+    def update_meta_file(extract_date_list: List, meta_key: str):
+        """
+        Appending the processed dates to the meta file in one transaction
+
+        :param extract_date_list: list of dates that are extracted from the source
+        :param meta_key: path of the meta database
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        processed_at = datetime.today().strftime(MetaProcessFormat.META_PROCESS_FORMAT.value)
+        ranges_table = MetaProcessFormat.META_RANGES_TABLE.value
+        with closing(MetaProcess._connect(meta_key)) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.executemany(f'INSERT INTO {MetaProcessFormat.META_TABLE.value} VALUES (?, ?)',
+                                       [(date_string, processed_at) for date_string in extract_date_list])
+                for date_string in sorted(set(extract_date_list)):
+                    current_date = datetime.strptime(date_string, date_format).date()
+                    range_start, range_end = date_string, date_string
+                    previous_range = MetaProcess._range_at(connection, date_string)
+                    if previous_range is not None and previous_range[1] >= date_string:
+                        continue
+                    if previous_range is not None and \
+                            previous_range[1] == (current_date - timedelta(days=1)).strftime(date_format):
+                        range_start = previous_range[0]
+                    next_range = connection.execute(
+                        f'SELECT range_start, range_end FROM {ranges_table} WHERE range_start = ?',
+                        ((current_date + timedelta(days=1)).strftime(date_format),)).fetchone()
+                    if next_range is not None:
+                        range_end = next_range[1]
+                        connection.execute(f'DELETE FROM {ranges_table} WHERE range_start = ?', (next_range[0],))
+                    connection.execute(f'INSERT OR REPLACE INTO {ranges_table} VALUES (?, ?)', (range_start, range_end))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def return_date_list(first_date: str, meta_key: str) -> Tuple:
+        """
+        Creating a list of dates based on the input first_date and the already processed dates in the meta file
+
+        :param first_date: the earliest date Xetra data should be processed
+        :param meta_key: path of the meta database
+        :return:
+            min_date: first date that should be processed
+            return_date_list: list of all dates from min_date - 1 day till today
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        today = datetime.today().date()
+        first_missing = datetime.strptime(MetaProcess.first_missing_date(first_date, meta_key), date_format).date()
+        if first_missing > today:
+            return datetime(2200, 1, 1).date().strftime(date_format), []
+        min_date = first_missing - timedelta(days=1)
+        return_dates = [(min_date + timedelta(days=day)).strftime(date_format)
+                        for day in range((today - min_date).days + 1)]
+        return first_missing.strftime(date_format), return_dates
+
+    @staticmethod
+    def first_missing_date(first_date: str, meta_key: str) -> str:
+        """
+        :param first_date: the earliest date Xetra data should be processed
+        :param meta_key: path of the meta database
+        :return: first_date or the day after the processed range covering it, may lie after today
+        """
+        with closing(MetaProcess._connect(meta_key)) as connection:
+            covering_range = MetaProcess._range_at(connection, first_date)
+        if covering_range is None or covering_range[1] < first_date:
+            return first_date
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        return (datetime.strptime(covering_range[1], date_format).date() + timedelta(days=1)).strftime(date_format)
+
+    @staticmethod
+    def return_missing_dates(first_date: str, meta_key: str, last_date: str = None) -> List:
+        """
+        Creating a list of the dates from first_date to last_date that are not in the meta file,
+        unlike return_date_list it also finds the gaps after the first processed range
+
+        :param first_date: the earliest date Xetra data should be processed
+        :param meta_key: path of the meta database
+        :param last_date: the latest date Xetra data should be processed, today if None
+        :return: list of the missing dates in META_DATE_FORMAT
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        start = datetime.strptime(first_date, date_format).date()
+        end = datetime.today().date() if last_date is None else datetime.strptime(last_date, date_format).date()
+        ranges_table = MetaProcessFormat.META_RANGES_TABLE.value
+        with closing(MetaProcess._connect(meta_key)) as connection:
+            ranges = connection.execute(f'SELECT range_start, range_end FROM {ranges_table} '
+                                        'WHERE range_end >= ? AND range_start <= ? ORDER BY range_start',
+                                        (first_date, end.strftime(date_format))).fetchall()
+        missing_dates = []
+        current_date = start
+        for range_start, range_end in ranges + [(None, None)]:
+            gap_end = end if range_start is None else \
+                min(end, datetime.strptime(range_start, date_format).date() - timedelta(days=1))
+            missing_dates += [(current_date + timedelta(days=day)).strftime(date_format)
+                              for day in range((gap_end - current_date).days + 1)]
+            if range_end is not None:
+                current_date = max(current_date, datetime.strptime(range_end, date_format).date() + timedelta(days=1))
+        return missing_dates
 
     @staticmethod
-    def return_date_list():
-        pass
+    def import_meta_csv(meta_csv_path: str, meta_key: str, delimiter: str = ','):
+        """
+        Imports the dates of a meta_file.csv of earlier versions into the meta database
 
+        :param meta_csv_path: path of the csv meta file
+        :param meta_key: path of the meta database
+        :param delimiter: delimiter of the csv meta file
+        """
+        # pandas is only needed for the import, the meta queries of a run do without it
+        import pandas
+        df_meta = pandas.read_csv(meta_csv_path, delimiter=delimiter)
+        source_dates = pandas.to_datetime(df_meta[MetaProcessFormat.META_SOURCE_DATE_COL.value])
+        MetaProcess.update_meta_file(list(source_dates.dt.strftime(MetaProcessFormat.META_DATE_FORMAT.value)),
+                                     meta_key)
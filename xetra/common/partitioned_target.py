@@ -0,0 +1,111 @@
+"""
+Date partitioned target for the report output
+
+Every value of the partition column is written to its own file
+<trg_key><date in trg_key_date_format>.<trg_format>, a run only rewrites the partitions of the dates it processed.
+The manifest _<trg_key>manifest.json lists all partitions, so readers find them without listing the location.
+The version of a partition counts its writes, so readers can tell a rewritten partition from the one they saw.
+"""
+import logging
+from datetime import datetime
+from typing import List
+
+import pandas
+
+from xetra.common.constants import MetaProcessFormat, WriteSettings
+from xetra.common.file_operations import FileOperations
+
+
+class PartitionedTarget:
+    """
+    Writes and locates the date partitions of a report
+    """
+
+    def __init__(self, file_operations: FileOperations, trg_key: str, trg_key_date_format: str, trg_format: str,
+                 partition_col: str, row_group_rows: int = None,
+                 compression: str = WriteSettings.PARQUET_CODEC.value, dictionary_cols: List = None):
+        """
+        :param file_operations: connection to the target files location
+        :param trg_key: basic key of the partition files
+        :param trg_key_date_format: date format of the partition file keys
+        :param trg_format: file format of the partition files
+        :param partition_col: date column the data frame is partitioned by
+        :param row_group_rows: maximum rows per parquet row group, the pyarrow default if None.
+            The partitions keep the row order of the data frame, so with QuerySettings.ROW_GROUP_ROWS
+            a report sorted by ISIN gets row groups with narrow ISIN statistics for ReportQuery
+        :param compression: codec of parquet partitions, a value of ParquetCodecs
+        :param dictionary_cols: columns of parquet partitions that are dictionary encoded, all columns if None
+        """
+        self._logger = logging.getLogger(__name__)
+        self.file_operations = file_operations
+        self.trg_key = trg_key
+        self.trg_key_date_format = trg_key_date_format
+        self.trg_format = trg_format
+        self.partition_col = partition_col
+        self.row_group_rows = row_group_rows
+        self.compression = compression
+        self.dictionary_cols = dictionary_cols
+        self.manifest_key = f'_{trg_key}manifest.json'
+
+    def partition_key(self, date_string: str) -> str:
+        """
+        :param date_string: partition date in META_DATE_FORMAT
+        :return: key of the partition file
+        """
+        partition_date = datetime.strptime(date_string, MetaProcessFormat.META_DATE_FORMAT.value)
+        return f'{self.trg_key}{partition_date.strftime(self.trg_key_date_format)}.{self.trg_format}'
+
+    def read_manifest(self) -> dict:
+        """
+        :return: manifest of the target, empty manifest if nothing was written yet
+        """
+        try:
+            return self.file_operations.read_json_from_location(self.manifest_key)
+        except FileNotFoundError:
+            return {'latest_date': None, 'partitions': {}}
+
+    def write_partitions(self, data_frame: pandas.DataFrame, partition_dates: List = None) -> List:
+        """
+        Writes one file per partition date and publishes the partitions in the manifest
+
+        Each partition file is swapped in atomically, the manifest is rewritten last,
+        so readers going through the manifest see either the old or the new set of partitions.
+
+        :param data_frame: report data frame containing partition_col
+        :param partition_dates: dates that should be written, all dates of the data frame if None
+        :return: list of written partition keys
+        """
+        if partition_dates is None:
+            partition_dates = data_frame[self.partition_col].unique()
+        manifest = self.read_manifest()
+        written_keys = []
+        partitions = dict(tuple(data_frame.groupby(self.partition_col, sort=True)))
+        for date_string in sorted(set(partition_dates) & set(partitions)):
+            key = self.partition_key(date_string)
+            partition_df = partitions[date_string]
+            self.file_operations.write_df_to_location(partition_df, key, self.trg_format, self.row_group_rows,
+                                                      self.compression, self.dictionary_cols)
+            manifest['partitions'][date_string] = {
+                'key': key,
+                'rows': len(partition_df),
+                'version': manifest['partitions'].get(date_string, {}).get('version', 0) + 1,
+                MetaProcessFormat.META_PROCESS_COL.value:
+                    datetime.today().strftime(MetaProcessFormat.META_PROCESS_FORMAT.value)
+            }
+            written_keys.append(key)
+        if written_keys:
+            manifest['latest_date'] = max(manifest['partitions'])
+            self.file_operations.write_json_to_location(manifest, self.manifest_key)
+            self._logger.info('%s partitions written to %s', len(written_keys), self.manifest_key)
+        return written_keys
+
+    def latest_partitions(self, count: int = None) -> List:
+        """
+        :param count: number of most recent partitions to return, all partitions if None
+        :return: partition keys ordered by date
+        """
+        partitions = self.read_manifest()['partitions']
+        dates = sorted(partitions)
+        if count is not None:
+            dates = dates[-count:]
+        return [partitions[date_string]['key'] for date_string in dates]
@@ -0,0 +1,233 @@
+"""
+Lookups by ISIN list and date range over the date partitions of a report
+
+A query only touches what it needs:
+    partitions: the dates of the range are looked up in the manifest of the PartitionedTarget
+    row groups: row groups whose ISIN or date statistics can not match are skipped
+    columns: only the requested columns and the filter columns are read
+
+Reading one ISIN over a year still opens one file per date. cluster_partitions rewrites a date range
+into one file sorted by ISIN then date with small row groups, so such a lookup reads a single row group.
+The clusters are listed in the manifest under 'clusters' with the version of every partition
+they contain. A cluster is only used while none of its partitions was written again, otherwise the
+daily partitions are read. Query results and parquet footers are kept in LRU caches,
+results are cached per manifest content, so writing partitions invalidates them.
+"""
+import bisect
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import pandas
+import pyarrow
+import pyarrow.compute
+import pyarrow.parquet
+
+from xetra.common.constants import FileTypes, MetaProcessFormat, QuerySettings
+from xetra.common.file_operations import FileOperations
+from xetra.common.partitioned_target import PartitionedTarget
+
+
+class _LRUCache:
+    """
+    Least recently used cache with a fixed number of entries
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        :return: value of the key, None if it is not cached
+        """
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ReportQuery:
+    """
+    Reads ISINs and date ranges from the parquet partitions of a report written by PartitionedTarget
+    """
+
+    def __init__(self, file_operations: FileOperations, trg_key: str, trg_key_date_format: str, isin_col: str,
+                 date_col: str, result_cache_size: int = QuerySettings.RESULT_CACHE_SIZE.value,
+                 metadata_cache_size: int = QuerySettings.METADATA_CACHE_SIZE.value):
+        """
+        :param file_operations: connection to the target files location
+        :param trg_key: basic key of the partition files
+        :param trg_key_date_format: date format of the partition file keys
+        :param isin_col: column name for isin in the report
+        :param date_col: column name for date in the report, the partition column
+        :param result_cache_size: number of query results kept in the LRU cache
+        :param metadata_cache_size: number of parquet footers kept in the LRU cache
+        """
+        self._logger = logging.getLogger(__name__)
+        self.file_operations = file_operations
+        self.isin_col = isin_col
+        self.date_col = date_col
+        self.target = PartitionedTarget(file_operations, trg_key, trg_key_date_format, FileTypes.PARQUET.value,
+                                        date_col)
+        self._results = _LRUCache(result_cache_size)
+        self._metadata = _LRUCache(metadata_cache_size)
+
+    def query(self, isins: List = None, start_date: str = None, end_date: str = None,
+              columns: List = None) -> pandas.DataFrame:
+        """
+        Reads the rows of the ISINs in the date range
+
+        :param isins: ISINs that should be read, all ISINs if None
+        :param start_date: first date in META_DATE_FORMAT, the first partition if None
+        :param end_date: last date in META_DATE_FORMAT, the last partition if None
+        :param columns: columns that should be returned, all columns if None
+        :return: data frame sorted by ISIN and date
+        """
+        manifest = self.target.read_manifest()
+        isins = None if isins is None else sorted(set(isins))
+        cache_key = (json.dumps(manifest, sort_keys=True), None if isins is None else tuple(isins), start_date,
+                     end_date, None if columns is None else tuple(columns))
+        report_df = self._results.get(cache_key)
+        if report_df is not None:
+            self._logger.info('Report query served from cache')
+            return report_df.copy()
+        dates = [date_string for date_string in sorted(manifest['partitions'])
+                 if (start_date is None or date_string >= start_date) and (end_date is None or date_string <= end_date)]
+        tables = []
+        remaining_dates = set(dates)
+        for cluster in manifest.get('clusters', []):
+            cluster_dates = remaining_dates & set(cluster['partitions'])
+            if cluster_dates and self._cluster_is_current(cluster, manifest):
+                tables.append(self._read_file(cluster['key'], isins, min(cluster_dates), max(cluster_dates), columns))
+                remaining_dates -= cluster_dates
+        for date_string in sorted(remaining_dates):
+            tables.append(self._read_file(manifest['partitions'][date_string]['key'], isins, date_string,
+                                          date_string, columns))
+        if tables:
+            report_df = pyarrow.concat_tables(tables).to_pandas()
+            report_df = report_df.sort_values(by=[self.isin_col, self.date_col], ignore_index=True)
+        else:
+            report_df = pandas.DataFrame(columns=columns)
+        if columns is not None:
+            report_df = report_df[columns]
+        self._logger.info('Report query read %s rows from %s files', len(report_df), len(tables))
+        self._results.put(cache_key, report_df)
+        return report_df.copy()
+
+    def cluster_partitions(self, start_date: str, end_date: str,
+                           row_group_rows: int = QuerySettings.ROW_GROUP_ROWS.value) -> str:
+        """
+        Rewrites the partitions of a date range into one file sorted by ISIN then date
+        and lists it in the manifest, clusters overlapping the range are replaced
+
+        :param start_date: first date in META_DATE_FORMAT
+        :param end_date: last date in META_DATE_FORMAT
+        :param row_group_rows: maximum rows per row group of the clustered file
+        :return: key of the clustered file, None if the range has no partitions
+        """
+        manifest = self.target.read_manifest()
+        partitions = {date_string: entry for date_string, entry in manifest['partitions'].items()
+                      if start_date <= date_string <= end_date}
+        if not partitions:
+            self._logger.info('No partitions to cluster from %s to %s', start_date, end_date)
+            return None
+        report_df = pandas.concat([self.file_operations.read_parquet_to_df(partitions[date_string]['key'])
+                                   for date_string in sorted(partitions)], ignore_index=True)
+        report_df = report_df.sort_values(by=[self.isin_col, self.date_col], ignore_index=True)
+        key = f'{self.target.trg_key}clustered_{min(partitions)}_{max(partitions)}.{self.target.trg_format}'
+        self.file_operations.write_df_to_location(report_df, key, self.target.trg_format, row_group_rows)
+        # the manifest is read again, so partitions written while clustering are not lost
+        manifest = self.target.read_manifest()
+        manifest['clusters'] = [cluster for cluster in manifest.get('clusters', [])
+                                if cluster['end_date'] < start_date or cluster['start_date'] > end_date] + [{
+                                    'key': key,
+                                    'start_date': min(partitions),
+                                    'end_date': max(partitions),
+                                    'rows': len(report_df),
+                                    'partitions': {date_string: entry.get('version')
+                                                   for date_string, entry in partitions.items()},
+                                    MetaProcessFormat.META_PROCESS_COL.value:
+                                        datetime.today().strftime(MetaProcessFormat.META_PROCESS_FORMAT.value)
+                                }]
+        self.file_operations.write_json_to_location(manifest, self.target.manifest_key)
+        self._logger.info('%s partitions clustered to %s', len(partitions), key)
+        return key
+
+    @staticmethod
+    def _cluster_is_current(cluster: dict, manifest: dict) -> bool:
+        """
+        :return: True if no partition of the cluster was written again after clustering
+        """
+        return all(date_string in manifest['partitions'] and
+                   manifest['partitions'][date_string].get('version') == version
+                   for date_string, version in cluster['partitions'].items())
+
+    def _read_file(self, key: str, isins: List, start_date: str, end_date: str, columns: List) -> pyarrow.Table:
+        """
+        Reads the matching rows of a parquet file, skipping row groups by their ISIN and date statistics
+        """
+        path = Path(self.file_operations.file_path, key)
+        parquet_file = self._parquet_file(path)
+        metadata = parquet_file.metadata
+        column_names = metadata.schema.names
+        isin_index = column_names.index(self.isin_col)
+        date_index = column_names.index(self.date_col)
+        row_groups = []
+        for row_group in range(metadata.num_row_groups):
+            row_group_metadata = metadata.row_group(row_group)
+            if self._overlaps(row_group_metadata.column(date_index).statistics, start_date, end_date) and \
+                    (isins is None or self._may_contain(row_group_metadata.column(isin_index).statistics, isins)):
+                row_groups.append(row_group)
+        read_columns = None if columns is None else \
+            list(dict.fromkeys([self.isin_col, self.date_col] + list(columns)))
+        table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+        mask = pyarrow.compute.and_(pyarrow.compute.greater_equal(table.column(self.date_col), start_date),
+                                    pyarrow.compute.less_equal(table.column(self.date_col), end_date))
+        if isins is not None:
+            mask = pyarrow.compute.and_(mask, pyarrow.compute.is_in(table.column(self.isin_col),
+                                                                    value_set=pyarrow.array(isins)))
+        return table.filter(mask)
+
+    def _parquet_file(self, path: Path) -> pyarrow.parquet.ParquetFile:
+        """
+        Opens a parquet file with its cached footer, files are never modified in place,
+        so the modification time identifies the footer
+        """
+        cache_key = (path.as_posix(), path.stat().st_mtime_ns)
+        metadata = self._metadata.get(cache_key)
+        parquet_file = pyarrow.parquet.ParquetFile(path, metadata=metadata)
+        if metadata is None:
+            self._metadata.put(cache_key, parquet_file.metadata)
+        return parquet_file
+
+    @staticmethod
+    def _may_contain(statistics, values: List) -> bool:
+        """
+        :param statistics: column chunk statistics of a row group, None if they were not written
+        :param values: sorted values that are searched
+        :return: False if the row group can not contain any of the values
+        """
+        if statistics is None or not statistics.has_min_max:
+            return True
+        position = bisect.bisect_left(values, statistics.min)
+        return position < len(values) and values[position] <= statistics.max
+
+    @staticmethod
+    def _overlaps(statistics, start_value, end_value) -> bool:
+        """
+        :param statistics: column chunk statistics of a row group, None if they were not written
+        :return: False if the row group can not contain a value from start_value to end_value
+        """
+        if statistics is None or not statistics.has_min_max:
+            return True
+        return statistics.min <= end_value and statistics.max >= start_value
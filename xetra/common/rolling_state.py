@@ -0,0 +1,238 @@
+"""
+Carry-over state of the rolling analytics per ISIN
+
+The state keeps ring buffers with the latest values of every ISIN: closing prices for the moving averages,
+daily returns for the volatility and daily highs and lows for the 52 week high and low. A buffer is a NumPy
+array with one row per ISIN and one column per slot of the window, a counter per ISIN tells how many values
+were pushed, so the next slot is the counter modulo the window. A new day pushes one value per traded ISIN
+and reads the metrics off the buffers, so the update costs O(ISINs) regardless of the length of the history.
+Windows are counted in trading days of the ISIN, days without trades of an ISIN do not move its buffers.
+
+recompute derives the same metrics with pandas rolling windows from the full report history to verify
+the incremental results. rebuild replays the full history into an empty state, a state written with other
+windows has to be rebuilt before it can be updated.
+"""
+import logging
+from typing import List
+
+import numpy
+import pandas
+
+from xetra.common.constants import RollingSettings
+from xetra.common.file_operations import FileOperations
+
+
+def _push(buffer: numpy.ndarray, counts: numpy.ndarray, rows: numpy.ndarray, values: numpy.ndarray):
+    """
+    Writes one value per row into the next slot of the ring buffer
+    """
+    buffer[rows, counts[rows] % buffer.shape[1]] = values
+    counts[rows] += 1
+
+
+def _last_values(buffer: numpy.ndarray, counts: numpy.ndarray, rows: numpy.ndarray, window: int):
+    """
+    :return: last window values of the rows, unordered, and a mask of the rows with at least window values
+    """
+    positions = (counts[rows, None] - window + numpy.arange(window)) % buffer.shape[1]
+    return buffer[rows[:, None], positions], counts[rows] >= window
+
+
+class RollingWindowState:
+    """
+    Persisted ring buffers per ISIN for moving averages, volatility and high and low of the closing report
+    """
+    _CLOSE = 'close'
+    _RETURN = 'return'
+    _HIGH = 'high'
+    _LOW = 'low'
+
+    def __init__(self, file_operations: FileOperations, key: str, isin_col: str, date_col: str, close_col: str,
+                 high_col: str, low_col: str, ma_windows: tuple = RollingSettings.MA_WINDOWS.value,
+                 volatility_window: int = RollingSettings.VOLATILITY_WINDOW.value,
+                 high_low_window: int = RollingSettings.HIGH_LOW_WINDOW.value):
+        """
+        :param file_operations: connection to the location of the state file
+        :param key: key of the npz state file
+        :param isin_col: column name for isin
+        :param date_col: column name for date
+        :param close_col: column name for closing price
+        :param high_col: column name for the highest price of the day
+        :param low_col: column name for the lowest price of the day
+        :param ma_windows: trading days of the moving averages of the closing price
+        :param volatility_window: trading days of the standard deviation of the daily returns
+        :param high_low_window: trading days of the rolling high and low, 252 for 52 weeks
+        """
+        self._logger = logging.getLogger(__name__)
+        self.file_operations = file_operations
+        self.key = key
+        self.isin_col = isin_col
+        self.date_col = date_col
+        self.close_col = close_col
+        self.high_col = high_col
+        self.low_col = low_col
+        self.ma_windows = tuple(ma_windows)
+        self.volatility_window = volatility_window
+        self.high_low_window = high_low_window
+
+    def metric_columns(self) -> List:
+        """
+        :return: names of the metric columns in the order of the analytics data frame
+        """
+        return [f'closing_ma_{window}' for window in self.ma_windows] + \
+            [f'volatility_{self.volatility_window}_%', f'high_{self.high_low_window}d',
+             f'low_{self.high_low_window}d']
+
+    def _capacities(self) -> dict:
+        """
+        :return: slots of every buffer
+        """
+        return {self._CLOSE: max(self.ma_windows), self._RETURN: self.volatility_window,
+                self._HIGH: self.high_low_window, self._LOW: self.high_low_window}
+
+    def empty_state(self) -> dict:
+        """
+        :return: state without ISINs
+        """
+        state = {'isins': numpy.array([], dtype=str), 'last_date': numpy.array([], dtype=str)}
+        for name, capacity in self._capacities().items():
+            state[name] = numpy.full((0, capacity), numpy.nan)
+            state[f'{name}_counts'] = numpy.zeros(0, dtype='int64')
+        return state
+
+    def read(self) -> dict:
+        """
+        :return: state arrays by name, empty state if no state was written yet
+        """
+        try:
+            state = self.file_operations.read_arrays_from_location(self.key)
+        except FileNotFoundError:
+            return self.empty_state()
+        for name, capacity in self._capacities().items():
+            if state[name].shape[1] != capacity:
+                raise ValueError(f'The state {self.key} was written with {state[name].shape[1]} slots for {name} '
+                                 f'instead of {capacity}, rebuild it from the report history')
+        return state
+
+    def write(self, state: dict):
+        """
+        Replaces the state file atomically, so a failed run leaves the previous state in place
+        """
+        self.file_operations.write_arrays_to_location(state, self.key)
+        self._logger.info('Rolling window state updated for %s ISINs', len(state['isins']))
+
+    def _state_rows(self, state: dict, isins: numpy.ndarray) -> numpy.ndarray:
+        """
+        Looks up the buffer rows of the ISINs, ISINs without a row get a new empty one
+
+        :return: buffer row of every ISIN
+        """
+        isin_index = pandas.Index(state['isins'])
+        rows = isin_index.get_indexer(isins)
+        new_isins = pandas.unique(isins[rows < 0])
+        if len(new_isins):
+            state['isins'] = numpy.concatenate([state['isins'], numpy.asarray(new_isins, dtype=str)])
+            state['last_date'] = numpy.concatenate([state['last_date'], numpy.full(len(new_isins), '')]) \
+                .astype(str)
+            for name, capacity in self._capacities().items():
+                state[name] = numpy.concatenate([state[name], numpy.full((len(new_isins), capacity), numpy.nan)])
+                state[f'{name}_counts'] = numpy.concatenate([state[f'{name}_counts'],
+                                                             numpy.zeros(len(new_isins), dtype='int64')])
+            rows = pandas.Index(state['isins']).get_indexer(isins)
+        return rows
+
+    def update(self, data_frame: pandas.DataFrame, state: dict = None) -> pandas.DataFrame:
+        """
+        Pushes the days of a daily report into the buffers in date order and returns their metrics
+        Rows whose ISIN already holds the date or a later one in the state are skipped, so processing
+        a date again does not shift the windows
+
+        :param data_frame: daily report with one row per ISIN and date
+        :param state: state arrays returned by read, modified in place, read from the state file if None
+        :return: analytics data frame with isin, date and the metric columns, sorted by isin and date
+        """
+        state = self.read() if state is None else state
+        analytics_dfs = []
+        for date_string, day_df in data_frame.groupby(self.date_col, sort=True):
+            rows = self._state_rows(state, day_df[self.isin_col].to_numpy(dtype=str))
+            # fixed width strings, widen the dates before a longer one is assigned
+            state['last_date'] = state['last_date'].astype(
+                numpy.promote_types(state['last_date'].dtype, numpy.asarray(date_string).dtype))
+            is_new = state['last_date'][rows] < date_string
+            rows = rows[is_new]
+            day_df = day_df[is_new]
+            analytics_dfs.append(self._push_day(state, rows, day_df, date_string))
+        columns = [self.isin_col, self.date_col] + self.metric_columns()
+        if not analytics_dfs:
+            return pandas.DataFrame(columns=columns)
+        analytics_df = pandas.concat(analytics_dfs, ignore_index=True)
+        return analytics_df.sort_values(by=[self.isin_col, self.date_col], ignore_index=True)[columns]
+
+    def _push_day(self, state: dict, rows: numpy.ndarray, day_df: pandas.DataFrame,
+                  date_string: str) -> pandas.DataFrame:
+        """
+        Pushes one day into the buffers of its rows and reads their metrics
+        """
+        close = day_df[self.close_col].to_numpy(dtype='float64')
+        # the previous close is the last slot written before this day
+        close_buffer, close_counts = state[self._CLOSE], state[f'{self._CLOSE}_counts']
+        previous_close, has_previous = _last_values(close_buffer, close_counts, rows, 1)
+        has_return = has_previous & (previous_close[:, 0] != 0)
+        _push(state[self._RETURN], state[f'{self._RETURN}_counts'], rows[has_return],
+              close[has_return] / previous_close[has_return, 0] - 1)
+        _push(close_buffer, close_counts, rows, close)
+        _push(state[self._HIGH], state[f'{self._HIGH}_counts'], rows, day_df[self.high_col].to_numpy(dtype='float64'))
+        _push(state[self._LOW], state[f'{self._LOW}_counts'], rows, day_df[self.low_col].to_numpy(dtype='float64'))
+        state['last_date'][rows] = date_string
+        analytics = {self.isin_col: day_df[self.isin_col].to_numpy(), self.date_col: date_string}
+        metric_columns = iter(self.metric_columns())
+        for window in self.ma_windows:
+            values, is_full = _last_values(close_buffer, close_counts, rows, window)
+            analytics[next(metric_columns)] = numpy.where(is_full, values.mean(axis=1), numpy.nan)
+        values, is_full = _last_values(state[self._RETURN], state[f'{self._RETURN}_counts'], rows,
+                                       self.volatility_window)
+        analytics[next(metric_columns)] = numpy.where(is_full, values.std(axis=1, ddof=1) * 100, numpy.nan)
+        # the high and low buffers hold exactly the window, unwritten slots are NaN until the window is full
+        analytics[next(metric_columns)] = numpy.nanmax(state[self._HIGH][rows], axis=1, initial=-numpy.inf)
+        analytics[next(metric_columns)] = numpy.nanmin(state[self._LOW][rows], axis=1, initial=numpy.inf)
+        return pandas.DataFrame(analytics)
+
+    def recompute(self, history_df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Computes the metrics of every row of the full report history with pandas rolling windows
+
+        :param history_df: daily reports of all dates
+        :return: analytics data frame with the columns and order of update
+        """
+        history_df = history_df.sort_values(by=[self.isin_col, self.date_col], ignore_index=True)
+        isin_groups = history_df.groupby(self.isin_col, sort=False)
+        close = isin_groups[self.close_col]
+        analytics = {self.isin_col: history_df[self.isin_col], self.date_col: history_df[self.date_col]}
+        metric_columns = iter(self.metric_columns())
+        for window in self.ma_windows:
+            analytics[next(metric_columns)] = close.rolling(window).mean().to_numpy()
+        previous_close = close.shift(1)
+        # the first day of an ISIN and a day after a zero close have no return, like in update,
+        # such a day keeps the volatility of the returns before it
+        returns = (history_df[self.close_col] / previous_close - 1).where(previous_close != 0)
+        analytics[next(metric_columns)] = returns.groupby(history_df[self.isin_col], sort=False).apply(
+            lambda isin_returns: isin_returns.dropna().rolling(self.volatility_window).std() * 100
+        ).reset_index(level=0, drop=True).reindex(history_df.index).groupby(
+            history_df[self.isin_col], sort=False).ffill().to_numpy()
+        analytics[next(metric_columns)] = isin_groups[self.high_col].rolling(
+            self.high_low_window, min_periods=1).max().to_numpy()
+        analytics[next(metric_columns)] = isin_groups[self.low_col].rolling(
+            self.high_low_window, min_periods=1).min().to_numpy()
+        return pandas.DataFrame(analytics)
+
+    def rebuild(self, history_df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Replaces the state with the buffers of the full report history, pushed day by day into an empty state
+
+        :param history_df: daily reports of all dates
+        :return: analytics data frame of the history, equal to recompute
+        """
+        state = self.empty_state()
+        analytics_df = self.update(history_df, state)
+        self.write(state)
+        return analytics_df
@@ -0,0 +1,230 @@
+"""Connector and methods accessing S3"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import List
+
+import boto3
+import pandas
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ConnectionClosedError, IncompleteReadError, ReadTimeoutError, ResponseStreamingError
+
+from xetra.common.compressed_source import DecompressingReader, read_compressed_csv, source_compression
+from xetra.common.constants import ExtractSettings, FileTypes, WriteSettings
+from xetra.common.custom_exceptions import WrongFormatException
+from xetra.common.file_operations import folders_by_date, write_df
+from xetra.common.source_cache import SourceCache
+
+
+class S3BucketConnector():
+    """
+    Class for interacting with S3 Buckets
+
+    All methods share one botocore client, its connection pool is sized to max_workers,
+    so listings and downloads running in the thread pool reuse the same connections.
+    bytes_read and bytes_written count the object bytes transferred so far.
+    list_files_in_location, list_source_dates, file_age_seconds and read_csv_to_df take the arguments
+    of the FileOperations methods, so the ETL reads a bucket like a local location.
+    """
+    # errors while streaming an object body are not retried by botocore itself
+    _READ_RETRY_ERRORS = (ConnectionClosedError, IncompleteReadError, ReadTimeoutError, ResponseStreamingError)
+
+    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket: str, max_workers: int = 10,
+                 max_attempts: int = 5, backoff_seconds: float = 0.5, source_cache: SourceCache = None):
+        """
+        Constructor for S3BucketConnector
+
+        :param access_key: access key for accessing S3
+        :param secret_key: secret key for accessing S3
+        :param endpoint_url: endpoint url to S3
+        :param bucket: S3 bucket name
+        :param max_workers: number of concurrent listings and downloads
+        :param max_attempts: attempts per request including the first one
+        :param backoff_seconds: base of the exponential backoff between attempts of an object read
+        :param source_cache: cache of parsed csv files, keyed by bucket, key and ETag of the object
+        """
+        self._logger = logging.getLogger(__name__)
+        self.endpoint_url = endpoint_url
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.source_cache = source_cache
+        self.session = boto3.Session(aws_access_key_id=os.environ[access_key],
+                                     aws_secret_access_key=os.environ[secret_key])
+        client_config = Config(max_pool_connections=max_workers,
+                               retries={'max_attempts': max_attempts, 'mode': 'standard'})
+        self._s3 = self.session.resource(service_name='s3', endpoint_url=endpoint_url, config=client_config)
+        self._client = self._s3.meta.client
+        self._bucket = self._s3.Bucket(bucket)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._bytes_lock = threading.Lock()
+        # modification times of the listed objects, file_age_seconds needs no request for them
+        self._last_modified = {}
+
+    def list_files_in_prefix(self, prefix: str, file_extension: str = None) -> List:
+        """
+        Listing all files with a prefix on the S3 bucket, following the pagination of list_objects_v2
+
+        :param prefix: prefix on the S3 bucket that should be filtered with
+        :param file_extension: extension or tuple of extensions of the files that should be listed, all files if None
+        :return: list of all file names containing the prefix in the key
+        """
+        paginator = self._client.get_paginator('list_objects_v2')
+        objects = [obj for page in paginator.paginate(Bucket=self._bucket.name, Prefix=prefix)
+                   for obj in page.get('Contents', [])]
+        self._last_modified.update((obj['Key'], obj['LastModified']) for obj in objects)
+        files = [obj['Key'] for obj in objects]
+        if file_extension is not None:
+            files = [key for key in files if key.endswith(file_extension)]
+        return files
+
+    def list_files_in_prefixes(self, prefixes: List, file_extension: str = None) -> List:
+        """
+        Listing the files of several prefixes concurrently
+
+        :param prefixes: prefixes on the S3 bucket, e.g. one per source date
+        :param file_extension: extension or tuple of extensions of the files that should be listed, all files if None
+        :return: list of file names in the order of the prefixes
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            listings = list(executor.map(lambda prefix: self.list_files_in_prefix(prefix, file_extension), prefixes))
+        return [key for listing in listings for key in listing]
+
+    def list_files_in_location(self, prefix: str, file_extension=ExtractSettings.SOURCE_FILE_TYPES.value) -> List:
+        """
+        Listing the files with a prefix like FileOperations.list_files_in_location
+
+        :param prefix: prefix on the S3 bucket, e.g. the date of a source folder
+        :param file_extension: extension or tuple of extensions of the files that should be listed,
+            plain and compressed source files by default
+        :return: sorted list of keys
+        """
+        return sorted(self.list_files_in_prefix(prefix, file_extension))
+
+    def list_source_dates(self, start_date: str, end_date: str) -> List:
+        """
+        Listing the dates from start_date to end_date that have a source prefix
+        The top level prefixes of the bucket are listed once, so dates without objects like weekends and holidays
+        are skipped without a listing of their own
+
+        :param start_date: first date in META_DATE_FORMAT
+        :param end_date: last date in META_DATE_FORMAT
+        :return: sorted list of dates in META_DATE_FORMAT
+        """
+        paginator = self._client.get_paginator('list_objects_v2')
+        folders = [common_prefix['Prefix'].rstrip('/')
+                   for page in paginator.paginate(Bucket=self._bucket.name, Delimiter='/')
+                   for common_prefix in page.get('CommonPrefixes', [])]
+        return sorted(date_string for date_string in folders_by_date(folders) if start_date <= date_string <= end_date)
+
+    def file_age_seconds(self, key: str) -> float:
+        """
+        :param key: key of the object
+        :return: seconds since the object was last modified, from the last listing if it listed the key
+        """
+        last_modified = self._last_modified.get(key)
+        if last_modified is None:
+            last_modified = self._client.head_object(Bucket=self._bucket.name, Key=key)['LastModified']
+        return (datetime.now(timezone.utc) - last_modified).total_seconds()
+
+    def read_object(self, key: str) -> bytes:
+        """
+        Reading an object into memory, interrupted body reads are retried with exponential backoff
+
+        :param key: key of the object that should be read
+        :return: content of the object
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                body = self._client.get_object(Bucket=self._bucket.name, Key=key)['Body'].read()
+                with self._bytes_lock:
+                    self.bytes_read += len(body)
+                return body
+            except self._READ_RETRY_ERRORS:
+                if attempt == self.max_attempts:
+                    raise
+                self._logger.info('Reading %s failed in attempt %s, retrying', key, attempt)
+                time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+
+    def read_csv_to_df(self, key: str, delimiter: str = ',', columns: List = None, dtypes: dict = None,
+                       chunksize: int = None):
+        """
+        Reading a csv file from the S3 bucket and returning a data frame
+        Objects ending in .csv.gz or .csv.zst are decompressed while they are parsed
+
+        :param key: key of the file that should be read
+        :param delimiter: delimiter of the csv file
+        :param columns: columns that should be read, all columns if None
+        :param dtypes: fixed dtypes per column, inferred if None
+        :param chunksize: if set, an iterator of data frames with chunksize rows is returned
+        :return: pandas DataFrame or iterator of data frames
+        """
+        self._logger.info('Reading file %s/%s/%s', self.endpoint_url, self._bucket.name, key)
+        compression = source_compression(key)
+        if self.source_cache is not None:
+            # the ETag changes with the object content, a head request is much cheaper than the download
+            e_tag = self._client.head_object(Bucket=self._bucket.name, Key=key)['ETag']
+            return self.source_cache.read_csv_to_df(
+                f's3://{self._bucket.name}/{key}:{e_tag}',
+                lambda: BytesIO(self.read_object(key)) if compression is None
+                else DecompressingReader(self.read_object(key), compression), delimiter, columns, dtypes, chunksize)
+        if compression is not None:
+            return read_compressed_csv(self.read_object(key), compression, delimiter, columns, dtypes, chunksize)
+        return pandas.read_csv(BytesIO(self.read_object(key)), delimiter=delimiter, usecols=columns, dtype=dtypes,
+                               chunksize=chunksize)
+
+    def read_csv_to_dfs(self, keys: List, delimiter: str = ',', columns: List = None, dtypes: dict = None) -> List:
+        """
+        Reading several csv files with the bounded thread pool
+
+        :param keys: keys of the files that should be read
+        :param delimiter: delimiter of the csv files
+        :param columns: columns that should be read, all columns if None
+        :param dtypes: fixed dtypes per column, inferred if None
+        :return: list of data frames in the order of the keys
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda key: self.read_csv_to_df(key, delimiter, columns, dtypes), keys))
+
+    def write_df_to_s3(self, data_frame: pandas.DataFrame, key: str, file_format: str, row_group_rows: int = None,
+                       compression: str = WriteSettings.PARQUET_CODEC.value, dictionary_cols: List = None,
+                       part_bytes: int = WriteSettings.MULTIPART_PART_BYTES.value):
+        """
+        Writing a pandas DataFrame to S3 from an in-memory buffer
+
+        Bodies larger than part_bytes are streamed from the buffer as a multipart upload, the parts are sent
+        concurrently over the pooled connections and no temporary file is written to disk. The object only
+        becomes visible once the upload is completed, a failed upload is aborted and leaves the previous object.
+
+        :param data_frame: pandas DataFrame that should be written
+        :param key: target key of the saved file
+        :param file_format: format of the saved file
+        :param row_group_rows: maximum rows per parquet row group, the pyarrow default if None
+        :param compression: codec of a parquet file, a value of ParquetCodecs
+        :param dictionary_cols: columns of a parquet file that are dictionary encoded, all columns if None
+        :param part_bytes: size of the parts of a multipart upload, at least 5 MB
+        :return: True, also for an empty data frame, which is not written
+        """
+        if data_frame.empty:
+            self._logger.info('The dataframe is empty! No file will be written!')
+            return True
+        if file_format not in (FileTypes.PARQUET.value, FileTypes.CSV.value):
+            self._logger.info('The file format %s is not supported to be written to s3!', file_format)
+            raise WrongFormatException
+        out_buffer = BytesIO()
+        write_df(data_frame, out_buffer, file_format, row_group_rows, compression, dictionary_cols)
+        body_bytes = out_buffer.tell()
+        out_buffer.seek(0)
+        self._logger.info('Writing file to %s/%s/%s', self.endpoint_url, self._bucket.name, key)
+        transfer_config = TransferConfig(multipart_threshold=part_bytes, multipart_chunksize=part_bytes,
+                                         max_concurrency=self.max_workers, use_threads=self.max_workers > 1)
+        self._client.upload_fileobj(out_buffer, self._bucket.name, key, Config=transfer_config)
+        with self._bytes_lock:
+            self.bytes_written += body_bytes
+        return True
@@ -0,0 +1,194 @@
+"""
+Content-addressed columnar cache of source csv files
+
+A source file is parsed once and stored as an Arrow IPC file in the cache folder, later reads memory-map
+the cached file instead of parsing the text again. The cache key is a hash of the source id and the
+read options, the source id identifies the content of the file:
+
+    local files: resolved path, size and modification time, see file_source_id
+    S3 objects: bucket, key and ETag
+
+Source files are immutable, a changed file gets a new source id and therefore a new cache file,
+the outdated one is evicted eventually. Cache files are evicted least recently used first once the
+folder exceeds its size cap, a hit refreshes the modification time the eviction is ordered by.
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, List, Union
+
+import pandas
+import pyarrow
+import pyarrow.ipc
+
+CACHE_FILE_SUFFIX = '.arrow'
+
+
+class _CachedChunks:
+    """
+    Iterator of data frames with chunksize rows over a cached table or the data frame parsed on a miss,
+    usable as context manager like the reader of pandas.read_csv
+    """
+
+    def __init__(self, table: Union[pyarrow.Table, pandas.DataFrame], chunksize: int):
+        self._table = table
+        self._chunksize = chunksize
+
+    def __iter__(self):
+        for start in range(0, len(self._table), self._chunksize):
+            if isinstance(self._table, pandas.DataFrame):
+                yield self._table.iloc[start:start + self._chunksize]
+                continue
+            chunk_df = self._table.slice(start, self._chunksize).to_pandas()
+            chunk_df.index = pandas.RangeIndex(start, start + len(chunk_df))
+            yield chunk_df
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._table = None
+        return False
+
+
+class SourceCache:
+    """
+    Local cache of parsed source csv files shared by FileOperations and S3BucketConnector
+    """
+
+    def __init__(self, cache_path: str, max_size_mb: int = 1024):
+        """
+        :param cache_path: folder of the cache files, created if it does not exist
+        :param max_size_mb: size cap of the cache folder in MB
+        """
+        self._logger = logging.getLogger(__name__)
+        self.cache_path = cache_path
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        Path(cache_path).mkdir(parents=True, exist_ok=True)
+
+    def __getstate__(self):
+        # the cache is passed to process pools, locks and loggers are created again in the worker
+        state = self.__dict__.copy()
+        del state['_lock'], state['_logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def file_source_id(path: Path) -> str:
+        """
+        :param path: path of a local source file
+        :return: source id of the file from its resolved path, size and modification time
+        """
+        stat = Path(path).stat()
+        return f'{Path(path).resolve().as_posix()}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    def cache_file(self, source_id: str, delimiter: str = ',', columns: List = None, dtypes: dict = None) -> Path:
+        """
+        :param source_id: id of the source file content
+        :param delimiter: delimiter of the csv file
+        :param columns: columns that are read, all columns if None
+        :param dtypes: fixed dtypes per column, inferred if None
+        :return: path of the cache file of the source read with these options
+        """
+        options = repr((source_id, delimiter, columns, sorted((dtypes or {}).items(), key=lambda item: item[0])))
+        return Path(self.cache_path, hashlib.sha256(options.encode()).hexdigest() + CACHE_FILE_SUFFIX)
+
+    def read_csv_to_df(self, source_id: str, load_source: Callable, delimiter: str = ',', columns: List = None,
+                       dtypes: dict = None, chunksize: int = None):
+        """
+        Reading a source csv file from the cache, on a miss the file is parsed and added to the cache
+
+        A miss parses the whole file once, also if chunksize is set, and returns the parsed data frame,
+        only the cache file is written from its Arrow table.
+
+        :param source_id: id of the source file content
+        :param load_source: called on a miss, returns the csv file as path or buffer for pandas.read_csv
+        :param delimiter: delimiter of the csv file
+        :param columns: columns that should be read, all columns if None
+        :param dtypes: fixed dtypes per column, inferred if None
+        :param chunksize: if set, an iterator of data frames with chunksize rows is returned
+        :return: pandas DataFrame or iterator of data frames
+        """
+        cache_file = self.cache_file(source_id, delimiter, columns, dtypes)
+        table = self._read_cache_file(cache_file)
+        if table is None:
+            with self._lock:
+                self.misses += 1
+            self._logger.info('Source cache miss for %s', source_id)
+            source = load_source()
+            try:
+                data_frame = pandas.read_csv(source, delimiter=delimiter, usecols=columns, dtype=dtypes)
+            finally:
+                # a decompressing reader stops its background thread when it is closed, also on a failed parse
+                if hasattr(source, 'close'):
+                    source.close()
+            self._write_cache_file(cache_file, pyarrow.Table.from_pandas(data_frame, preserve_index=False))
+            self._evict(keep=cache_file)
+            return data_frame if chunksize is None else _CachedChunks(data_frame, chunksize)
+        with self._lock:
+            self.hits += 1
+        self._logger.info('Source cache hit for %s', source_id)
+        if chunksize is not None:
+            return _CachedChunks(table, chunksize)
+        return table.to_pandas()
+
+    def _read_cache_file(self, cache_file: Path):
+        """
+        Memory-maps a cache file and refreshes its modification time
+
+        :return: table of the cache file, None if it is not cached
+        """
+        try:
+            # the table keeps the mapped region, closing the memory map releases the file handle
+            with pyarrow.memory_map(str(cache_file)) as source:
+                table = pyarrow.ipc.open_file(source).read_all()
+            os.utime(cache_file)
+        except FileNotFoundError:
+            # also raised if the file is evicted by another process between opening and touching it
+            return None
+        return table
+
+    def _write_cache_file(self, cache_file: Path, table: pyarrow.Table):
+        """
+        Writes a table as Arrow IPC file to a temporary file and renames it to the cache file,
+        so concurrent readers never map a partially written file
+        """
+        temp_path = Path(cache_file.parent, f'.{cache_file.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            with pyarrow.ipc.new_file(str(temp_path), table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temp_path, cache_file)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def _evict(self, keep: Path):
+        """
+        Deletes the least recently used cache files until the folder fits its size cap
+        """
+        entries = []
+        for path in Path(self.cache_path).glob(f'*{CACHE_FILE_SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if cache_size <= self.max_size_mb * 1024 ** 2:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            cache_size -= size
+            self._logger.info('Evicted source cache file %s', path.name)
@@ -0,0 +1,127 @@
+"""
+Validation of the source rows of a file batch
+
+Every check is a vectorized mask over the whole batch: missing values, numbers that could not be parsed,
+a start price outside the min and max price, a negative traded volume and repeated isin, date and time.
+Valid rows keep flowing into the transformation, the invalid rows are set aside as quarantine data frame
+with the source file and the reason of every row. Files that cannot be read at all are quarantined
+as a single row without values.
+A batch without invalid rows is returned as it is, so the clean case only pays for the masks.
+"""
+from typing import List, NamedTuple
+
+import numpy
+import pandas
+
+from xetra.common.constants import QuarantineReasons
+
+QUARANTINE_FILE_COL = 'source_file'
+QUARANTINE_REASON_COL = 'reason'
+
+
+class ValidatedBatch(NamedTuple):
+    """
+    Valid rows of a batch and its quarantined rows with source file and reason
+    """
+    data_frame: pandas.DataFrame
+    quarantine_df: pandas.DataFrame
+
+
+def quarantine_file(source_file: str, reason: str, columns: List = None) -> ValidatedBatch:
+    """
+    :param source_file: key or path of the file
+    :param reason: reason the file was set aside, a QuarantineReasons value with details
+    :param columns: columns of the valid rows
+    :return: batch without valid rows and one quarantine row for the file
+    """
+    quarantine_df = pandas.DataFrame({QUARANTINE_FILE_COL: [str(source_file)], QUARANTINE_REASON_COL: [reason]})
+    return ValidatedBatch(pandas.DataFrame(columns=columns), quarantine_df)
+
+
+def coerce_numeric(data_frame: pandas.DataFrame, numeric_cols: List):
+    """
+    Parses the numeric columns of a batch read as strings, values that are no numbers become NaN
+
+    :param data_frame: batch read with string columns, changed in place
+    :param numeric_cols: columns holding numbers
+    :return: mask of the rows with a value that is no number
+    """
+    invalid_rows = numpy.zeros(len(data_frame), dtype=bool)
+    for column in numeric_cols:
+        values = pandas.to_numeric(data_frame[column], errors='coerce').astype('float64')
+        invalid_rows |= values.isna().to_numpy() & data_frame[column].notna().to_numpy()
+        data_frame[column] = values
+    return invalid_rows
+
+
+def duplicated_rows(data_frame: pandas.DataFrame, key_cols: List) -> numpy.ndarray:
+    """
+    Finds the rows repeating the key of an earlier row, like DataFrame.duplicated
+
+    The key columns are factorized into one dense integer per row, counting the integers tells
+    whether any key repeats, only then the repeated rows are looked up.
+
+    :param data_frame: batch of source rows
+    :param key_cols: columns of the key
+    :return: mask of the rows whose key appeared in an earlier row
+    """
+    keys = numpy.zeros(len(data_frame), dtype='int64')
+    keys_count = 1
+    for column in key_cols:
+        values = data_frame[column]
+        # a column with a single value, like the date of a source file, does not tell rows apart
+        if len(values) and values.iloc[0] == values.iloc[-1] and (values == values.iloc[0]).all():
+            continue
+        # missing values get the code -1, they are shifted to 0 and compare equal like in DataFrame.duplicated
+        codes, uniques = pandas.factorize(values)
+        keys = keys * (len(uniques) + 1) + codes + 1
+        keys_count *= len(uniques) + 1
+    if keys_count <= 4 * len(keys):
+        has_duplicates = numpy.bincount(keys, minlength=keys_count).max() > 1
+    else:
+        has_duplicates = len(pandas.unique(keys)) < len(keys)
+    if not has_duplicates:
+        return numpy.zeros(len(data_frame), dtype=bool)
+    return pandas.Series(keys).duplicated().to_numpy()
+
+
+def validate_source_df(data_frame: pandas.DataFrame, source_file: str, isin_col: str, date_col: str, time_col: str,
+                       start_price_col: str, min_price_col: str, max_price_col: str, volume_col: str,
+                       invalid_rows: numpy.ndarray = None) -> ValidatedBatch:
+    """
+    Splits a batch of source rows into valid and quarantined rows
+
+    :param data_frame: source rows of one file
+    :param source_file: key or path of the file
+    :param isin_col: column name for isin
+    :param date_col: column name for date
+    :param time_col: column name for time
+    :param start_price_col: column name for start price
+    :param min_price_col: column name for minimum price
+    :param max_price_col: column name for maximum price
+    :param volume_col: column name for traded volume
+    :param invalid_rows: mask of the rows with a value that is no number, returned by coerce_numeric
+    :return: valid rows and quarantine data frame with the source columns, source file and reason
+    """
+    start_price = data_frame[start_price_col].to_numpy(dtype='float64', na_value=numpy.nan)
+    # rows with missing values fail the comparisons as well, the reasons below are checked in order
+    checks = [
+        (QuarantineReasons.INVALID_NUMBER.value,
+         numpy.zeros(len(data_frame), dtype=bool) if invalid_rows is None else invalid_rows),
+        (QuarantineReasons.MISSING_VALUE.value, data_frame.isna().to_numpy().any(axis=1)),
+        (QuarantineReasons.PRICE_RANGE.value,
+         ~((data_frame[min_price_col].to_numpy(dtype='float64', na_value=numpy.nan) <= start_price) &
+           (start_price <= data_frame[max_price_col].to_numpy(dtype='float64', na_value=numpy.nan)))),
+        (QuarantineReasons.NEGATIVE_VOLUME.value,
+         data_frame[volume_col].to_numpy(dtype='float64', na_value=numpy.nan) < 0),
+        (QuarantineReasons.DUPLICATE_ROW.value,
+         duplicated_rows(data_frame, [isin_col, date_col, time_col]))
+    ]
+    invalid = numpy.logical_or.reduce([mask for _, mask in checks])
+    if not invalid.any():
+        return ValidatedBatch(data_frame, pandas.DataFrame(columns=[QUARANTINE_FILE_COL, QUARANTINE_REASON_COL]))
+    reasons = numpy.select([mask[invalid] for _, mask in checks], [reason for reason, _ in checks], default='')
+    quarantine_df = data_frame[invalid].reset_index(drop=True)
+    quarantine_df.insert(0, QUARANTINE_REASON_COL, reasons)
+    quarantine_df.insert(0, QUARANTINE_FILE_COL, str(source_file))
+    return ValidatedBatch(data_frame[~invalid].reset_index(drop=True), quarantine_df)
@@ -0,0 +1,454 @@
+"""
+Reports computed from one shared scan of the Xetra source, see XetraETL.etl_reports
+
+A report declares the source columns it needs, folds batches of source rows into a mergeable aggregate
+with add and returns its data frame with result. Batches arrive in source order, in the plain or the
+compact source schema, and may be chunks of a file when the extract streams.
+"""
+import logging
+from typing import List, NamedTuple
+
+import numpy
+import pandas
+
+from xetra.common.compact_schema import expand_date_values
+from xetra.common.constants import MetaProcessFormat, WriteSettings
+from xetra.common.custom_exceptions import WrongFormatException
+from xetra.transformers.xetra_transformer import XetraSourceConfig, XetraTargetConfig, add_change_prev_closing, \
+    report1_aggregate
+
+
+class VwapTargetConfig(NamedTuple):
+    """
+    Class for target configuration data of the VWAP report
+
+    src_col_price: column name of the price in source that is weighted by the traded volume
+    trg_col_isin: column name for isin in target
+    trg_col_date: column name for date in target
+    trg_col_vwap: column name for the volume weighted average price in target
+    trg_col_traded_vol: column name for daily traded volume in target
+    trg_key: basic key of target file
+    trg_key_date_format: date format of target file key
+    trg_format: file format of the target file
+    trg_compression: codec of parquet target files, a value of ParquetCodecs
+    """
+    src_col_price: str
+    trg_col_isin: str
+    trg_col_date: str
+    trg_col_vwap: str
+    trg_col_traded_vol: str
+    trg_key: str
+    trg_key_date_format: str
+    trg_format: str
+    trg_compression: str = WriteSettings.PARQUET_CODEC.value
+
+
+class HourlyVolumeTargetConfig(NamedTuple):
+    """
+    Class for target configuration data of the trade count and volume by hour report
+
+    src_col_trades: column name for the number of trades in source, source rows are counted if None
+    trg_col_isin: column name for isin in target
+    trg_col_date: column name for date in target
+    trg_col_hour: column name for the hour of the day in target
+    trg_col_trades: column name for the number of trades in target
+    trg_col_traded_vol: column name for traded volume in target
+    trg_key: basic key of target file
+    trg_key_date_format: date format of target file key
+    trg_format: file format of the target file
+    trg_compression: codec of parquet target files, a value of ParquetCodecs
+    """
+    src_col_trades: str
+    trg_col_isin: str
+    trg_col_date: str
+    trg_col_hour: str
+    trg_col_trades: str
+    trg_col_traded_vol: str
+    trg_key: str
+    trg_key_date_format: str
+    trg_format: str
+    trg_compression: str = WriteSettings.PARQUET_CODEC.value
+
+
+class OhlcvBarsTargetConfig(NamedTuple):
+    """
+    Class for target configuration data of the intraday OHLCV bars report
+
+    bar_minutes: length of a bar in minutes, e.g. 5, 15 or 60, it has to divide the minutes of a day
+    src_col_end_price: column name of the last price of the minute in source, the close of a bar
+    trg_col_isin: column name for isin in target
+    trg_col_date: column name for date in target
+    trg_col_bar_time: column name for the start time of the bar in HH:MM in target
+    trg_col_open_price: column name for the opening price of the bar in target
+    trg_col_high_price: column name for the highest price of the bar in target
+    trg_col_low_price: column name for the lowest price of the bar in target
+    trg_col_close_price: column name for the closing price of the bar in target
+    trg_col_traded_vol: column name for the traded volume of the bar in target
+    trg_key: basic key of target file
+    trg_key_date_format: date format of target file key
+    trg_format: file format of the target file
+    trg_compression: codec of parquet target files, a value of ParquetCodecs
+    """
+    bar_minutes: int
+    src_col_end_price: str
+    trg_col_isin: str
+    trg_col_date: str
+    trg_col_bar_time: str
+    trg_col_open_price: str
+    trg_col_high_price: str
+    trg_col_low_price: str
+    trg_col_close_price: str
+    trg_col_traded_vol: str
+    trg_key: str
+    trg_key_date_format: str
+    trg_format: str
+    trg_compression: str = WriteSettings.PARQUET_CODEC.value
+
+
+class XetraReport:
+    """
+    Base class of the reports fed by XetraETL.etl_reports
+    """
+    name = None
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: NamedTuple):
+        """
+        :param src_args: NamedTouple class with source configuration data
+        :param target_args: NamedTouple class with target configuration data of the report, it has to contain
+            trg_col_isin, trg_col_date, trg_key, trg_key_date_format, trg_format and trg_compression
+        """
+        self.src_args = src_args
+        self.target_args = target_args
+
+    def source_columns(self) -> List:
+        """
+        :return: source columns the report needs
+        """
+        raise NotImplementedError
+
+    def add(self, data_frame: pandas.DataFrame):
+        """
+        Folds a batch of source rows into the report
+
+        :param data_frame: batch of source rows
+        """
+        raise NotImplementedError
+
+    def result(self) -> pandas.DataFrame:
+        """
+        :return: report data frame with the date column trg_col_date
+        """
+        raise NotImplementedError
+
+    def _published_keys(self, report_df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Converts the ISIN and date columns of the compact schema back to strings
+        """
+        if self.src_args.src_compact_schema:
+            trg = self.target_args
+            report_df[trg.trg_col_isin] = report_df[trg.trg_col_isin].astype(str)
+            report_df[trg.trg_col_date] = expand_date_values(report_df[trg.trg_col_date],
+                                                             MetaProcessFormat.META_DATE_FORMAT.value)
+        return report_df
+
+
+class Report1(XetraReport):
+    """
+    Report1 with opening, closing, minimum and maximum price, daily traded volume
+    and change to the previous closing price per ISIN and date
+    """
+    name = 'report1'
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: XetraTargetConfig):
+        super().__init__(src_args, target_args)
+        self._aggregate = report1_aggregate(src_args, target_args)
+
+    def source_columns(self) -> List:
+        src = self.src_args
+        return [src.src_col_isin, src.src_col_date, src.src_col_time, src.src_col_start_price,
+                src.src_col_min_price, src.src_col_max_price, src.src_col_traded_vol]
+
+    def add(self, data_frame: pandas.DataFrame):
+        self._aggregate.add(data_frame)
+
+    def result(self) -> pandas.DataFrame:
+        report_df = self._aggregate.result()
+        if report_df.empty:
+            return report_df
+        return add_change_prev_closing(report_df, self.target_args)
+
+
+class SummedReport(XetraReport):
+    """
+    Report whose aggregate is a sum per group, the partial sums of the batches are merged
+    once they outgrow the merged sums, so merging stays amortized linear
+    """
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: NamedTuple):
+        super().__init__(src_args, target_args)
+        self._summed_df = None
+        self._pending_dfs = []
+        self._pending_rows = 0
+
+    def _partial_sums(self, data_frame: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        :param data_frame: batch of source rows
+        :return: sums of the batch indexed by the group keys
+        """
+        raise NotImplementedError
+
+    def _report_from_sums(self, summed_df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        :param summed_df: sums of all batches with the group keys as columns
+        :return: report data frame
+        """
+        raise NotImplementedError
+
+    def add(self, data_frame: pandas.DataFrame):
+        partial_df = self._partial_sums(data_frame)
+        if self._summed_df is None:
+            self._summed_df = partial_df
+            return
+        self._pending_dfs.append(partial_df)
+        self._pending_rows += len(partial_df)
+        if self._pending_rows >= len(self._summed_df):
+            self._merge_pending()
+
+    def _merge_pending(self):
+        if not self._pending_dfs:
+            return
+        combined_df = pandas.concat([self._summed_df] + self._pending_dfs)
+        self._pending_dfs = []
+        self._pending_rows = 0
+        self._summed_df = combined_df.groupby(level=list(range(combined_df.index.nlevels)), sort=False,
+                                              observed=True).sum()
+
+    def result(self) -> pandas.DataFrame:
+        if self._summed_df is None:
+            return self._report_from_sums(None)
+        self._merge_pending()
+        return self._report_from_sums(self._summed_df.reset_index())
+
+
+class VwapReport(SummedReport):
+    """
+    Volume weighted average price and traded volume per ISIN and date, created with a VwapTargetConfig
+    """
+    name = 'vwap'
+    _PRICE_VOLUME = '_price_volume'
+
+    def source_columns(self) -> List:
+        src = self.src_args
+        return [src.src_col_isin, src.src_col_date, self.target_args.src_col_price, src.src_col_traded_vol]
+
+    def _partial_sums(self, data_frame: pandas.DataFrame) -> pandas.DataFrame:
+        src = self.src_args
+        trg = self.target_args
+        valid_df = data_frame[self.source_columns()]
+        valid_df = valid_df[valid_df.notna().all(axis=1)]
+        volume = valid_df[src.src_col_traded_vol].astype('float64')
+        return pandas.DataFrame({
+            src.src_col_isin: valid_df[src.src_col_isin],
+            src.src_col_date: valid_df[src.src_col_date],
+            self._PRICE_VOLUME: valid_df[trg.src_col_price].astype('float64') * volume,
+            trg.trg_col_traded_vol: volume
+        }).groupby([src.src_col_isin, src.src_col_date], sort=False, observed=True).sum()
+
+    def _report_from_sums(self, summed_df: pandas.DataFrame) -> pandas.DataFrame:
+        src = self.src_args
+        trg = self.target_args
+        columns = [trg.trg_col_isin, trg.trg_col_date, trg.trg_col_vwap, trg.trg_col_traded_vol]
+        if summed_df is None:
+            return pandas.DataFrame(columns=columns)
+        report_df = summed_df.rename(columns={src.src_col_isin: trg.trg_col_isin, src.src_col_date: trg.trg_col_date})
+        # ISIN-days without volume have no weighted price
+        traded_volume = report_df[trg.trg_col_traded_vol]
+        report_df[trg.trg_col_vwap] = report_df[self._PRICE_VOLUME] / traded_volume.where(traded_volume > 0)
+        report_df = self._published_keys(report_df).round(decimals=2)
+        return report_df.sort_values(by=[trg.trg_col_isin, trg.trg_col_date], ignore_index=True)[columns]
+
+
+class HourlyVolumeReport(SummedReport):
+    """
+    Number of trades and traded volume per ISIN, date and hour of the day, created with a HourlyVolumeTargetConfig
+    """
+    name = 'hourly_volume'
+    _TRADES = '_trades'
+
+    def source_columns(self) -> List:
+        src = self.src_args
+        columns = [src.src_col_isin, src.src_col_date, src.src_col_time, src.src_col_traded_vol]
+        if self.target_args.src_col_trades is not None:
+            columns.append(self.target_args.src_col_trades)
+        return columns
+
+    def _partial_sums(self, data_frame: pandas.DataFrame) -> pandas.DataFrame:
+        src = self.src_args
+        trg = self.target_args
+        valid_df = data_frame[self.source_columns()]
+        valid_df = valid_df[valid_df.notna().all(axis=1)]
+        time_values = valid_df[src.src_col_time]
+        if self.src_args.src_compact_schema:
+            hours = (time_values // 60).astype('int16')
+        else:
+            hours = time_values.str[:2].astype('int16')
+        return pandas.DataFrame({
+            src.src_col_isin: valid_df[src.src_col_isin],
+            src.src_col_date: valid_df[src.src_col_date],
+            trg.trg_col_hour: hours,
+            self._TRADES: 1 if trg.src_col_trades is None else valid_df[trg.src_col_trades].astype('int64'),
+            trg.trg_col_traded_vol: valid_df[src.src_col_traded_vol].astype('float64')
+        }).groupby([src.src_col_isin, src.src_col_date, trg.trg_col_hour], sort=False, observed=True).sum()
+
+    def _report_from_sums(self, summed_df: pandas.DataFrame) -> pandas.DataFrame:
+        src = self.src_args
+        trg = self.target_args
+        columns = [trg.trg_col_isin, trg.trg_col_date, trg.trg_col_hour, trg.trg_col_trades, trg.trg_col_traded_vol]
+        if summed_df is None:
+            return pandas.DataFrame(columns=columns)
+        report_df = summed_df.rename(columns={src.src_col_isin: trg.trg_col_isin, src.src_col_date: trg.trg_col_date,
+                                              self._TRADES: trg.trg_col_trades})
+        report_df = self._published_keys(report_df)
+        return report_df.sort_values(by=[trg.trg_col_isin, trg.trg_col_date, trg.trg_col_hour],
+                                     ignore_index=True)[columns]
+
+
+class OhlcvBarsReport(XetraReport):
+    """
+    Open, high, low, close and traded volume per ISIN, date and N-minute bar, created with a OhlcvBarsTargetConfig
+
+    The bars are built with NumPy instead of a resample per ISIN: ISIN, date and bar are combined to one
+    integer group key, one stable lexsort by group key and time puts the rows of every bar in time order,
+    and the bar values are taken at the group boundaries or reduced with ufunc.reduceat. Every batch is
+    reduced to bars, the bars of the batches are reduced again once they outgrow the reduced bars.
+    """
+    name = 'ohlcv_bars'
+    _MINUTES_PER_DAY = 24 * 60
+    _BAR = '_bar'
+    _FIRST_TIME = '_first_time'
+    _LAST_TIME = '_last_time'
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: OhlcvBarsTargetConfig):
+        super().__init__(src_args, target_args)
+        if target_args.bar_minutes <= 0 or self._MINUTES_PER_DAY % target_args.bar_minutes:
+            logging.getLogger(__name__).info('The bar length of %s minutes is not supported!',
+                                             target_args.bar_minutes)
+            raise WrongFormatException
+        # bars of several lengths run in one scan, the name tells them apart
+        self.name = f'{self.name}_{target_args.bar_minutes}min'
+        self._bars_df = None
+        self._pending_dfs = []
+        self._pending_rows = 0
+
+    def source_columns(self) -> List:
+        src = self.src_args
+        return [src.src_col_isin, src.src_col_date, src.src_col_time, src.src_col_start_price,
+                src.src_col_max_price, src.src_col_min_price, self.target_args.src_col_end_price,
+                src.src_col_traded_vol]
+
+    def _minutes_of_day(self, time_values: pandas.Series) -> numpy.ndarray:
+        """
+        :return: minutes since midnight of the source times
+        """
+        if self.src_args.src_compact_schema:
+            return time_values.to_numpy(dtype='int16')
+        # a day has at most 1440 distinct times, only those are parsed
+        time_codes, time_labels = pandas.factorize(time_values)
+        label_minutes = time_labels.str[:2].astype('int16') * 60 + time_labels.str[3:5].astype('int16')
+        return label_minutes.to_numpy()[time_codes]
+
+    def add(self, data_frame: pandas.DataFrame):
+        src = self.src_args
+        trg = self.target_args
+        valid_df = data_frame[self.source_columns()]
+        valid_df = valid_df[valid_df.notna().all(axis=1)]
+        if valid_df.empty:
+            return
+        minutes = self._minutes_of_day(valid_df[src.src_col_time])
+        volume = valid_df[src.src_col_traded_vol]
+        # the compact schema downcasts the volume per batch
+        volume = volume.astype('int64') if pandas.api.types.is_integer_dtype(volume) else volume.astype('float64')
+        bars_df = self._reduce_bars(pandas.DataFrame({
+            src.src_col_isin: valid_df[src.src_col_isin],
+            src.src_col_date: valid_df[src.src_col_date],
+            self._BAR: minutes // trg.bar_minutes,
+            self._FIRST_TIME: minutes,
+            trg.trg_col_open_price: valid_df[src.src_col_start_price],
+            self._LAST_TIME: minutes,
+            trg.trg_col_close_price: valid_df[trg.src_col_end_price],
+            trg.trg_col_high_price: valid_df[src.src_col_max_price],
+            trg.trg_col_low_price: valid_df[src.src_col_min_price],
+            trg.trg_col_traded_vol: volume
+        }), same_times=True)
+        if self._bars_df is None:
+            self._bars_df = bars_df
+            return
+        self._pending_dfs.append(bars_df)
+        self._pending_rows += len(bars_df)
+        if self._pending_rows >= len(self._bars_df):
+            self._merge_pending()
+
+    def _merge_pending(self):
+        if not self._pending_dfs:
+            return
+        combined_df = pandas.concat([self._bars_df] + self._pending_dfs, ignore_index=True)
+        self._pending_dfs = []
+        self._pending_rows = 0
+        self._bars_df = self._reduce_bars(combined_df, same_times=False)
+
+    def _reduce_bars(self, bars_df: pandas.DataFrame, same_times: bool) -> pandas.DataFrame:
+        """
+        Reduces rows of bars to one row per ISIN, date and bar, on equal times the earlier row wins
+        for the opening and the later row for the closing price, as in a stable sort of all rows
+
+        :param bars_df: source rows or bars in source order
+        :param same_times: True if first and last time of every row are equal, so one sort serves both
+        :return: one row per ISIN, date and bar in group key order
+        """
+        src = self.src_args
+        trg = self.target_args
+        isin_codes, isin_values = pandas.factorize(bars_df[src.src_col_isin])
+        date_codes, date_values = pandas.factorize(bars_df[src.src_col_date])
+        bars_count = self._MINUTES_PER_DAY // trg.bar_minutes
+        group_key = (isin_codes.astype('int64') * len(date_values) + date_codes) * bars_count + \
+            bars_df[self._BAR].to_numpy()
+        first_order = numpy.lexsort((bars_df[self._FIRST_TIME].to_numpy(), group_key))
+        # sorted by group key first, both orders have the same group boundaries
+        last_order = first_order if same_times else numpy.lexsort((bars_df[self._LAST_TIME].to_numpy(), group_key))
+        sorted_key = group_key[first_order]
+        starts = numpy.flatnonzero(numpy.r_[True, sorted_key[1:] != sorted_key[:-1]])
+        ends = numpy.r_[starts[1:], len(sorted_key)] - 1
+        reduced_df = bars_df[[src.src_col_isin, src.src_col_date, self._BAR, self._FIRST_TIME,
+                              trg.trg_col_open_price]].take(first_order[starts]).reset_index(drop=True)
+        last_rows = last_order[ends]
+        reduced_df[self._LAST_TIME] = bars_df[self._LAST_TIME].to_numpy()[last_rows]
+        reduced_df[trg.trg_col_close_price] = bars_df[trg.trg_col_close_price].to_numpy()[last_rows]
+        for column, ufunc in ((trg.trg_col_high_price, numpy.maximum), (trg.trg_col_low_price, numpy.minimum),
+                              (trg.trg_col_traded_vol, numpy.add)):
+            reduced_df[column] = ufunc.reduceat(bars_df[column].to_numpy()[first_order], starts)
+        return reduced_df
+
+    def result(self) -> pandas.DataFrame:
+        src = self.src_args
+        trg = self.target_args
+        columns = [trg.trg_col_isin, trg.trg_col_date, trg.trg_col_bar_time, trg.trg_col_open_price,
+                   trg.trg_col_high_price, trg.trg_col_low_price, trg.trg_col_close_price, trg.trg_col_traded_vol]
+        if self._bars_df is None:
+            return pandas.DataFrame(columns=columns)
+        self._merge_pending()
+        report_df = self._bars_df.rename(columns={src.src_col_isin: trg.trg_col_isin,
+                                                  src.src_col_date: trg.trg_col_date})
+        # a day has at most 1440 bars, only their distinct start times are formatted
+        bar_codes, bar_starts = pandas.factorize(report_df[self._BAR].to_numpy().astype('int32') * trg.bar_minutes)
+        bar_labels = numpy.array([f'{minute // 60:02d}:{minute % 60:02d}' for minute in bar_starts], dtype=object)
+        report_df[trg.trg_col_bar_time] = pandas.Series(bar_labels[bar_codes], dtype=str)
+        report_df = self._published_keys(report_df)
+        # the compact schema holds float32 prices, rounding them to cents gives back the source prices
+        price_cols = [trg.trg_col_open_price, trg.trg_col_high_price, trg.trg_col_low_price, trg.trg_col_close_price]
+        report_df[price_cols] = report_df[price_cols].astype('float64').round(decimals=2)
+        return report_df.sort_values(by=[trg.trg_col_isin, trg.trg_col_date, trg.trg_col_bar_time],
+                                     ignore_index=True)[columns]
+
+
+# report class per report name, a report is created with the source configuration and its target configuration
+REPORTS = {report.name: report for report in (Report1, VwapReport, HourlyVolumeReport, OhlcvBarsReport)}
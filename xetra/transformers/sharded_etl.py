@@ -0,0 +1,296 @@
+"""
+ISIN sharded execution of report 1
+
+Every aggregation of report 1 only looks at the rows of one ISIN, the change to the previous closing price
+included, so the report of a shard of the ISINs does not depend on the other shards. The source rows are
+hash partitioned by ISIN into shard_count shards in two steps, both run by worker processes:
+
+    partition_source: reads a slice of the source files and writes the rows of every shard to part files
+    transform_shard: folds the part files of one shard in source order into the report of the shard
+
+ShardedXetraETL coordinates the steps, merges the shard reports and writes them to the partitioned target.
+The tasks only hold picklable locations, configurations and keys, the workers exchange data through files
+of the work location, so a worker can run on another node sharing the locations.
+
+ShardedXetraETL.transform_sharded runs a data frame extracted by the coordinator through the same shard
+tasks with another per ISIN transformation, get_xtera_data uses it for transform_data.
+"""
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, NamedTuple
+
+import numpy
+import pandas
+
+from configs.process_logger import StageMetrics
+from xetra.common.compact_schema import concat_compact_dfs
+from xetra.common.constants import FileTypes
+from xetra.common.file_operations import FileOperations
+from xetra.transformers.xetra_transformer import XetraETL, XetraSourceConfig, XetraTargetConfig, \
+    add_change_prev_closing, report1_aggregate
+
+
+def isin_shards(isin_values: pandas.Series, shard_count: int) -> numpy.ndarray:
+    """
+    :param isin_values: ISIN column, plain or categorical
+    :param shard_count: number of shards
+    :return: shard of every row, an ISIN gets the same shard in every process
+    """
+    # the hash of python strings is salted per process, the pandas hash is not
+    return (pandas.util.hash_pandas_object(isin_values, index=False).to_numpy() % shard_count).astype('int64')
+
+
+class PartitionTask(NamedTuple):
+    """
+    Work order of partition_source
+
+    files_source: connection to source files location
+    files_work: connection to the location the part files are written to
+    src_args: NamedTouple class with source configuration data
+    target_args: NamedTouple class with target configuration data
+    source_keys: source files of the task in source order
+    part_prefix: prefix of the part file keys, unique per run
+    task_index: position of the task in source order
+    shard_count: number of shards
+    """
+    files_source: FileOperations
+    files_work: FileOperations
+    src_args: XetraSourceConfig
+    target_args: XetraTargetConfig
+    source_keys: list
+    part_prefix: str
+    task_index: int
+    shard_count: int
+
+
+class ShardTask(NamedTuple):
+    """
+    Work order of transform_shard
+
+    files_work: connection to the location of the part files and shard reports
+    src_args: NamedTouple class with source configuration data
+    target_args: NamedTouple class with target configuration data
+    part_keys: part files of the shard in source order
+    report_key: key the report of the shard is written to
+    transform: picklable function transforming the rows of the shard instead of report 1,
+        e.g. a functools.partial of a module level function
+    """
+    files_work: FileOperations
+    src_args: XetraSourceConfig
+    target_args: XetraTargetConfig
+    part_keys: list
+    report_key: str
+    transform: Callable = None
+
+
+def collect_shard_rows(data_frame: pandas.DataFrame, isin_col: str, shard_count: int, shard_dfs: dict):
+    """
+    Appends the rows of every shard of the data frame to the list of the shard in shard_dfs
+    """
+    shards = isin_shards(data_frame[isin_col], shard_count)
+    for shard in numpy.unique(shards):
+        shard_dfs.setdefault(int(shard), []).append(data_frame[shards == shard])
+
+
+def write_shard_parts(files_work: FileOperations, src_args: XetraSourceConfig, shard_dfs: dict, part_prefix: str,
+                      task_index: int, part_keys: List):
+    """
+    Writes the collected rows of every shard to a part file, appends (shard, part key) to part_keys
+    and clears shard_dfs
+    """
+    for shard in sorted(shard_dfs):
+        part_key = f'{part_prefix}shard_{shard:04d}/part_{task_index:05d}_{len(part_keys):06d}.' \
+                   f'{FileTypes.PARQUET.value}'
+        part_df = concat_compact_dfs(shard_dfs[shard], src_args.src_col_isin) if src_args.src_compact_schema \
+            else pandas.concat(shard_dfs[shard], ignore_index=True)
+        files_work.write_df_to_location(part_df, part_key, FileTypes.PARQUET.value)
+        part_keys.append((shard, part_key))
+    shard_dfs.clear()
+
+
+def partition_source(task: PartitionTask) -> List:
+    """
+    Reads the source files of the task and writes the rows of every shard to a part file,
+    with a memory budget the part files are written per source batch
+
+    :param task: PartitionTask
+    :return: list of (shard, part key) in source order
+    """
+    src = task.src_args
+    xetra_etl = XetraETL(task.files_source, None, None, src, task.target_args)
+    shard_dfs = {}
+    part_keys = []
+    for key in task.source_keys:
+        for batch_df in xetra_etl._source_batches(key):
+            collect_shard_rows(batch_df, src.src_col_isin, task.shard_count, shard_dfs)
+            if src.src_memory_budget_mb:
+                write_shard_parts(task.files_work, src, shard_dfs, task.part_prefix, task.task_index, part_keys)
+    write_shard_parts(task.files_work, src, shard_dfs, task.part_prefix, task.task_index, part_keys)
+    return part_keys
+
+
+def transform_shard(task: ShardTask) -> str:
+    """
+    Folds the part files of a shard into report 1 of its ISINs and writes it to the work location,
+    with task.transform the concatenated part files are transformed by it instead
+
+    :param task: ShardTask
+    :return: key of the shard report, None if the shard has no rows
+    """
+    if task.transform is not None:
+        part_dfs = [task.files_work.read_parquet_to_df(part_key) for part_key in task.part_keys]
+        part_df = concat_compact_dfs(part_dfs, task.src_args.src_col_isin) if task.src_args.src_compact_schema \
+            else pandas.concat(part_dfs, ignore_index=True)
+        report_df = task.transform(part_df)
+        if report_df.empty:
+            return None
+        task.files_work.write_df_to_location(report_df, task.report_key, FileTypes.PARQUET.value)
+        return task.report_key
+    aggregate = report1_aggregate(task.src_args, task.target_args)
+    for part_key in task.part_keys:
+        aggregate.add(task.files_work.read_parquet_to_df(part_key))
+    report_df = aggregate.result()
+    if report_df.empty:
+        return None
+    task.files_work.write_df_to_location(add_change_prev_closing(report_df, task.target_args), task.report_key,
+                                         FileTypes.PARQUET.value)
+    return task.report_key
+
+
+class ShardedXetraETL(XetraETL):
+    """
+    XetraETL computing report 1 in ISIN shards on worker processes
+    """
+
+    def __init__(self, files_source: FileOperations, files_target: FileOperations, meta_key: str,
+                 src_args: XetraSourceConfig, target_args: XetraTargetConfig, shard_count: int,
+                 max_workers: int = None, files_work: FileOperations = None):
+        """
+        :param files_source: connection to source files location
+        :param files_target: connection to target files location
+        :param meta_key: used as self.meta_key -> key of meta file
+        :param src_args: NamedTouple class with source configuration data
+        :param target_args: NamedTouple class with target configuration data
+        :param shard_count: number of ISIN shards
+        :param max_workers: number of worker processes, shard_count if None
+        :param files_work: location of the part files and shard reports reachable by all workers,
+            a temporary folder if None
+        """
+        super().__init__(files_source, files_target, meta_key, src_args, target_args)
+        self.shard_count = shard_count
+        self.max_workers = shard_count if max_workers is None else max_workers
+        self.files_work = files_work
+
+    def etl_report1(self):
+        """
+        Extract, transform and load to create report 1 in ISIN shards
+
+        The source files are split into one slice per worker, the workers partition their rows by ISIN,
+        then every shard is transformed by a worker. The shard reports are merged sorted by ISIN and date
+        like the report of transform_report1 and written with load.
+
+        :return: True
+        """
+        self._logger.info('Sharded Xetra ETL of report 1 with %s shards started...', self.shard_count)
+        source_keys = [key for date_string in self.extract_date_list
+                       for key in self.files_source.list_files_in_location(date_string)]
+        with self._work_location() as (files_work, run_prefix):
+            report_df = self._transform_shards(files_work, run_prefix, source_keys)
+        if self.extract_date and not report_df.empty:
+            report_df = report_df[report_df[self.target_args.trg_col_date] >= self.extract_date].reset_index(
+                drop=True)
+        self.load(report_df)
+        self._logger.info('Sharded Xetra ETL of report 1 finished.')
+        return True
+
+    def transform_sharded(self, data_frame: pandas.DataFrame, transform: Callable) -> pandas.DataFrame:
+        """
+        Transforms an extracted data frame in ISIN shards on the worker processes
+
+        The coordinator writes the rows of every shard to a part file, the shards are transformed by the
+        workers with transform, which must only aggregate per ISIN. The results are merged sorted by ISIN
+        and date.
+
+        :param data_frame: source rows in source order
+        :param transform: picklable function of the rows of a shard, e.g. a functools.partial
+            of a module level function
+        :return: merged shard results
+        """
+        self._logger.info('Transformation of %s rows in %s shards started...', len(data_frame), self.shard_count)
+        with self._work_location() as (files_work, run_prefix):
+            shard_dfs = {}
+            part_keys = []
+            with StageMetrics('partition_rows', shards=self.shard_count) as metrics:
+                metrics.rows_in = len(data_frame)
+                collect_shard_rows(data_frame, self.src_args.src_col_isin, self.shard_count, shard_dfs)
+                write_shard_parts(files_work, self.src_args, shard_dfs, run_prefix, 0, part_keys)
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                report_df = self._merge_shards(executor, files_work, run_prefix, part_keys, transform)
+        if report_df is None:
+            # no shard kept rows, the transformation of the whole frame gives the columns of the result
+            report_df = transform(data_frame)
+        self._logger.info('Transformation in %s shards finished.', self.shard_count)
+        return report_df
+
+    @contextmanager
+    def _work_location(self):
+        """
+        Yields the work location and a prefix unique to the run, the files of the run are removed on exit
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            files_work = FileOperations(temp_dir) if self.files_work is None else self.files_work
+            run_prefix = f'sharded_{uuid.uuid4().hex}/'
+            try:
+                yield files_work, run_prefix
+            finally:
+                shutil.rmtree(Path(files_work.file_path, run_prefix), ignore_errors=True)
+
+    def _transform_shards(self, files_work: FileOperations, run_prefix: str, source_keys: List) -> pandas.DataFrame:
+        """
+        Runs the partition and shard tasks on the worker processes and merges the shard reports
+        """
+        trg = self.target_args
+        slices_count = max(1, min(self.max_workers, len(source_keys)))
+        partition_tasks = [PartitionTask(self.files_source, files_work, self.src_args, trg,
+                                         source_keys[index * len(source_keys) // slices_count:
+                                                     (index + 1) * len(source_keys) // slices_count],
+                                         run_prefix, index, self.shard_count)
+                           for index in range(slices_count)]
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            with StageMetrics('partition_source', shards=self.shard_count, files=len(source_keys)):
+                part_keys = [part_key for task_part_keys in executor.map(partition_source, partition_tasks)
+                             for part_key in task_part_keys]
+            report_df = self._merge_shards(executor, files_work, run_prefix, part_keys)
+        if report_df is None:
+            return pandas.DataFrame(columns=[trg.trg_col_isin, trg.trg_col_date, trg.trg_col_op_price,
+                                             trg.trg_col_clos_price, trg.trg_col_min_price, trg.trg_col_max_price,
+                                             trg.trg_col_dail_trad_vol, trg.trg_col_ch_prev_clos])
+        return report_df
+
+    def _merge_shards(self, executor: ProcessPoolExecutor, files_work: FileOperations, run_prefix: str,
+                      part_keys: List, transform: Callable = None) -> pandas.DataFrame:
+        """
+        Runs a shard task per shard of the (shard, part key) list and merges the shard reports
+
+        :return: shard reports sorted by ISIN and date, None if no shard has rows
+        """
+        trg = self.target_args
+        shard_part_keys = {}
+        for shard, part_key in part_keys:
+            shard_part_keys.setdefault(shard, []).append(part_key)
+        shard_tasks = [ShardTask(files_work, self.src_args, trg, shard_part_keys[shard],
+                                 f'{run_prefix}report_{shard:04d}.{FileTypes.PARQUET.value}', transform)
+                       for shard in sorted(shard_part_keys)]
+        with StageMetrics('transform_shards', shards=self.shard_count) as metrics:
+            report_keys = [key for key in executor.map(transform_shard, shard_tasks) if key is not None]
+            report_dfs = [files_work.read_parquet_to_df(key) for key in report_keys]
+            metrics.rows_out = sum(len(report_df) for report_df in report_dfs)
+        if not report_dfs:
+            return None
+        self._logger.info('%s shard reports merged.', len(report_keys))
+        return pandas.concat(report_dfs, ignore_index=True).sort_values(by=[trg.trg_col_isin, trg.trg_col_date],
+                                                                        ignore_index=True)
@@ -1,8 +1,22 @@
 """
 Xetra ETL Component
 """
-from typing import NamedTuple
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Union
+import pandas
+import pyarrow
+import pyarrow.compute
+from configs.process_logger import StageMetrics, measure_stage
+from xetra.common.compact_schema import compact_source_df, concat_compact_dfs, expand_date_values
+from xetra.common.constants import ExtractSettings, MetaProcessFormat, PipelineSettings, TransformEngines, \
+    WriteSettings
+from xetra.common.custom_exceptions import WrongFormatException
 from xetra.common.file_operations import FileOperations
+from xetra.common.meta_process import MetaProcess
+from xetra.common.partitioned_target import PartitionedTarget
 
 
 class XetraSourceConfig(NamedTuple):
@@ -10,12 +24,19 @@ class XetraSourceConfig(NamedTuple):
     Class for source configuration data
     src_first_extract_date: determines the date for extracting the source
     src_columns: source column names
+    src_col_date: column name for date in source
     src_col_isin: column name for isin in source
     src_col_time: column name for time in source
     src_col_start_price: column name for starting price in source
     src_col_min_price: column name for minimum price in source
     src_col_max_price: column name for maximum price in source
     src_col_traded_vol: column name for traded volume in source
+    src_dtypes: fixed dtypes of the source columns, inferred by read_csv if None
+    src_memory_budget_mb: memory budget for source rows in flight, 0 loads all source rows at once,
+        otherwise the files are streamed in chunks of that size and folded into partial aggregates
+    src_compact_schema: loads ISIN as categorical, date and time as integer offsets, prices as float32
+        and volume as integer, see xetra.common.compact_schema for the precision contract
+    src_transform_engine: engine aggregating the source rows of report1, a value of TransformEngines
     """
     src_first_extract_date: str
     src_columns: list
@@ -26,23 +47,28 @@ class XetraSourceConfig(NamedTuple):
     src_col_min_price: str
     src_col_max_price: str
     src_col_traded_vol: str
+    src_dtypes: dict = None
+    src_memory_budget_mb: int = 0
+    src_compact_schema: bool = False
+    src_transform_engine: str = TransformEngines.PANDAS.value
 
 
 class XetraTargetConfig(NamedTuple):
     """
     Class for target configuration data
 
-    trg_col_isin:
-    trg_col_date:
-    trg_col_op_price:
-    trg_col_clos_price:
-    trg_col_min_price:
-    trg_col_max_price:
-    trg_col_dail_trad_vol:
+    trg_col_isin: column name for isin in target
+    trg_col_date: column name for date in target
+    trg_col_op_price: column name for opening price in target
+    trg_col_clos_price: column name for closing price in target
+    trg_col_min_price: column name for minimum price in target
+    trg_col_max_price: column name for maximum price in target
+    trg_col_dail_trad_vol: column name for daily traded volume in target
     trg_col_ch_prev_clos: column name for change to previous day's closing
     trg_key: basic key of target file
-    trg_key_date_format:
+    trg_key_date_format: date format of target file key
     trg_format: file format of the target file:
+    trg_compression: codec of parquet target files, a value of ParquetCodecs
     """
     trg_col_isin: str
     trg_col_date: str
@@ -55,6 +81,327 @@ class XetraTargetConfig(NamedTuple):
     trg_key: str
     trg_key_date_format: str
     trg_format: str
+    trg_compression: str = WriteSettings.PARQUET_CODEC.value
+
+
+def report_target(files_target: FileOperations, target_args: NamedTuple) -> PartitionedTarget:
+    """
+    :param files_target: connection to target files location
+    :param target_args: NamedTouple class with target configuration data of a report
+    :return: date partitioned target of the report, only the ISIN and date columns of its parquet files
+        are dictionary encoded, the dictionaries of the price columns would hold nearly every value
+    """
+    return PartitionedTarget(files_target, target_args.trg_key, target_args.trg_key_date_format,
+                             target_args.trg_format, target_args.trg_col_date,
+                             compression=target_args.trg_compression,
+                             dictionary_cols=[target_args.trg_col_isin, target_args.trg_col_date])
+
+
+class Report1Aggregate:
+    """
+    Mergeable partial aggregate of report1 per ISIN and date
+
+    Batches of source rows are folded in one after another, the aggregate keeps first and last price
+    with their time, minimum and maximum price and traded volume, so its size depends on the number
+    of ISIN-days and not on the number of source rows.
+    """
+    _FIRST_TIME = '_first_time'
+    _LAST_TIME = '_last_time'
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: XetraTargetConfig):
+        """
+        :param src_args: NamedTouple class with source configuration data
+        :param target_args: NamedTouple class with target configuration data
+        """
+        self.src_args = src_args
+        self.target_args = target_args
+        self._partial_df = None
+        self._pending_dfs = []
+        self._pending_rows = 0
+
+    def add(self, data_frame: pandas.DataFrame):
+        """
+        Folds a batch of source rows into the aggregate, batches have to be added in source order
+
+        :param data_frame: batch of source rows
+        """
+        src = self.src_args
+        trg = self.target_args
+        source_df = data_frame[[src.src_col_isin, src.src_col_date, src.src_col_time, src.src_col_start_price,
+                                src.src_col_min_price, src.src_col_max_price, src.src_col_traded_vol]]
+        # dropping incomplete rows and sorting by time in one take instead of an inplace dropna copy
+        valid_df = source_df[source_df.notna().all(axis=1)]
+        valid_df = valid_df.sort_values(by=[src.src_col_time], kind='stable')
+        partial_df = valid_df.groupby([src.src_col_isin, src.src_col_date], sort=False, observed=True).agg(**{
+            self._FIRST_TIME: (src.src_col_time, 'first'),
+            trg.trg_col_op_price: (src.src_col_start_price, 'first'),
+            self._LAST_TIME: (src.src_col_time, 'last'),
+            trg.trg_col_clos_price: (src.src_col_start_price, 'last'),
+            trg.trg_col_min_price: (src.src_col_min_price, 'min'),
+            trg.trg_col_max_price: (src.src_col_max_price, 'max'),
+            trg.trg_col_dail_trad_vol: (src.src_col_traded_vol, 'sum')
+        })
+        if self._partial_df is None:
+            self._partial_df = partial_df
+            return
+        # pending batches are merged once they outgrow the aggregate, so merging stays amortized linear
+        self._pending_dfs.append(partial_df)
+        self._pending_rows += len(partial_df)
+        if self._pending_rows >= len(self._partial_df):
+            self._merge_pending()
+
+    def _merge_pending(self):
+        """
+        Merges the pending batch aggregates into the aggregate, on equal times the earlier batch wins
+        for the opening and the later batch for the closing price, as in a stable sort of all rows
+        """
+        if not self._pending_dfs:
+            return
+        trg = self.target_args
+        combined_df = pandas.concat([self._partial_df] + self._pending_dfs)
+        self._pending_dfs = []
+        self._pending_rows = 0
+        first_df = combined_df.sort_values(by=[self._FIRST_TIME], kind='stable').groupby(
+            level=[0, 1], sort=False, observed=True)[[self._FIRST_TIME, trg.trg_col_op_price]].first()
+        last_df = combined_df.sort_values(by=[self._LAST_TIME], kind='stable').groupby(
+            level=[0, 1], sort=False, observed=True)[[self._LAST_TIME, trg.trg_col_clos_price]].last()
+        # observed keeps the categorical ISIN of the compact schema from building the full ISIN x date product
+        other_df = combined_df.groupby(level=[0, 1], sort=False, observed=True).agg(**{
+            trg.trg_col_min_price: (trg.trg_col_min_price, 'min'),
+            trg.trg_col_max_price: (trg.trg_col_max_price, 'max'),
+            trg.trg_col_dail_trad_vol: (trg.trg_col_dail_trad_vol, 'sum')
+        })
+        self._partial_df = pandas.concat([first_df, last_df.reindex(first_df.index),
+                                          other_df.reindex(first_df.index)], axis=1)
+
+    def _partial_report(self) -> pandas.DataFrame:
+        """
+        :return: merged aggregate with the source ISIN and date columns, None if no rows were added
+        """
+        if self._partial_df is None:
+            return None
+        self._merge_pending()
+        return self._partial_df.reset_index()
+
+    def result(self) -> pandas.DataFrame:
+        """
+        :return: daily aggregate with one row per ISIN and date, sorted by ISIN and date
+        """
+        trg = self.target_args
+        columns = [trg.trg_col_isin, trg.trg_col_date, trg.trg_col_op_price, trg.trg_col_clos_price,
+                   trg.trg_col_min_price, trg.trg_col_max_price, trg.trg_col_dail_trad_vol]
+        report_df = self._partial_report()
+        if report_df is None:
+            return pandas.DataFrame(columns=columns)
+        report_df = report_df.rename(columns={self.src_args.src_col_isin: trg.trg_col_isin,
+                                              self.src_args.src_col_date: trg.trg_col_date})
+        if self.src_args.src_compact_schema:
+            report_df[trg.trg_col_isin] = report_df[trg.trg_col_isin].astype(str)
+            report_df[trg.trg_col_date] = expand_date_values(report_df[trg.trg_col_date],
+                                                             MetaProcessFormat.META_DATE_FORMAT.value)
+            # rounding the float32 prices to cents gives back the exact source prices
+            price_cols = [trg.trg_col_op_price, trg.trg_col_clos_price, trg.trg_col_min_price, trg.trg_col_max_price]
+            report_df[price_cols] = report_df[price_cols].astype('float64').round(decimals=2)
+            # the volume is downcast per batch, the published type must not depend on the batches
+            report_df[trg.trg_col_dail_trad_vol] = report_df[trg.trg_col_dail_trad_vol].astype('int64')
+        return report_df.sort_values(by=[trg.trg_col_isin, trg.trg_col_date], ignore_index=True)[columns]
+
+
+class ArrowReport1Aggregate(Report1Aggregate):
+    """
+    Report1Aggregate computed with pyarrow compute
+
+    Batches are converted to Arrow tables in the shape of the partial aggregate, with the time of a row
+    as its first and last time, and reduced together once they outgrow the reduced aggregate.
+    Minimum, maximum and volume are hash aggregated with threads, the first and last prices are ordered
+    aggregations over a stable sort by time, which Arrow runs single-threaded.
+    """
+    _MIN_REDUCE_ROWS = 100000
+    _GROUP_KEY = '_group_key'
+
+    def __init__(self, src_args: XetraSourceConfig, target_args: XetraTargetConfig):
+        """
+        :param src_args: NamedTouple class with source configuration data
+        :param target_args: NamedTouple class with target configuration data
+        """
+        super().__init__(src_args, target_args)
+        self._partial_table = None
+        self._pending_tables = []
+
+    def add(self, data_frame: pandas.DataFrame):
+        """
+        Folds a batch of source rows into the aggregate, batches have to be added in source order
+
+        :param data_frame: batch of source rows
+        """
+        src = self.src_args
+        trg = self.target_args
+        table = pyarrow.Table.from_pandas(data_frame[[src.src_col_isin, src.src_col_date, src.src_col_time,
+                                                      src.src_col_start_price, src.src_col_min_price,
+                                                      src.src_col_max_price, src.src_col_traded_vol]],
+                                          preserve_index=False).drop_null()
+        isin_values = table.column(src.src_col_isin)
+        if pyarrow.types.is_dictionary(isin_values.type):
+            # the categories differ between batches, the values are encoded again when the batches are reduced
+            isin_values = isin_values.cast(isin_values.type.value_type)
+        volume_values = table.column(src.src_col_traded_vol)
+        if pyarrow.types.is_integer(volume_values.type):
+            # the compact schema downcasts the volume per batch
+            volume_values = volume_values.cast('int64')
+        time_values = table.column(src.src_col_time)
+        price_values = table.column(src.src_col_start_price)
+        self._pending_tables.append(pyarrow.table({
+            src.src_col_isin: isin_values,
+            src.src_col_date: table.column(src.src_col_date),
+            self._FIRST_TIME: time_values,
+            trg.trg_col_op_price: price_values,
+            self._LAST_TIME: time_values,
+            trg.trg_col_clos_price: price_values,
+            trg.trg_col_min_price: table.column(src.src_col_min_price),
+            trg.trg_col_max_price: table.column(src.src_col_max_price),
+            trg.trg_col_dail_trad_vol: volume_values
+        }))
+        self._pending_rows += table.num_rows
+        reduced_rows = 0 if self._partial_table is None else self._partial_table.num_rows
+        if self._pending_rows >= max(reduced_rows, self._MIN_REDUCE_ROWS):
+            self._reduce_pending()
+
+    def _reduce_pending(self):
+        """
+        Reduces the pending tables and the aggregate to one row per ISIN and date, on equal times
+        the earlier row wins for the opening and the later row for the closing price
+
+        ISIN and date are combined to one integer group key from their dictionary indices,
+        grouping by an integer is much cheaper than grouping by two string columns.
+        """
+        if not self._pending_tables:
+            return
+        src = self.src_args
+        trg = self.target_args
+        only_source_rows = self._partial_table is None
+        tables = self._pending_tables if only_source_rows else [self._partial_table] + self._pending_tables
+        table = pyarrow.concat_tables(tables)
+        self._pending_tables = []
+        self._pending_rows = 0
+        isin_values = pyarrow.compute.dictionary_encode(table.column(src.src_col_isin)).combine_chunks()
+        date_values = pyarrow.compute.dictionary_encode(table.column(src.src_col_date)).combine_chunks()
+        dates_count = len(date_values.dictionary)
+        group_key = pyarrow.compute.add(pyarrow.compute.multiply(isin_values.indices.cast('int64'), dates_count),
+                                        date_values.indices.cast('int64'))
+        table = table.append_column(self._GROUP_KEY, group_key)
+        first_order = pyarrow.compute.sort_indices(table, sort_keys=[(self._FIRST_TIME, 'ascending')])
+        # source rows have the same first and last time, so one sort serves both
+        last_order = first_order if only_source_rows else \
+            pyarrow.compute.sort_indices(table, sort_keys=[(self._LAST_TIME, 'ascending')])
+        first_table = table.select([self._GROUP_KEY, self._FIRST_TIME, trg.trg_col_op_price]).take(first_order)
+        first_table = first_table.group_by(self._GROUP_KEY, use_threads=False).aggregate(
+            [(self._FIRST_TIME, 'first'), (trg.trg_col_op_price, 'first')])
+        last_table = table.select([self._GROUP_KEY, self._LAST_TIME, trg.trg_col_clos_price]).take(last_order)
+        last_table = last_table.group_by(self._GROUP_KEY, use_threads=False).aggregate(
+            [(self._LAST_TIME, 'last'), (trg.trg_col_clos_price, 'last')])
+        other_table = table.group_by(self._GROUP_KEY).aggregate([(trg.trg_col_min_price, 'min'),
+                                                                 (trg.trg_col_max_price, 'max'),
+                                                                 (trg.trg_col_dail_trad_vol, 'sum')])
+        # the three results hold the same groups in different orders, sorted by the key their rows line up
+        first_table, last_table, other_table = [
+            result_table.take(pyarrow.compute.sort_indices(result_table, sort_keys=[(self._GROUP_KEY, 'ascending')]))
+            for result_table in (first_table, last_table, other_table)]
+        group_key = first_table.column(self._GROUP_KEY)
+        self._partial_table = pyarrow.table({
+            src.src_col_isin: isin_values.dictionary.take(pyarrow.compute.divide(group_key, dates_count)),
+            src.src_col_date: date_values.dictionary.take(pyarrow.compute.subtract(
+                group_key, pyarrow.compute.multiply(pyarrow.compute.divide(group_key, dates_count), dates_count))),
+            self._FIRST_TIME: first_table.column(f'{self._FIRST_TIME}_first'),
+            trg.trg_col_op_price: first_table.column(f'{trg.trg_col_op_price}_first'),
+            self._LAST_TIME: last_table.column(f'{self._LAST_TIME}_last'),
+            trg.trg_col_clos_price: last_table.column(f'{trg.trg_col_clos_price}_last'),
+            trg.trg_col_min_price: other_table.column(f'{trg.trg_col_min_price}_min'),
+            trg.trg_col_max_price: other_table.column(f'{trg.trg_col_max_price}_max'),
+            trg.trg_col_dail_trad_vol: other_table.column(f'{trg.trg_col_dail_trad_vol}_sum')
+        })
+
+    def _partial_report(self) -> pandas.DataFrame:
+        """
+        :return: reduced aggregate with the source ISIN and date columns, None if no rows were added
+        """
+        self._reduce_pending()
+        if self._partial_table is None:
+            return None
+        return self._partial_table.to_pandas()
+
+
+# report1 aggregate class per value of TransformEngines
+REPORT1_ENGINES = {
+    TransformEngines.PANDAS.value: Report1Aggregate,
+    TransformEngines.ARROW.value: ArrowReport1Aggregate
+}
+
+
+def report1_aggregate(src_args: XetraSourceConfig, target_args: XetraTargetConfig) -> Report1Aggregate:
+    """
+    :param src_args: NamedTouple class with source configuration data
+    :param target_args: NamedTouple class with target configuration data
+    :return: empty report1 aggregate of the engine selected in the source configuration
+    """
+    try:
+        engine = REPORT1_ENGINES[src_args.src_transform_engine]
+    except KeyError:
+        logging.getLogger(__name__).info('The transform engine %s is not supported!', src_args.src_transform_engine)
+        raise WrongFormatException
+    return engine(src_args, target_args)
+
+
+def add_change_prev_closing(report_df: pandas.DataFrame, target_args: XetraTargetConfig) -> pandas.DataFrame:
+    """
+    Adds the change to the previous closing price of the ISIN and rounds the report
+
+    :param report_df: result of a report1 aggregate, sorted by ISIN and date
+    :param target_args: NamedTouple class with target configuration data
+    :return: report1 data frame
+    """
+    trg = target_args
+    # the aggregate is sorted by ISIN and date, so the previous row of the ISIN is the previous day
+    previous_closing_price = report_df.groupby(trg.trg_col_isin, sort=False)[trg.trg_col_clos_price].shift(1)
+    report_df[trg.trg_col_ch_prev_clos] = \
+        (report_df[trg.trg_col_clos_price] - previous_closing_price) / previous_closing_price * 100
+    return report_df.round(decimals=2)
+
+
+# marks the end of the batches of a date in the extract queue and the end of the dates in both queues
+_END = object()
+
+
+class _PipelineStopped(Exception):
+    """
+    Raised in a pipeline stage when another stage failed
+    """
+
+
+def _queue_put(stage_queue: queue.Queue, item, stop: threading.Event):
+    """
+    Puts an item into a bounded queue, blocks while the queue is full unless the pipeline is stopped
+    """
+    while True:
+        if stop.is_set():
+            raise _PipelineStopped
+        try:
+            stage_queue.put(item, timeout=PipelineSettings.POLL_SECONDS.value)
+            return
+        except queue.Full:
+            pass
+
+
+def _queue_get(stage_queue: queue.Queue, stop: threading.Event):
+    """
+    Gets an item from a queue, blocks while the queue is empty unless the pipeline is stopped
+    """
+    while True:
+        if stop.is_set():
+            raise _PipelineStopped
+        try:
+            return stage_queue.get(timeout=PipelineSettings.POLL_SECONDS.value)
+        except queue.Empty:
+            pass
 
 
 class XetraETL:
@@ -63,7 +410,9 @@ class XetraETL:
     """
 
     def __init__(self, files_source: FileOperations, files_target: FileOperations, meta_key: str,
-                 src_args: XetraSourceConfig, target_args: XetraTargetConfig):
+                 src_args: XetraSourceConfig, target_args: XetraTargetConfig,
+                 extract_queue_size: int = PipelineSettings.EXTRACT_QUEUE_SIZE.value,
+                 load_queue_size: int = PipelineSettings.LOAD_QUEUE_SIZE.value):
         """
         Constructor for XetraTransformer
         :param files_source: connection to source files location
@@ -71,24 +420,308 @@ class XetraETL:
         :param meta_key: used as self.meta_key -> key of meta file
         :param src_args: NamedTouple class with source configuration data
         :param target_args: NamedTouple class with target configuration data
+        :param extract_queue_size: source batches etl_report1 reads ahead of the transformation
+        :param load_queue_size: transformed dates etl_report1 keeps waiting for the load
         """
+        self._logger = logging.getLogger(__name__)
         self.files_source = files_source
-        self.files_source = files_target
+        self.files_target = files_target
         self.meta = meta_key
         self.src_args = src_args
         self.target_args = target_args
+        self.extract_queue_size = extract_queue_size
+        self.load_queue_size = load_queue_size
         self.extract_date = ''
-        self.extract_date_list = ''
-        self.meta_update_list = ''
+        self.extract_date_list = []
+        self.meta_update_list = []
+        if meta_key is not None:
+            self.extract_date, self.extract_date_list = MetaProcess.return_date_list(
+                self.src_args.src_first_extract_date, meta_key)
+            self.meta_update_list = [date for date in self.extract_date_list if date >= self.extract_date]
+
+    @measure_stage('extract', connectors=('files_source',))
+    def extract(self, columns: List = None) -> Union[pandas.DataFrame, Iterable[pandas.DataFrame]]:
+        """
+        Reads the source files of all extract dates
+
+        With src_memory_budget_mb set the files are not loaded at once, an iterator of chunks
+        is returned instead, which transform_report1 folds into partial aggregates.
+
+        :param columns: source columns that should be read, src_columns of the source configuration if None
+        :return: source data frame or iterator of source data frame chunks
+        """
+        self._logger.info('Extracting Xetra source files started...')
+        columns = self.src_args.src_columns if columns is None else columns
+        files = [key for date_string in self.extract_date_list
+                 for key in self.files_source.list_files_in_location(date_string)]
+        if not files:
+            data_frame = pandas.DataFrame(columns=columns)
+        elif self.src_args.src_memory_budget_mb:
+            return self._extract_chunks(files, columns)
+        else:
+            data_frames = [self._compact(self.files_source.read_csv_to_df(key, columns=columns,
+                                                                          dtypes=self.src_args.src_dtypes))
+                           for key in files]
+            if self.src_args.src_compact_schema:
+                data_frame = concat_compact_dfs(data_frames, self.src_args.src_col_isin)
+            else:
+                data_frame = pandas.concat(data_frames, ignore_index=True)
+        self._logger.info('Extracting Xetra source files finished.')
+        return data_frame
+
+    def _compact(self, data_frame: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Converts source rows to the compact schema if it is enabled in the source configuration
+        """
+        if not self.src_args.src_compact_schema:
+            return data_frame
+        src = self.src_args
+        return compact_source_df(data_frame, src.src_col_isin, src.src_col_date, src.src_col_time,
+                                 [src.src_col_start_price, src.src_col_min_price, src.src_col_max_price],
+                                 src.src_col_traded_vol, MetaProcessFormat.META_DATE_FORMAT.value)
+
+    def _extract_chunks(self, files: List, columns: List = None) -> Iterable[pandas.DataFrame]:
+        """
+        Yields the source files in chunks sized by the memory budget
+        """
+        for key in files:
+            yield from self._source_batches(key, columns)
+        self._logger.info('Extracting Xetra source files finished.')
+
+    def _source_batches(self, key: str, columns: List = None) -> Iterable[pandas.DataFrame]:
+        """
+        Yields a source file in one batch, or in chunks sized by the memory budget if it is set
+        """
+        columns = self.src_args.src_columns if columns is None else columns
+        if not self.src_args.src_memory_budget_mb:
+            yield self._compact(self.files_source.read_csv_to_df(key, columns=columns,
+                                                                 dtypes=self.src_args.src_dtypes))
+            return
+        chunk_rows = max(ExtractSettings.MIN_CHUNK_ROWS.value,
+                         self.src_args.src_memory_budget_mb * 1024 ** 2 // ExtractSettings.ROW_BYTES_ESTIMATE.value)
+        with self.files_source.read_csv_to_df(key, columns=columns,
+                                              dtypes=self.src_args.src_dtypes, chunksize=chunk_rows) as reader:
+            for chunk_df in reader:
+                yield self._compact(chunk_df)
+
+    @measure_stage('transform_report1')
+    def transform_report1(self, data_frame: Union[pandas.DataFrame, Iterable[pandas.DataFrame]]) -> pandas.DataFrame:
+        """
+        Applies the report1 aggregations to the extracted source data
+
+        Rows are sorted by time once and aggregated in a single grouped pass per ISIN and date,
+        which gives opening, closing, minimum and maximum price and the daily traded volume together.
+        Chunks from a streaming extract are folded into the same aggregate one by one, the reading of the chunks
+        is measured in the extract stage.
+        Dates before extract_date are only extracted for the previous closing price and are dropped.
+
+        :param data_frame: extracted source data frame or iterator of source data frame chunks
+        :return: report1 data frame with one row per ISIN and date
+        """
+        self._logger.info('Applying transformations to Xetra source data for report 1 started...')
+        trg = self.target_args
+        aggregate = report1_aggregate(self.src_args, trg)
+        for batch_df in ([data_frame] if isinstance(data_frame, pandas.DataFrame) else data_frame):
+            aggregate.add(batch_df)
+        report_df = aggregate.result()
+        if report_df.empty:
+            self._logger.info('The dataframe is empty. No transformations will be applied.')
+            return report_df
+        report_df = add_change_prev_closing(report_df, trg)
+        if self.extract_date:
+            report_df = report_df[report_df[trg.trg_col_date] >= self.extract_date].reset_index(drop=True)
+        self._logger.info('Applying transformations to Xetra source data finished...')
+        return report_df
 
-    def extract(self):
-        pass
+    @measure_stage('load', connectors=('files_target',))
+    def load(self, data_frame: pandas.DataFrame):
+        """
+        Writes the date partitions of the report and updates the meta file
+
+        :param data_frame: report1 data frame
+        :return: True
+        """
+        trg = self.target_args
+        target = report_target(self.files_target, trg)
+        target.write_partitions(data_frame, self.meta_update_list or None)
+        self._logger.info('Xetra target data successfully written.')
+        if self.meta is not None:
+            with StageMetrics('meta_update') as metrics:
+                metrics.rows_in = len(self.meta_update_list)
+                MetaProcess.update_meta_file(self.meta_update_list, self.meta)
+            self._logger.info('Xetra meta file successfully updated.')
+        return True
 
-    def transform_report1(self):
-        pass
+    def etl_reports(self, reports: List):
+        """
+        Extract once, transform and load several reports
 
-    def load(self):
-        pass
+        The source files are scanned a single time with the union of the source columns of the reports,
+        every batch is fanned out to all reports, so the extraction cost does not grow with the number
+        of reports. Each report is written to its own date partitions, the meta file is updated once
+        all reports are written.
+
+        :param reports: report objects, e.g. created from xetra.transformers.reports.REPORTS
+        :return: True
+        """
+        columns = list(self.src_args.src_columns)
+        for report in reports:
+            columns += [column for column in report.source_columns() if column not in columns]
+        data_frame = self.extract(columns)
+        self._logger.info('Applying transformations of %s reports started...', len(reports))
+        with StageMetrics('transform_reports', reports=[report.name for report in reports]) as metrics:
+            metrics.rows_in = 0
+            for batch_df in ([data_frame] if isinstance(data_frame, pandas.DataFrame) else data_frame):
+                metrics.rows_in += len(batch_df)
+                for report in reports:
+                    report.add(batch_df)
+            report_dfs = [report.result() for report in reports]
+            metrics.rows_out = sum(len(report_df) for report_df in report_dfs)
+        for report, report_df in zip(reports, report_dfs):
+            trg = report.target_args
+            if self.extract_date:
+                # dates before extract_date are only extracted for the previous closing price of report1
+                report_df = report_df[report_df[trg.trg_col_date] >= self.extract_date]
+            target = report_target(self.files_target, trg)
+            target.write_partitions(report_df, self.meta_update_list or None)
+            self._logger.info('Xetra report %s successfully written.', report.name)
+        if self.meta is not None:
+            with StageMetrics('meta_update') as metrics:
+                metrics.rows_in = len(self.meta_update_list)
+                MetaProcess.update_meta_file(self.meta_update_list, self.meta)
+            self._logger.info('Xetra meta file successfully updated.')
+        return True
 
     def etl_report1(self):
-        pass
+        """
+        Extract, transform and load to create report 1
+
+        The stages run as a pipeline over the extract dates: while the files of a date are read,
+        the previous date is transformed and the one before is written. The stages are connected
+        by bounded queues, so a slow stage holds back the stages feeding it instead of piling up
+        source data in memory. The closing prices are carried from date to date in the transform stage,
+        the meta file is updated once all dates are written.
+
+        :return: True
+        """
+        self._logger.info('Pipelined Xetra ETL of report 1 started...')
+        extract_queue = queue.Queue(maxsize=self.extract_queue_size)
+        load_queue = queue.Queue(maxsize=self.load_queue_size)
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stages = [executor.submit(self._run_pipeline_stage, self._extract_dates, stop, extract_queue),
+                      executor.submit(self._run_pipeline_stage, self._transform_dates, stop, extract_queue,
+                                      load_queue)]
+            self._run_pipeline_stage(self._load_dates, stop, load_queue)
+        for stage in stages:
+            stage.result()
+        if self.meta is not None:
+            with StageMetrics('meta_update') as metrics:
+                metrics.rows_in = len(self.meta_update_list)
+                MetaProcess.update_meta_file(self.meta_update_list, self.meta)
+            self._logger.info('Xetra meta file successfully updated.')
+        self._logger.info('Pipelined Xetra ETL of report 1 finished.')
+        return True
+
+    def _run_pipeline_stage(self, stage_method, stop: threading.Event, *stage_queues: queue.Queue):
+        """
+        Runs a pipeline stage, a failing stage stops the other stages and raises its exception,
+        the stopped stages return quietly
+        """
+        try:
+            stage_method(stop, *stage_queues)
+        except _PipelineStopped:
+            pass
+        except BaseException:
+            stop.set()
+            raise
+
+    def _extract_dates(self, stop: threading.Event, extract_queue: queue.Queue):
+        """
+        Pipeline stage putting the source batches of every extract date into the extract queue,
+        each date is followed by an end marker
+        """
+        for date_string in self.extract_date_list:
+            bytes_read = self.files_source.bytes_read
+            with StageMetrics('extract', date=date_string) as metrics:
+                metrics.rows_out = 0
+                for key in self.files_source.list_files_in_location(date_string):
+                    for batch_df in self._source_batches(key):
+                        metrics.rows_out += len(batch_df)
+                        # waiting for the transform stage is not extract time
+                        with metrics.paused():
+                            _queue_put(extract_queue, (date_string, batch_df), stop)
+                metrics.bytes_read = self.files_source.bytes_read - bytes_read
+            _queue_put(extract_queue, (date_string, _END), stop)
+        _queue_put(extract_queue, (None, _END), stop)
+        self._logger.info('Extracting Xetra source files finished.')
+
+    def _transform_dates(self, stop: threading.Event, extract_queue: queue.Queue, load_queue: queue.Queue):
+        """
+        Pipeline stage folding the source batches of a date into its report and putting the report
+        into the load queue, dates before extract_date only carry their closing prices to the next date
+        """
+        trg = self.target_args
+        closing_prices = pandas.Series(dtype='float64')
+        while True:
+            date_string, batch_df = _queue_get(extract_queue, stop)
+            if date_string is None:
+                break
+            aggregate = report1_aggregate(self.src_args, trg)
+            with StageMetrics('transform_report1', date=date_string) as metrics:
+                metrics.rows_in = 0
+                # without a memory budget the files of a date are aggregated together, which is cheaper
+                # than folding them in one by one
+                batch_dfs = []
+                while batch_df is not _END:
+                    metrics.rows_in += len(batch_df)
+                    if self.src_args.src_memory_budget_mb:
+                        aggregate.add(batch_df)
+                    else:
+                        batch_dfs.append(batch_df)
+                    with metrics.paused():
+                        _, batch_df = _queue_get(extract_queue, stop)
+                if batch_dfs:
+                    aggregate.add(concat_compact_dfs(batch_dfs, self.src_args.src_col_isin)
+                                  if self.src_args.src_compact_schema else pandas.concat(batch_dfs))
+                report_df, closing_prices = self._transform_date(aggregate.result(), closing_prices)
+                metrics.rows_out = len(report_df)
+            if not self.extract_date or date_string >= self.extract_date:
+                _queue_put(load_queue, (date_string, report_df), stop)
+        _queue_put(load_queue, (None, _END), stop)
+        self._logger.info('Applying transformations to Xetra source data finished...')
+
+    def _transform_date(self, report_df: pandas.DataFrame, closing_prices: pandas.Series):
+        """
+        Adds the change to the previous closing price to the aggregate of one date
+
+        :param report_df: aggregate of one date from Report1Aggregate
+        :param closing_prices: latest closing price per ISIN of the earlier dates
+        :return: report1 data frame of the date and the closing prices updated by the date
+        """
+        trg = self.target_args
+        if report_df.empty:
+            return report_df, closing_prices
+        previous_closing_price = report_df[trg.trg_col_isin].map(closing_prices)
+        report_df[trg.trg_col_ch_prev_clos] = \
+            (report_df[trg.trg_col_clos_price] - previous_closing_price) / previous_closing_price * 100
+        closing_prices = report_df.set_index(trg.trg_col_isin)[trg.trg_col_clos_price].combine_first(closing_prices)
+        return report_df.round(decimals=2), closing_prices
+
+    def _load_dates(self, stop: threading.Event, load_queue: queue.Queue):
+        """
+        Pipeline stage writing the partition of every transformed date
+        """
+        trg = self.target_args
+        target = report_target(self.files_target, trg)
+        while True:
+            date_string, report_df = _queue_get(load_queue, stop)
+            if date_string is None:
+                break
+            bytes_written = self.files_target.bytes_written
+            with StageMetrics('load', date=date_string) as metrics:
+                metrics.rows_in = len(report_df)
+                if not report_df.empty:
+                    target.write_partitions(report_df, [date_string])
+                metrics.bytes_written = self.files_target.bytes_written - bytes_written
+        self._logger.info('Xetra target data successfully written.')
@@ -0,0 +1,185 @@
+"""
+Long-running report 1 process picking up source files as they land
+
+The watcher keeps the report1 aggregates of the most recent source dates in memory. Every poll lists the
+source files from the first date not recorded in the meta file on, folds the new files into the aggregate
+of their date and rewrites the partitions of that date and of the later retained dates, whose change
+to the previous closing price depends on it. Once more dates than retained_dates have files,
+the oldest date is retired: its aggregate is dropped and it is recorded in the meta file.
+A poll takes the new files of at most retained_dates dates, so a backlog, e.g. on a first start,
+is worked off over several polls and never more than twice retained_dates aggregates are held.
+
+A restart continues from the first date missing in the meta file and reads the files of the dates
+that were not retired again, so no state besides the meta file and the target is needed.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import List
+
+import pandas
+
+from configs.process_logger import StageMetrics
+from xetra.common.constants import MetaProcessFormat, WatchSettings
+from xetra.common.file_operations import FileOperations
+from xetra.common.meta_process import MetaProcess
+from xetra.transformers.xetra_transformer import XetraETL, XetraSourceConfig, XetraTargetConfig, report1_aggregate, \
+    report_target
+
+
+class XetraWatcher(XetraETL):
+    """
+    XetraETL processing new source files of a FileOperations location or an S3 bucket incrementally
+    """
+
+    def __init__(self, files_source, files_target: FileOperations, meta_key: str, src_args: XetraSourceConfig,
+                 target_args: XetraTargetConfig, poll_seconds: float = WatchSettings.POLL_SECONDS.value,
+                 settle_seconds: float = WatchSettings.SETTLE_SECONDS.value,
+                 retained_dates: int = WatchSettings.RETAINED_DATES.value):
+        """
+        :param files_source: connection to source files location, FileOperations or S3BucketConnector
+        :param files_target: connection to target files location
+        :param meta_key: key of meta file, the watch starts at src_first_extract_date if None
+        :param src_args: NamedTouple class with source configuration data
+        :param target_args: NamedTouple class with target configuration data
+        :param poll_seconds: interval in which the source location is listed
+        :param settle_seconds: age of the modification time a file needs before it is read,
+            objects on S3 are complete once listed, so 0 reads them right away
+        :param retained_dates: most recent source dates whose aggregates are kept for late files
+        """
+        super().__init__(files_source, files_target, meta_key, src_args, target_args)
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.retained_dates = retained_dates
+        # unlike extract_date this is never the sentinel of a meta file covering today, a watch started
+        # on a processed today waits for the first date after the processed range
+        self.watch_date = src_args.src_first_extract_date if meta_key is None else MetaProcess.first_missing_date(
+            src_args.src_first_extract_date, meta_key)
+        self.target = report_target(files_target, target_args)
+        self.files_processed = 0
+        self._aggregates = {}
+        self._seen_keys = {}
+        self._closing_prices = None
+
+    def run(self, stop: threading.Event = None):
+        """
+        Polls the source location until stop is set
+
+        :param stop: event ending the watch, e.g. set by a signal handler, runs forever if None
+        """
+        stop = threading.Event() if stop is None else stop
+        self._logger.info('Watching Xetra source files since %s...', self.watch_date)
+        while not stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                # files that failed are not marked as seen, so the next poll tries them again
+                self._logger.exception('Polling the Xetra source files failed.')
+            stop.wait(self.poll_seconds)
+        self._logger.info('Watching Xetra source files stopped.')
+
+    def poll(self) -> int:
+        """
+        Processes the source files that landed since the last poll
+
+        :return: number of processed files
+        """
+        new_keys = {}
+        for date_string in self._list_source_dates():
+            seen_keys = self._seen_keys.get(date_string, set())
+            keys = [key for key in self._list_source_files(date_string)
+                    if key not in seen_keys and self._is_settled(key)]
+            if keys:
+                new_keys[date_string] = keys
+                # the later dates of a backlog are listed by the next polls, after the oldest dates are retired
+                if len(new_keys) == self.retained_dates:
+                    break
+        if not new_keys:
+            return 0
+        processed = 0
+        for date_string, keys in sorted(new_keys.items()):
+            aggregate = self._aggregates.setdefault(date_string, report1_aggregate(self.src_args, self.target_args))
+            for key in keys:
+                with StageMetrics('watch_file', key=key, landed_seconds=self._landed_seconds(key)) as metrics:
+                    metrics.rows_in = 0
+                    for batch_df in self._source_batches(key):
+                        metrics.rows_in += len(batch_df)
+                        aggregate.add(batch_df)
+                self._seen_keys.setdefault(date_string, set()).add(key)
+                processed += 1
+        self._write_dates(min(new_keys))
+        self._retire_dates()
+        self.files_processed += processed
+        return processed
+
+    def _list_source_dates(self) -> List:
+        """
+        :return: dates from watch_date to today that have source files
+        """
+        today = datetime.today().date().strftime(MetaProcessFormat.META_DATE_FORMAT.value)
+        return self.files_source.list_source_dates(self.watch_date, today)
+
+    def _list_source_files(self, date_string: str) -> List:
+        """
+        :return: keys of the source files of a date, sorted like the extract reads them
+        """
+        return self.files_source.list_files_in_location(date_string)
+
+    def _is_settled(self, key: str) -> bool:
+        """
+        :return: False for files modified within settle_seconds
+        """
+        return self.files_source.file_age_seconds(key) >= self.settle_seconds
+
+    def _landed_seconds(self, key: str) -> float:
+        """
+        :return: seconds since a file was last modified
+        """
+        return round(self.files_source.file_age_seconds(key), 3)
+
+    def _write_dates(self, first_changed_date: str):
+        """
+        Transforms the retained dates in order and writes the partitions from first_changed_date on
+        """
+        closing_prices = self._previous_closing_prices()
+        for date_string in sorted(self._aggregates):
+            with StageMetrics('watch_date', date=date_string) as metrics:
+                report_df, closing_prices = self._transform_date(self._aggregates[date_string].result(),
+                                                                 closing_prices)
+                metrics.rows_out = len(report_df)
+                if date_string >= first_changed_date and not report_df.empty:
+                    self.target.write_partitions(report_df, [date_string])
+
+    def _previous_closing_prices(self) -> pandas.Series:
+        """
+        :return: closing prices per ISIN of the latest partition before the retained dates,
+            read once and carried forward when dates are retired
+        """
+        if self._closing_prices is None:
+            self._closing_prices = pandas.Series(dtype='float64')
+            trg = self.target_args
+            partitions = self.target.read_manifest()['partitions']
+            earlier_dates = [date_string for date_string in partitions if date_string < self.watch_date]
+            if earlier_dates:
+                report_df = self.files_target.read_parquet_to_df(partitions[max(earlier_dates)]['key'],
+                                                                 columns=[trg.trg_col_isin, trg.trg_col_clos_price])
+                self._closing_prices = report_df.set_index(trg.trg_col_isin)[trg.trg_col_clos_price]
+        return self._closing_prices
+
+    def _retire_dates(self):
+        """
+        Drops the aggregates of the dates beyond retained_dates and records them in the meta file
+        together with the dates without files up to the next retained date
+        """
+        date_format = MetaProcessFormat.META_DATE_FORMAT.value
+        while len(self._aggregates) > self.retained_dates:
+            date_string = min(self._aggregates)
+            _, self._closing_prices = self._transform_date(self._aggregates.pop(date_string).result(),
+                                                           self._previous_closing_prices())
+            self._seen_keys.pop(date_string, None)
+            watch_date = datetime.strptime(self.watch_date, date_format).date()
+            next_date = datetime.strptime(min(self._aggregates), date_format).date()
+            if self.meta is not None:
+                MetaProcess.update_meta_file([(watch_date + timedelta(days=day)).strftime(date_format)
+                                              for day in range((next_date - watch_date).days)], self.meta)
+            self.watch_date = next_date.strftime(date_format)
+            self._logger.info('Xetra source date %s retired, watching since %s.', date_string, self.watch_date)